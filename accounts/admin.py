@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profile, Education, WorkExperience
+from .models import Profile, Education, WorkExperience, OutboxEmail
 
 admin.site.register(Profile)
 admin.site.register(Education)
@@ -9,3 +9,11 @@ from .models import Conversation, Message, CandidateEmailLog
 admin.site.register(Conversation)
 admin.site.register(Message)
 admin.site.register(CandidateEmailLog)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'created_at', 'sent_at', 'next_attempt_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    readonly_fields = ('created_at', 'sent_at', 'locked_at', 'last_error', 'attempts')
@@ -3,6 +3,7 @@ from django.forms import inlineformset_factory
 from .models import Profile, Education, WorkExperience
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from jobs.geocode import geocode, normalize_place
 
 
 class CustomSignupForm(UserCreationForm):
@@ -64,6 +65,19 @@ class ProfileForm(forms.ModelForm):
             "show_skills": forms.CheckboxInput(attrs={"class": "form-check-input"}),
         }
 
+    def save(self, commit=True):
+        profile = super().save(commit=False)
+        # Coordinates are derived server-side from the location string, and
+        # kept as they are while it names the same place
+        moved = normalize_place(profile.location) != normalize_place(self.initial.get("location"))
+        if moved or profile.latitude is None:
+            result = geocode(profile.location)
+            profile.latitude = result.lat if result else None
+            profile.longitude = result.lon if result else None
+        if commit:
+            profile.save()
+        return profile
+
 # Education formset
 EducationFormSet = inlineformset_factory(
     Profile, Education,
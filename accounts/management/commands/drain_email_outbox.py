@@ -0,0 +1,61 @@
+"""
+Management command that delivers queued outbox emails.
+
+Run it as a long-lived worker process (or from cron with --once). Messages
+are claimed in batches and sent over one reused connection to
+OUTBOX_DELIVERY_BACKEND; failures are retried with exponential backoff.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from accounts.outbox import MAX_ATTEMPTS, drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending emails from the transactional outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the outbox is empty instead of polling for new mail',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between outbox checks when idle',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Messages claimed per batch',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=0,
+            help='Maximum messages per second (default: unlimited)',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help=f'Give up on a message after this many failed attempts (default: {MAX_ATTEMPTS})',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain_outbox(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+                rate=options['rate'],
+            )
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(f'Delivered {sent} email(s), {failed} failed attempt(s)'))
+            if options['once']:
+                if not (sent or failed):
+                    self.stdout.write('Outbox is empty')
+                return
+            time.sleep(options['poll_interval'])
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 class Profile(models.Model):
     ROLE_CHOICES = [
@@ -32,6 +33,9 @@ class Profile(models.Model):
     show_work = models.BooleanField(default=True)
     show_skills = models.BooleanField(default=True)
 
+    # Lets the saved-search matcher only re-evaluate profiles changed since its last run
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     def __str__(self):
         return f"{self.user.username} ({self.get_role_display()})"
 
@@ -130,3 +134,51 @@ class CandidateEmailLog(models.Model):
         return f"Email to {self.candidate.user.username if self.candidate else 'unknown'} by {self.recruiter.user.username if self.recruiter else 'unknown'} at {self.sent_at}"
 
 
+
+class OutboxEmail(models.Model):
+    """
+    An outgoing email written by OutboxEmailBackend inside the sender's
+    transaction and delivered later by the drain_email_outbox worker.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=998)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    # [[content, mimetype], ...] for EmailMultiAlternatives (e.g. HTML parts)
+    alternatives = models.JSONField(default=list, blank=True)
+    # [[filename, base64 content, mimetype], ...]
+    attachments = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="When a worker claimed this message")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Updated once delivery succeeds or finally fails
+    email_log = models.ForeignKey(
+        CandidateEmailLog,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="outbox_messages",
+    )
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,263 @@
+"""
+Transactional email outbox.
+
+OutboxEmailBackend is used as EMAIL_BACKEND: instead of talking to SMTP it
+writes each message to the OutboxEmail table, inside whatever transaction the
+caller is in, so a request never waits on the mail server and a rolled-back
+request sends nothing. The drain_email_outbox worker claims pending rows in
+batches, delivers them through OUTBOX_DELIVERY_BACKEND over one reused
+connection, retries failures with exponential backoff and can be rate limited.
+
+A message may carry an ``email_log`` attribute (a CandidateEmailLog); the
+worker sets its success/error_text once delivery succeeds or finally fails.
+"""
+import base64
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from jobs.metrics import EMAIL_SEND_LATENCY
+
+from .models import CandidateEmailLog, OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+MAX_ATTEMPTS = 5
+# Claimed rows whose worker has not finished within this time are retried
+STALE_CLAIM_AFTER = timedelta(minutes=10)
+
+
+def delivery_backend():
+    return getattr(settings, 'OUTBOX_DELIVERY_BACKEND', DEFAULT_DELIVERY_BACKEND)
+
+
+def _encode_attachment(attachment):
+    if not isinstance(attachment, tuple):
+        # A MIMEBase instance; keep its rendered form
+        return [None, base64.b64encode(attachment.as_bytes()).decode('ascii'), 'message/rfc822']
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return [filename, base64.b64encode(content).decode('ascii'), mimetype]
+
+
+def outbox_row(message):
+    """Build an unsaved OutboxEmail from an EmailMessage."""
+    return OutboxEmail(
+        subject=str(message.subject),
+        body=str(message.body),
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+        alternatives=[list(alt) for alt in getattr(message, 'alternatives', [])],
+        attachments=[_encode_attachment(att) for att in message.attachments],
+        email_log=getattr(message, 'email_log', None),
+    )
+
+
+def build_message(row, connection=None):
+    """Rebuild the EmailMessage stored in an OutboxEmail row."""
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email,
+        to=row.to,
+        cc=row.cc,
+        bcc=row.bcc,
+        reply_to=row.reply_to,
+        headers=row.headers,
+        alternatives=[tuple(alt) for alt in row.alternatives],
+        connection=connection,
+    )
+    for filename, content, mimetype in row.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Email backend that queues messages in the OutboxEmail table."""
+
+    def send_messages(self, email_messages):
+        queued = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            row = outbox_row(message)
+            row.save()
+            message.outbox_id = row.pk
+            queued += 1
+        return queued
+
+
+def claim_outbox_batch(batch_size=100, now=None):
+    """
+    Move up to batch_size due messages to 'sending' and return them. Rows are
+    claimed with a conditional UPDATE, so several workers can drain together.
+    """
+    now = now or timezone.now()
+    # Recover rows left in 'sending' by a worker that died mid-batch
+    OutboxEmail.objects.filter(status='sending', locked_at__lt=now - STALE_CLAIM_AFTER).update(status='pending')
+
+    ids = list(
+        OutboxEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    OutboxEmail.objects.filter(id__in=ids, status='pending').update(status='sending', locked_at=now)
+    return list(OutboxEmail.objects.filter(id__in=ids, status='sending', locked_at=now).select_related('email_log'))
+
+
+def retry_delay(attempts):
+    """Exponential backoff: 1, 2, 4, ... minutes, capped at an hour."""
+    return timedelta(minutes=min(2 ** (attempts - 1), 60))
+
+
+def _claimed(row):
+    """The row, only while this worker still holds the claim it was given"""
+    return OutboxEmail.objects.filter(pk=row.pk, status='sending', locked_at=row.locked_at)
+
+
+def _refresh_claim(row):
+    """Renew the claim before sending; False if another worker has taken the row over."""
+    now = timezone.now()
+    if not _claimed(row).update(locked_at=now):
+        return False
+    row.locked_at = now
+    return True
+
+
+def _mark_sent(row):
+    if not _claimed(row).update(status='sent', sent_at=timezone.now(), attempts=row.attempts + 1, last_error=''):
+        logger.warning('Outbox message %s was reclaimed while it was being sent', row.pk)
+        return
+    if row.email_log_id:
+        CandidateEmailLog.objects.filter(pk=row.email_log_id).update(success=True, error_text=None)
+
+
+def _mark_failed(row, exc, max_attempts):
+    attempts = row.attempts + 1
+    if attempts >= max_attempts:
+        fields = {'status': 'failed'}
+    else:
+        fields = {'status': 'pending', 'next_attempt_at': timezone.now() + retry_delay(attempts)}
+    if not _claimed(row).update(attempts=attempts, last_error=str(exc), **fields):
+        logger.warning('Outbox message %s was reclaimed while it was being sent', row.pk)
+        return
+    if fields['status'] == 'failed' and row.email_log_id:
+        CandidateEmailLog.objects.filter(pk=row.email_log_id).update(success=False, error_text=str(exc))
+
+
+def _release(rows):
+    """Hand claimed but unattempted rows back to the queue after a short backoff"""
+    for row in rows:
+        _claimed(row).update(status='pending', next_attempt_at=timezone.now() + retry_delay(1))
+
+
+class DeliveryUnavailable(Exception):
+    """The delivery connection could not be (re)opened; carries the counts so far"""
+
+    def __init__(self, sent, failed):
+        super().__init__(f'Delivery backend unavailable after {sent} sent, {failed} failed')
+        self.sent = sent
+        self.failed = failed
+
+
+class RateLimiter:
+    """Spaces calls to at most `per_second` per second (0 disables)."""
+
+    def __init__(self, per_second=0):
+        self.interval = 1.0 / per_second if per_second else 0
+        self.next_at = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+
+
+def deliver_batch(rows, connection, max_attempts=MAX_ATTEMPTS, rate_limiter=None):
+    """
+    Deliver claimed rows over an already opened connection.
+    Returns (sent, failed) counts. If the connection cannot be reopened after
+    a failure, the rest of the batch is released and DeliveryUnavailable raised.
+    """
+    sent = failed = 0
+    for index, row in enumerate(rows):
+        if rate_limiter:
+            rate_limiter.wait()
+        if not _refresh_claim(row):
+            continue
+        started = time.perf_counter()
+        try:
+            delivered = connection.send_messages([build_message(row, connection)])
+            if not delivered:
+                raise RuntimeError('Delivery backend did not accept the message')
+        except Exception as exc:
+            EMAIL_SEND_LATENCY.observe(time.perf_counter() - started, result='failed')
+            logger.warning('Outbox message %s failed: %s', row.pk, exc)
+            _mark_failed(row, exc, max_attempts)
+            failed += 1
+            # The connection may be broken; start a fresh one for the next message
+            try:
+                connection.close()
+                connection.open()
+            except Exception:
+                logger.warning('Could not reopen the delivery connection', exc_info=True)
+                _release(rows[index + 1:])
+                raise DeliveryUnavailable(sent, failed)
+            continue
+        EMAIL_SEND_LATENCY.observe(time.perf_counter() - started, result='sent')
+        _mark_sent(row)
+        sent += 1
+    return sent, failed
+
+
+def drain_outbox(batch_size=100, max_attempts=MAX_ATTEMPTS, rate=0, connection=None):
+    """
+    Deliver every due message, one claimed batch at a time, over a single
+    connection. Returns (sent, failed) totals. When the delivery backend is
+    unreachable the run stops early and the remaining mail waits for the next one.
+    """
+    if rate:
+        # Claim no more than can be sent before the claim would go stale
+        batch_size = max(1, min(batch_size, int(rate * STALE_CLAIM_AFTER.total_seconds() / 2)))
+    connection = connection or get_connection(delivery_backend())
+    limiter = RateLimiter(rate)
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception:
+        logger.warning('Could not open the delivery connection', exc_info=True)
+        return sent, failed
+    try:
+        while True:
+            rows = claim_outbox_batch(batch_size)
+            if not rows:
+                break
+            try:
+                batch_sent, batch_failed = deliver_batch(rows, connection, max_attempts, limiter)
+            except DeliveryUnavailable as exc:
+                sent += exc.sent
+                failed += exc.failed
+                break
+            sent += batch_sent
+            failed += batch_failed
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.warning('Could not close the delivery connection', exc_info=True)
+    return sent, failed
@@ -1,10 +1,18 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from django.utils import timezone
+from .models import Education, Profile, WorkExperience
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, using, **kwargs):
     if created and not hasattr(instance, "profile"):
         # Only create once, without overwriting existing role
-        Profile.objects.create(user=instance)
+        Profile.objects.using(using).create(user=instance)
+
+
+@receiver([post_save, post_delete], sender=Education)
+@receiver([post_save, post_delete], sender=WorkExperience)
+def touch_profile(sender, instance, using, **kwargs):
+    # Bump the profile version so cached profile sections are re-rendered
+    Profile.objects.using(using).filter(pk=instance.profile_id).update(updated_at=timezone.now())
@@ -1,9 +1,20 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from jobs.models import Job, JobApplication
 
-from .models import Conversation, Message, CandidateEmailLog, Profile
+from .models import Conversation, Message, CandidateEmailLog, Profile, OutboxEmail
 
 
 class MessagingEmailTests(TestCase):
@@ -66,3 +77,215 @@ class MessagingEmailTests(TestCase):
 		profile = Profile.objects.get(user=user)
 		self.assertEqual(user.email, new_email)
 		self.assertEqual(profile.email, new_email)
+
+
+@override_settings(
+	EMAIL_BACKEND='accounts.outbox.OutboxEmailBackend',
+	OUTBOX_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class EmailOutboxTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.recruiter = User.objects.create_user(username='rec', password='pass')
+		self.candidate = User.objects.create_user(username='cand', password='pass', email='cand@example.com')
+		rec_profile = Profile.objects.get(user=self.recruiter)
+		rec_profile.role = 'recruiter'
+		rec_profile.save()
+
+	def test_email_candidate_is_queued_then_delivered(self):
+		self.client.login(username='rec', password='pass')
+		resp = self.client.post(reverse('email_candidate', args=[self.candidate.username]), {
+			'subject': 'Hello', 'body': 'Interested in a chat?'
+		})
+		self.assertEqual(resp.status_code, 302)
+		self.assertEqual(len(mail.outbox), 0)
+		queued = OutboxEmail.objects.get()
+		self.assertEqual(queued.to, ['cand@example.com'])
+		self.assertFalse(CandidateEmailLog.objects.get().success)
+
+		call_command('drain_email_outbox', '--once', stdout=StringIO())
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].subject, 'Hello')
+		self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+		self.assertTrue(CandidateEmailLog.objects.get().success)
+
+	def test_password_reset_goes_through_outbox(self):
+		self.client.post(reverse('password_reset'), {'email': 'cand@example.com'})
+		self.assertEqual(OutboxEmail.objects.count(), 1)
+
+	@override_settings(OUTBOX_DELIVERY_BACKEND='accounts.tests.FailingBackend')
+	def test_failures_are_retried_then_recorded(self):
+		from accounts.outbox import drain_outbox
+		log = CandidateEmailLog.objects.create(subject='Hi', body='x')
+		OutboxEmail.objects.create(subject='Hi', body='x', to=['a@example.com'], email_log=log)
+
+		with self.assertLogs('accounts.outbox', 'WARNING'):
+			self.assertEqual(drain_outbox(max_attempts=2), (0, 1))
+		row = OutboxEmail.objects.get()
+		self.assertEqual((row.status, row.attempts), ('pending', 1))
+		self.assertGreater(row.next_attempt_at, row.created_at)
+
+		OutboxEmail.objects.update(next_attempt_at=row.created_at)
+		with self.assertLogs('accounts.outbox', 'WARNING'):
+			drain_outbox(max_attempts=2)
+		self.assertEqual(OutboxEmail.objects.get().status, 'failed')
+		self.assertEqual(CandidateEmailLog.objects.get().error_text, 'SMTP unavailable')
+
+	@override_settings(OUTBOX_DELIVERY_BACKEND='accounts.tests.UnreachableBackend')
+	def test_unreachable_server_releases_the_batch(self):
+		from accounts.outbox import drain_outbox
+		for i in range(3):
+			OutboxEmail.objects.create(subject=f'Hi {i}', body='x', to=['a@example.com'])
+
+		UnreachableBackend.opens = 1
+		with self.assertLogs('accounts.outbox', 'WARNING'):
+			self.assertEqual(drain_outbox(), (0, 1))
+		rows = OutboxEmail.objects.order_by('pk')
+		self.assertEqual([(row.status, row.attempts) for row in rows], [('pending', 1), ('pending', 0), ('pending', 0)])
+		self.assertTrue(all(row.next_attempt_at > timezone.now() for row in rows))
+
+		# Down from the start: nothing is claimed
+		OutboxEmail.objects.update(next_attempt_at=timezone.now())
+		UnreachableBackend.opens = 0
+		with self.assertLogs('accounts.outbox', 'WARNING'):
+			self.assertEqual(drain_outbox(), (0, 0))
+		self.assertFalse(OutboxEmail.objects.exclude(status='pending').exists())
+
+	def test_reclaimed_rows_are_left_to_the_new_worker(self):
+		from accounts.outbox import claim_outbox_batch, deliver_batch
+		OutboxEmail.objects.create(subject='Hi', body='x', to=['a@example.com'])
+		rows = claim_outbox_batch()
+		# Another worker took the row over after the claim went stale
+		OutboxEmail.objects.update(locked_at=timezone.now() + timedelta(seconds=1))
+		with mail.get_connection() as connection:
+			self.assertEqual(deliver_batch(rows, connection), (0, 0))
+		self.assertEqual(len(mail.outbox), 0)
+		self.assertEqual(OutboxEmail.objects.get().status, 'sending')
+
+
+class FailingBackend(BaseEmailBackend):
+	def send_messages(self, email_messages):
+		raise ConnectionError('SMTP unavailable')
+
+
+class UnreachableBackend(FailingBackend):
+	"""Fails every send, and every open once `opens` successful opens are used up."""
+	opens = 0
+
+	def open(self):
+		if UnreachableBackend.opens <= 0:
+			raise ConnectionRefusedError('SMTP unavailable')
+		UnreachableBackend.opens -= 1
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ViewQueryCountTests(TestCase):
+	"""
+	Every view in accounts/urls.py must issue the same number of queries with
+	10 and with 100 rows of related data, and stay within its budget.
+	"""
+	# (url name, args, who is logged in, method, params, query budget)
+	VIEWS = [
+		('signup', None, None, 'get', {}, 0),
+		('login', None, None, 'get', {}, 0),
+		('profile', None, 'seeker', 'get', {}, 6),
+		('edit_profile', None, 'seeker', 'get', {}, 8),
+		('edit_profile', None, 'seeker', 'post', {'email': 'cand@example.com', 'headline': 'Developer', 'is_public': 'on'}, 10),
+		('profile_detail', 'seeker', 'recruiter', 'get', {}, 7),
+		('recruiter_dashboard', None, 'recruiter', 'get', {}, 7),
+		('candidate_search', None, 'recruiter', 'get', {}, 5),
+		('candidate_search', None, 'recruiter', 'get', {'skill': 'Python', 'location': 'Atlanta'}, 5),
+		('conversation_list', None, 'recruiter', 'get', {}, 10),
+		('conversation_detail', 'conversation', 'recruiter', 'get', {}, 8),
+		('start_conversation', 'seeker', 'recruiter', 'get', {}, 7),
+		('email_candidate', 'seeker', 'recruiter', 'get', {}, 7),
+		('password_change', None, 'seeker', 'get', {}, 4),
+		('password_reset', None, None, 'get', {}, 0),
+	]
+
+	def setUp(self):
+		User = get_user_model()
+		self.recruiter = User.objects.create_user(username='rec', password='pass')
+		self.recruiter.profile.role = 'recruiter'
+		self.recruiter.profile.save()
+		self.seeker = User.objects.create_user(username='cand', password='pass', email='cand@example.com')
+		self.seeker.profile.role = 'seeker'
+		self.seeker.profile.skills = 'Python, SQL'
+		self.seeker.profile.location = 'Atlanta, GA'
+		self.seeker.profile.save()
+		self.conversation = Conversation.objects.create()
+		self.added = 0
+
+	def populate(self, count):
+		User = get_user_model()
+		rec = self.recruiter.profile
+		seeker = self.seeker.profile
+		for _ in range(count):
+			self.added += 1
+			user = User.objects.create_user(username=f'extra{self.added}', password='pass')
+			other = user.profile
+			other.role = 'seeker'
+			other.skills = 'Python, Django'
+			other.location = 'Atlanta, GA'
+			other.save()
+			conv = Conversation.objects.create()
+			Message.objects.create(conversation=conv, sender=rec, recipient=other, body='Hi')
+			Message.objects.create(conversation=conv, sender=other, recipient=rec, body='Hello')
+			Message.objects.create(conversation=self.conversation, sender=seeker, recipient=rec, body='Ping')
+			job = Job.objects.create(
+				title=f'Job {self.added}', description='d', company='Acme', location='Atlanta, GA', posted_by=rec)
+			JobApplication.objects.create(job=job, applicant=user)
+			seeker.education.create(school=f'School {self.added}', start_date=date(2020, 1, 1))
+			seeker.work_experience.create(
+				company=f'Company {self.added}', position='Engineer', start_date=date(2020, 1, 1))
+
+	def count_queries(self, name, args, user, method, params):
+		self.client.logout()
+		if user:
+			self.client.force_login({'recruiter': self.recruiter, 'seeker': self.seeker}[user])
+		cache.clear()
+		url_args = {
+			None: [],
+			'seeker': [self.seeker.username],
+			'conversation': [self.conversation.pk],
+		}[args]
+		with CaptureQueriesContext(connection) as queries:
+			response = getattr(self.client, method)(reverse(name, args=url_args), params)
+		self.assertLess(response.status_code, 400, f'{name} returned {response.status_code}')
+		return len(queries)
+
+	def test_query_counts_do_not_grow_with_data(self):
+		self.populate(10)
+		small = [self.count_queries(*view[:5]) for view in self.VIEWS]
+		self.populate(90)
+		large = [self.count_queries(*view[:5]) for view in self.VIEWS]
+		for view, small_count, large_count in zip(self.VIEWS, small, large):
+			name, budget = view[0], view[5]
+			with self.subTest(view=name, params=view[4]):
+				self.assertEqual(small_count, large_count, f'{name} query count grows with the data')
+				self.assertLessEqual(large_count, budget, f'{name} is over its query budget')
+
+
+class ProfileSectionCacheTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		User = get_user_model()
+		self.viewer = User.objects.create_user(username='viewer', password='pass')
+		self.candidate = User.objects.create_user(username='cand', password='pass')
+		self.profile = self.candidate.profile
+		self.profile.skills = 'Python, SQL'
+		self.profile.save()
+		self.client.force_login(self.viewer)
+
+	def test_sections_follow_privacy_flags(self):
+		url = reverse('profile_detail', args=['cand'])
+		self.assertContains(self.client.get(url), 'Python')
+		self.profile.show_skills = False
+		self.profile.save()
+		self.assertNotContains(self.client.get(url), 'Python')
+
+	def test_education_change_invalidates_sections(self):
+		url = reverse('profile_detail', args=['cand'])
+		self.assertNotContains(self.client.get(url), 'State University')
+		self.profile.education.create(school='State University', start_date=date(2018, 9, 1))
+		self.assertContains(self.client.get(url), 'State University')
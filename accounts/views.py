@@ -10,12 +10,18 @@ from django.shortcuts import render, redirect, get_object_or_404
 from .forms import ProfileForm, EducationFormSet, WorkFormSet, CustomSignupForm
 from .models import Profile  # import your Profile model
 from jobs.models import Job, JobApplication
+from jobs.geocode import geocode
+from jobs.metrics import SEARCH_RESULTS
+from jobs.search_utils import filter_candidates_by_radius
+from jobs.object_cache import get_profile_bundle
+from jobs.conditional import Validators, conditional, csrf_secret, make_etag
+from jobboard.routers import read_from_replica
 from .models import Conversation, Message, CandidateEmailLog
 from .forms import MessageForm, EmailCandidateForm, ReplyForm
 from django.contrib import messages
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Q
 
 User = get_user_model()
 
@@ -145,6 +151,21 @@ def edit_profile(request):
 
 # ---------- Public profile (recruiter/other users) ----------
 
+def _profile_detail_validators(request, username):
+    # Anonymous visitors of a public profile all get the same page
+    if request.user.is_authenticated:
+        return None
+    prof = get_profile_bundle(username)
+    if prof is None or not prof.is_public:
+        return None
+    etag = make_etag(
+        "profile_detail", prof.pk, prof.updated_at, prof.user.username, prof.user.get_full_name(),
+        csrf_secret(request),
+    )
+    return Validators(etag, prof.updated_at)
+
+
+@conditional(_profile_detail_validators)
 def profile_detail(request, username):
     """
     Public profile page for any user by username.
@@ -153,8 +174,10 @@ def profile_detail(request, username):
         * if profile.is_public is False -> 404
         * sections gated by show_email/show_links/show_education/show_work/show_skills
     """
-    user = get_object_or_404(User, username=username)
-    prof = get_object_or_404(Profile, user=user)
+    prof = get_profile_bundle(username)
+    if prof is None:
+        raise Http404("No Profile matches the given query.")
+    user = prof.user
 
     is_owner = request.user.is_authenticated and (request.user == user)
     is_staff = request.user.is_authenticated and request.user.is_staff
@@ -189,7 +212,7 @@ def recruiter_dashboard(request):
 
     jobs = Job.objects.filter(posted_by=profile)
     context = {
-        "jobs": jobs,
+        "jobs": jobs.annotate(application_count=Count("applications")),
         "total_jobs": jobs.count(),
         "total_applicants": JobApplication.objects.filter(job__in=jobs).count(),
     }
@@ -198,6 +221,7 @@ def recruiter_dashboard(request):
 from django.db.models import Q
 
 @login_required
+@read_from_replica
 def candidate_search(request):
     profile = request.user.profile
     if profile.role != "recruiter":
@@ -206,8 +230,12 @@ def candidate_search(request):
     query = request.GET.get("q", "")
     location = request.GET.get("location", "")
     skill = request.GET.get("skill", "")
+    try:
+        radius = int(request.GET.get("radius") or 0) or None
+    except ValueError:
+        radius = None
 
-    candidates = Profile.objects.filter(role="seeker", is_public=True)
+    candidates = Profile.objects.filter(role="seeker", is_public=True).select_related("user")
 
     if query:
         candidates = candidates.filter(
@@ -216,16 +244,21 @@ def candidate_search(request):
             Q(bio__icontains=query)
         )
 
-    if location:
+    center = geocode(location) if location and radius else None
+    if center:
+        # Filtered and ordered in SQL rather than through an id list, which
+        # can outgrow SQLite's bound-parameter limit
+        candidates = filter_candidates_by_radius(candidates, center.lat, center.lon, radius).order_by("distance_miles")
+    elif location:
         candidates = candidates.filter(location__icontains=location)
 
     if skill:
         candidates = candidates.filter(skills__icontains=skill)
 
-    if skill:
-        candidates = candidates.filter(skills__icontains=skill)
-
+    candidates = list(candidates)
+    SEARCH_RESULTS.observe(len(candidates), search="candidate_search")
     for c in candidates:
+        c.search_distance = round(c.distance_miles, 1) if center else None
         raw_skills = c.skills or ""
         # Handle both comma-separated and space-separated input
         if "," in raw_skills:
@@ -238,6 +271,7 @@ def candidate_search(request):
         "candidates": candidates,
         "query": query,
         "location": location,
+        "radius": radius,
         "skill": skill,
     })
 
@@ -385,11 +419,11 @@ def conversation_detail(request, pk):
     else:
         form = MessageForm()
 
-    messages_qs = conv.messages.select_related('sender__user', 'recipient__user')
+    messages_qs = list(conv.messages.select_related('sender__user', 'recipient__user'))
     # Determine 'other' profile for header display
     other_profile = None
     participants = set()
-    for m in conv.messages.all():
+    for m in messages_qs:
         participants.add(m.sender)
         participants.add(m.recipient)
     for p in participants:
@@ -438,18 +472,21 @@ def email_candidate(request, username):
         if form.is_valid():
             subject = form.cleaned_data['subject']
             body = form.cleaned_data['body']
+            from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None
             try:
-                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None
-                send_mail(subject, body, from_email, [to_email])
-                CandidateEmailLog.objects.create(
-                    recruiter=profile,
-                    candidate=candidate,
-                    subject=subject,
-                    body=body,
-                    success=True,
-                )
-                messages.success(request, 'Email sent successfully.')
-                return redirect('profile_detail', username=username)
+                with transaction.atomic():
+                    # With the outbox backend this only queues the message; the
+                    # drain_email_outbox worker fills in success/error_text later.
+                    log = CandidateEmailLog.objects.create(
+                        recruiter=profile,
+                        candidate=candidate,
+                        subject=subject,
+                        body=body,
+                        success=False,
+                    )
+                    message = EmailMessage(subject, body, from_email, [to_email])
+                    message.email_log = log
+                    message.send()
             except Exception as exc:
                 CandidateEmailLog.objects.create(
                     recruiter=profile,
@@ -460,6 +497,15 @@ def email_candidate(request, username):
                     error_text=str(exc),
                 )
                 messages.error(request, 'Failed to send email: %s' % str(exc))
+            else:
+                if getattr(message, 'outbox_id', None):
+                    messages.success(request, 'Email queued for delivery.')
+                else:
+                    # Delivered synchronously by a non-outbox backend
+                    log.success = True
+                    log.save(update_fields=['success'])
+                    messages.success(request, 'Email sent successfully.')
+                return redirect('profile_detail', username=username)
     else:
         form = EmailCandidateForm()
 
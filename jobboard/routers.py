@@ -0,0 +1,122 @@
+"""
+Read-replica routing.
+
+Reads go to the DATABASE_READ_REPLICA alias only where it has been opted in:
+views decorated with @read_from_replica (read-only pages, the API and the CSV
+exports) and code inside a replica_reads() block (the background export
+worker). Everything else, and every write, uses the default database. Reads
+that hand out a watermark for the next run (the delta export) stay on the
+primary, since a lagging replica would make them skip rows for good.
+
+Replicas lag, so a client that has just written is pinned to the primary:
+ReplicaPinMiddleware notices any write routed during a request and sets a
+cookie for DATABASE_REPLICA_PIN_SECONDS, and requests carrying the cookie
+(or that have already written) read from the primary even in replica views.
+
+If the replica cannot be connected to, reads fall back to the primary and the
+replica is not tried again for DATABASE_REPLICA_RETRY_SECONDS.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'replica_pin'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+# {'pinned': bool, 'wrote': bool} for the request being served, else None
+_request_state = ContextVar('replica_request_state', default=None)
+# alias -> time.monotonic() before which the replica is not retried
+_unavailable_until = {}
+
+
+def replica_alias():
+    return getattr(settings, 'DATABASE_READ_REPLICA', None)
+
+
+def replica_available(alias):
+    if time.monotonic() < _unavailable_until.get(alias, 0):
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        logger.warning('Read replica %r is unavailable, reading from the primary', alias, exc_info=True)
+        _unavailable_until[alias] = time.monotonic() + getattr(settings, 'DATABASE_REPLICA_RETRY_SECONDS', 30)
+        return False
+    _unavailable_until.pop(alias, None)
+    return True
+
+
+@contextmanager
+def replica_reads():
+    """Let reads inside the block go to the replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _iter_replica_reads(iterator):
+    with replica_reads():
+        yield from iterator
+
+
+def read_from_replica(view):
+    """Serve the view's reads (including a streamed body) from the replica."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            response = view(request, *args, **kwargs)
+        if response.streaming:
+            response.streaming_content = _iter_replica_reads(response.streaming_content)
+        return response
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if not alias or not _replica_reads.get():
+            return None
+        state = _request_state.get()
+        if state and (state['pinned'] or state['wrote']):
+            return None
+        return alias if replica_available(alias) else None
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Pin clients that have just written to the primary (see module docstring)."""
+
+    def __init__(self, get_response):
+        if not replica_alias():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'pinned': PIN_COOKIE in request.COOKIES, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state['wrote']:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -17,6 +17,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 
 # Quick-start development settings - unsuitable for production
+# (deploy with DJANGO_SETTINGS_MODULE=jobboard.settings_production)
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'jobs.metrics.MetricsMiddleware',
+    'jobboard.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'jobs.profiling.QueryProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'jobboard.urls'
@@ -79,13 +83,39 @@ WSGI_APPLICATION = 'jobboard.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# jobboard.sqlite_backend is Django's SQLite backend plus per-connection PRAGMAs
+# and the BEGIN mode used by atomic blocks. WAL lets reads run alongside a
+# write, busy_timeout makes writers wait for the lock instead of failing with
+# "database is locked", and IMMEDIATE takes the write lock at BEGIN so
+# read-then-write transactions cannot deadlock on lock upgrade. Compare with
+# the stock backend using `manage.py benchmark_sqlite_concurrency`.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'jobboard.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'busy_timeout': 5000,      # ms
+                'cache_size': -20000,      # KiB (negative) -> ~20 MB page cache
+                'mmap_size': 134217728,    # bytes
+                'temp_store': 'memory',
+            },
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Reads in read-only views, the CSV exports and the export worker go to the
+# DATABASE_READ_REPLICA alias (None: everything uses default). Clients that
+# write are pinned to the primary for DATABASE_REPLICA_PIN_SECONDS, and an
+# unreachable replica is skipped for DATABASE_REPLICA_RETRY_SECONDS.
+DATABASE_ROUTERS = ['jobboard.routers.ReplicaRouter']
+DATABASE_READ_REPLICA = None
+DATABASE_REPLICA_PIN_SECONDS = 5
+DATABASE_REPLICA_RETRY_SECONDS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -131,4 +161,56 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Redirects
 LOGOUT_REDIRECT_URL = "/"     # after logout, send user to homepage
 
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Outgoing mail is written to the outbox table within the current transaction
+# and delivered by `manage.py drain_email_outbox` through OUTBOX_DELIVERY_BACKEND
+EMAIL_BACKEND = "accounts.outbox.OutboxEmailBackend"
+OUTBOX_DELIVERY_BACKEND = "django.core.mail.backends.console.EmailBackend"
+
+# New saved-search matches are emailed as one digest per recruiter once the
+# oldest pending match is this many minutes old (0 sends on every match)
+MATCH_DIGEST_MINUTES = 30
+
+# Delta exports (admin_export_delta) end this many seconds before now, so rows
+# whose transaction commits after the export's query are picked up next time
+DELTA_EXPORT_LAG_SECONDS = 300
+
+# The funnel rollup only folds in status events at least this old, so events
+# from transactions that commit out of id order are not skipped
+FUNNEL_ROLLUP_LAG_SECONDS = 300
+
+# Background CSV exports are written here by the process_export_jobs worker
+EXPORT_ROOT = BASE_DIR / "exports"
+
+# Geocoder backfill_coordinates uses for places missing from the local cache:
+# None (cache only), "nominatim", "file", or a dotted path to a callable
+# returning jobs.geocode.GeocodeResult. GEOCODER_OPTIONS are passed to its
+# constructor (e.g. {"user_agent": ...} for Nominatim, {"path": ...} for
+# "file"). Web requests never call it; they only read the cache.
+GEOCODER = None
+GEOCODER_OPTIONS = {}
+
+# Query profiling (jobs.profiling): fraction of requests to profile, 0 disables.
+# Requests over any threshold are logged as warnings.
+QUERY_PROFILING_SAMPLE_RATE = 0.0
+QUERY_PROFILING_MAX_QUERIES = 50
+QUERY_PROFILING_SLOW_MS = 500
+QUERY_PROFILING_MAX_DUPLICATES = 10
+QUERY_PROFILING_BUFFER_SIZE = 200
+
+# Prometheus metrics (jobs.metrics), served at /metrics to scrapers sending
+# "Authorization: Bearer <METRICS_BEARER_TOKEN>", to these addresses and to
+# staff users. Behind a reverse proxy every request comes from the proxy's
+# address, so production allows no addresses by default. With several WSGI
+# workers, point METRICS_MULTIPROC_DIR at a directory shared by them so each
+# scrape reports the totals of all workers.
+METRICS_ENABLED = True
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+METRICS_BEARER_TOKEN = None
+METRICS_MULTIPROC_DIR = None
+
+# Part of every ETag built by jobs.conditional: bump it when a deploy changes
+# the markup or JSON of pages served with conditional GET
+CONDITIONAL_GET_VERSION = 1
+
+# run_benchmarks writes its JSON results here (one file per run)
+BENCHMARK_RESULTS_DIR = BASE_DIR / "benchmark_results"
@@ -0,0 +1,96 @@
+"""
+Production settings: the base settings with secrets, hosts, database and
+cache read from the environment.
+
+Run with DJANGO_SETTINGS_MODULE=jobboard.settings_production and at least
+DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS set. See jobboard/env.py for the
+DATABASE_URL and CACHE_URL formats. Set WEB_CONCURRENCY to the number of
+worker processes; more than one requires a shared CACHE_URL.
+"""
+import copy
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .env import env, env_bool, env_int, env_list, parse_cache_url, parse_database_url
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, TEMPLATES
+
+SECRET_KEY = env('DJANGO_SECRET_KEY', required=True)
+
+# Never DEBUG here: it also keeps every executed query in connection.queries
+DEBUG = False
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
+CSRF_TRUSTED_ORIGINS = env_list('DJANGO_CSRF_TRUSTED_ORIGINS')
+
+
+# Database: DATABASE_URL, defaulting to the SQLite file of the base settings.
+# Connections are kept open between requests (DB_CONN_MAX_AGE seconds, None
+# for unlimited) and checked before reuse, so a request no longer pays for
+# connection setup. Behind PgBouncer in transaction mode set
+# DB_DISABLE_SERVER_SIDE_CURSORS=1. Driver options such as sslmode or
+# connect_timeout go in the URL query string.
+_sqlite_default = DATABASES['default']
+DATABASES = {'default': parse_database_url(env('DATABASE_URL', f"sqlite:///{_sqlite_default['NAME']}"))}
+if DATABASES['default']['ENGINE'] == _sqlite_default['ENGINE'] and not DATABASES['default']['OPTIONS']:
+    DATABASES['default']['OPTIONS'] = copy.deepcopy(_sqlite_default['OPTIONS'])
+DATABASES['default'].update(
+    CONN_MAX_AGE=env_int('DB_CONN_MAX_AGE', 600),
+    CONN_HEALTH_CHECKS=env_bool('DB_CONN_HEALTH_CHECKS', True),
+    DISABLE_SERVER_SIDE_CURSORS=env_bool('DB_DISABLE_SERVER_SIDE_CURSORS', False),
+)
+
+# Optional read replica (see jobboard.routers), with the same connection settings
+if env('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = {
+        **parse_database_url(env('DATABASE_REPLICA_URL')),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': DATABASES['default']['CONN_HEALTH_CHECKS'],
+        'DISABLE_SERVER_SIDE_CURSORS': DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_READ_REPLICA = 'replica'
+
+
+# Cache: CACHE_URL, defaulting to per-process local memory. The tile, fragment,
+# object and conditional-GET caches are invalidated by signals in the process
+# that did the write, so locmem is only correct with a single worker process:
+# with WEB_CONCURRENCY above 1 a shared backend (redis, memcached or a file
+# cache on the same host) is required.
+WEB_CONCURRENCY = env_int('WEB_CONCURRENCY', 1)
+if WEB_CONCURRENCY > 1 and env('CACHE_URL', 'locmem://').startswith('locmem:'):
+    raise ImproperlyConfigured(
+        'Set CACHE_URL to a cache shared by the workers when WEB_CONCURRENCY > 1'
+    )
+CACHES = {
+    'default': {
+        **parse_cache_url(env('CACHE_URL', 'locmem://')),
+        'KEY_PREFIX': env('CACHE_KEY_PREFIX', 'jobboard'),
+        'TIMEOUT': env_int('CACHE_TIMEOUT', 300),
+    }
+}
+
+
+# Geocoder backfill_coordinates uses for places missing from the gazetteer
+# (see jobs.geocode); cache-only unless set, e.g. GEOCODER=nominatim.
+GEOCODER = env('GEOCODER', '')
+GEOCODER_OPTIONS = {'user_agent': env('GEOCODER_USER_AGENT', 'jobboard-geocoder')} if GEOCODER == 'nominatim' else {}
+
+
+# Compile each template once per process instead of on every render
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+# Shared by the WSGI workers so /metrics reports totals (see jobs.metrics)
+METRICS_MULTIPROC_DIR = env('METRICS_MULTIPROC_DIR')
+# No address is trusted unless listed: behind a same-host reverse proxy every
+# request comes from 127.0.0.1. Scrapers authenticate with the bearer token.
+METRICS_ALLOWED_IPS = env_list('METRICS_ALLOWED_IPS')
+METRICS_BEARER_TOKEN = env('METRICS_BEARER_TOKEN')
@@ -0,0 +1,12 @@
+"""
+SQLite database backend tuned for concurrent web traffic.
+
+Use it as the ENGINE of an SQLite database and configure it through OPTIONS:
+
+    'OPTIONS': {
+        'pragmas': {'journal_mode': 'wal', 'busy_timeout': 5000, ...},
+        'transaction_mode': 'IMMEDIATE',
+    }
+
+See base.DatabaseWrapper for details.
+"""
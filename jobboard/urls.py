@@ -19,6 +19,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import render
 
+from jobs.views import metrics
+
 def home(request):
     return render(request, "home.html")
 
@@ -27,5 +29,6 @@ urlpatterns = [
     path("", home, name="home"),          # landing page
     path("accounts/", include("accounts.urls")),  # all accounts routes
     path("jobs/", include("jobs.urls")),
+    path("metrics", metrics, name="metrics"),     # Prometheus scrape endpoint
     # later: path("recruiters/", include("recruiters.urls")),
 ]
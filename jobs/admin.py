@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Job, JobApplication, SavedJob, SavedCandidateSearch, CandidateSearchMatch
+from .models import (
+    Job, JobApplication, SavedJob, SavedCandidateSearch, CandidateSearchMatch,
+    ApplicationStatusEvent, ApplicationFunnelStat, ExportJob, GeocodedPlace,
+)
 
 
 @admin.register(Job)
@@ -41,6 +44,28 @@ class JobApplicationAdmin(admin.ModelAdmin):
     list_editable = ['status']
     date_hierarchy = 'applied_date'
     ordering = ['-applied_date']
+    actions = ['mark_review', 'mark_interview', 'mark_offer', 'mark_closed']
+
+    def _move_to(self, request, queryset, status):
+        # update_status records an ApplicationStatusEvent for every moved application
+        moved = queryset.update_status(status)
+        self.message_user(request, f'Moved {moved} application(s) to {dict(JobApplication.STATUS_CHOICES)[status]}.')
+
+    @admin.action(description='Move selected applications to Under Review')
+    def mark_review(self, request, queryset):
+        self._move_to(request, queryset, 'review')
+
+    @admin.action(description='Move selected applications to Interview')
+    def mark_interview(self, request, queryset):
+        self._move_to(request, queryset, 'interview')
+
+    @admin.action(description='Move selected applications to Offer')
+    def mark_offer(self, request, queryset):
+        self._move_to(request, queryset, 'offer')
+
+    @admin.action(description='Move selected applications to Closed')
+    def mark_closed(self, request, queryset):
+        self._move_to(request, queryset, 'closed')
     
     fieldsets = (
         ('Application Info', {
@@ -104,4 +129,45 @@ class CandidateSearchMatchAdmin(admin.ModelAdmin):
     search_fields = ['candidate__user__username', 'saved_search__name']
     readonly_fields = ['first_matched_date', 'notified_date']
     date_hierarchy = 'first_matched_date'
-    ordering = ['-first_matched_date']
\ No newline at end of file
+    ordering = ['-first_matched_date']
+
+
+@admin.register(ApplicationStatusEvent)
+class ApplicationStatusEventAdmin(admin.ModelAdmin):
+    list_display = ['application', 'job', 'from_status', 'to_status', 'changed_at']
+    list_filter = ['to_status', 'changed_at']
+    search_fields = ['application__applicant__username', 'job__title']
+    date_hierarchy = 'changed_at'
+    ordering = ['-changed_at']
+
+    # The event log is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ApplicationFunnelStat)
+class ApplicationFunnelStatAdmin(admin.ModelAdmin):
+    list_display = ['recruiter', 'job', 'stage', 'entered_count', 'exited_count', 'average_days_in_stage', 'updated_at']
+    list_filter = ['stage']
+    search_fields = ['recruiter__user__username', 'job__title']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'filter_value', 'status', 'rows_written', 'total_rows', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'compress']
+    readonly_fields = ['rows_written', 'total_rows', 'file_path', 'error_text', 'created_at', 'started_at', 'finished_at']
+
+
+@admin.register(GeocodedPlace)
+class GeocodedPlaceAdmin(admin.ModelAdmin):
+    list_display = ['display_name', 'normalized_name', 'latitude', 'longitude', 'population', 'source']
+    list_filter = ['source']
+    search_fields = ['normalized_name', 'display_name']
@@ -1,20 +1,52 @@
 """
 Admin-only views for reporting and CSV exports
 """
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import FileResponse, Http404, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_POST
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.conf import settings
 from django.db.models import Count, Q
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-from jobs.models import Job, JobApplication, SavedJob, SavedCandidateSearch
+from jobs.models import (
+    Job, JobApplication, SavedJob, SavedCandidateSearch, ApplicationFunnelStat, DailyActivityRollup,
+    ExportJob,
+)
+from jobs.forms import ExportJobForm
+from jobs.export_jobs import export_file_path
+from jobs.reporting import funnel_summary, activity_totals
+from jobs.profiling import clear_requests, recent_requests, view_summary
 from jobs.export_utils import (
     export_jobs_csv, export_applications_csv, 
-    export_users_csv, export_profiles_csv, export_usage_stats_csv
+    export_users_csv, export_profiles_csv, export_usage_stats_csv,
+    export_daily_activity_csv, iter_delta_lines, DELTA_WATERMARKS,
 )
 from accounts.models import Profile
 from django.contrib.auth.models import User
+from jobboard.routers import read_from_replica
+
+
+def _activity_range(request):
+    """
+    Read the ?start=YYYY-MM-DD&end=YYYY-MM-DD reporting window, defaulting to the
+    30 complete days ending yesterday.
+    """
+    end = timezone.now().date() - timedelta(days=1)
+    start = end - timedelta(days=29)
+    try:
+        if request.GET.get('end'):
+            end = date.fromisoformat(request.GET['end'])
+        if request.GET.get('start'):
+            start = date.fromisoformat(request.GET['start'])
+    except ValueError:
+        messages.error(request, 'Invalid date range, expected YYYY-MM-DD.')
+    if start > end:
+        start, end = end, start
+    return start, end
 
 
 @staff_member_required
@@ -44,11 +76,12 @@ def admin_reporting_dashboard(request):
         count = Job.objects.filter(work_type=work_type_code).count()
         jobs_by_work_type[work_type_name] = count
     
-    # Recent activity (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_jobs = Job.objects.filter(posted_date__gte=thirty_days_ago).count()
-    recent_applications = JobApplication.objects.filter(applied_date__gte=thirty_days_ago).count()
-    recent_users = User.objects.filter(date_joined__gte=thirty_days_ago).count()
+    # Activity over the selected window, read from the rollup_daily_activity rows
+    start, end = _activity_range(request)
+    daily_rollups = DailyActivityRollup.objects.filter(day__gte=start, day__lte=end)
+    activity = activity_totals(daily_rollups)
+    daily_activity = list(daily_rollups)
+    peak_applications = max((day.applications_applied for day in daily_activity), default=0)
     
     # Top recruiters by job count
     top_recruiters = Profile.objects.filter(role='recruiter').annotate(
@@ -59,6 +92,9 @@ def admin_reporting_dashboard(request):
     top_jobs = Job.objects.annotate(
         application_count=Count('applications')
     ).order_by('-application_count')[:10]
+
+    # Hiring funnel, read from the aggregates maintained by rollup_application_funnel
+    funnel = funnel_summary(ApplicationFunnelStat.objects.filter(job__isnull=True))
     
     context = {
         'total_users': total_users,
@@ -70,17 +106,26 @@ def admin_reporting_dashboard(request):
         'applications_by_status': applications_by_status,
         'applications_by_status_list': applications_by_status_list,
         'jobs_by_work_type': jobs_by_work_type,
-        'recent_jobs': recent_jobs,
-        'recent_applications': recent_applications,
-        'recent_users': recent_users,
+        'recent_jobs': activity['jobs_posted'],
+        'recent_applications': activity['applications_applied'],
+        'recent_users': activity['signups_seeker'] + activity['signups_recruiter'],
+        'activity': activity,
+        'activity_start': start,
+        'activity_end': end,
+        'daily_activity': daily_activity,
+        'peak_applications': peak_applications,
         'top_recruiters': top_recruiters,
         'top_jobs': top_jobs,
+        'funnel': funnel,
+        'export_form': ExportJobForm(),
+        'export_jobs': ExportJob.objects.select_related('requested_by')[:10],
     }
     
     return render(request, 'jobs/admin_reporting_dashboard.html', context)
 
 
 @staff_member_required
+@read_from_replica
 def export_jobs(request):
     """Export all jobs to CSV"""
     # Allow filtering by active/inactive
@@ -94,6 +139,7 @@ def export_jobs(request):
 
 
 @staff_member_required
+@read_from_replica
 def export_applications(request):
     """Export all job applications to CSV"""
     # Allow filtering by status
@@ -107,6 +153,7 @@ def export_applications(request):
 
 
 @staff_member_required
+@read_from_replica
 def export_users(request):
     """Export all users to CSV"""
     # Allow filtering by role
@@ -120,6 +167,7 @@ def export_users(request):
 
 
 @staff_member_required
+@read_from_replica
 def export_profiles(request):
     """Export all profiles to CSV"""
     # Allow filtering by role
@@ -133,7 +181,121 @@ def export_profiles(request):
 
 
 @staff_member_required
+@read_from_replica
 def export_usage_stats(request):
     """Export usage statistics to CSV"""
-    return export_usage_stats_csv()
+    start, end = _activity_range(request)
+    rollups = DailyActivityRollup.objects.filter(day__gte=start, day__lte=end)
+    return export_usage_stats_csv(rollups, start, end)
+
+
+@staff_member_required
+@read_from_replica
+def export_daily_activity(request):
+    """Export the per-day activity rollups for a date range to CSV"""
+    start, end = _activity_range(request)
+    return export_daily_activity_csv(DailyActivityRollup.objects.filter(day__gte=start, day__lte=end))
+
 
+
+@staff_member_required
+@require_POST
+def request_export(request):
+    """Queue a background export; the process_export_jobs worker writes the file"""
+    form = ExportJobForm(request.POST)
+    if form.is_valid():
+        export_job = form.save(commit=False)
+        export_job.requested_by = request.user
+        export_job.save()
+        messages.success(request, f'{export_job.get_kind_display()} export queued.')
+    else:
+        errors = '; '.join(error for field_errors in form.errors.values() for error in field_errors)
+        messages.error(request, f'Could not queue export: {errors}')
+    return redirect('admin_reporting_dashboard')
+
+
+@staff_member_required
+def export_job_status(request, pk):
+    """JSON progress for a background export, polled by the reporting dashboard"""
+    export_job = get_object_or_404(ExportJob, pk=pk)
+    return JsonResponse({
+        'id': export_job.pk,
+        'status': export_job.status,
+        'rows_written': export_job.rows_written,
+        'total_rows': export_job.total_rows,
+        'progress': export_job.progress_percent(),
+        'error': export_job.error_text,
+    })
+
+
+@staff_member_required
+def download_export(request, pk):
+    """Serve the file written by a finished background export"""
+    export_job = get_object_or_404(ExportJob, pk=pk, status='done')
+    path = export_file_path(export_job)
+    if not path.exists():
+        raise Http404("Export file is no longer available.")
+    return FileResponse(
+        open(path, 'rb'), as_attachment=True,
+        filename=export_job.download_filename(), content_type=export_job.content_type(),
+    )
+
+
+@staff_member_required
+def export_delta(request, kind):
+    """
+    Incremental export as JSON Lines: rows added or changed after ?since=<ISO timestamp>
+    plus delete markers for removed rows. Pass the X-Next-Since response header
+    as `since` on the next run; omit `since` for a full initial load.
+
+    Read from the primary: `until` is taken from its clock, and rows a lagging
+    replica has not received yet would fall before the next run's `since`.
+
+    The window ends DELTA_EXPORT_LAG_SECONDS in the past rather than now. The
+    watermark columns are stamped by the application before commit, so a row
+    stamped just before now may only become visible after this query; ending
+    the window early leaves such rows to the next run instead of skipping them.
+    """
+    if kind not in DELTA_WATERMARKS:
+        raise Http404("Unknown export.")
+
+    since = None
+    if request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return HttpResponseBadRequest('Invalid since timestamp, expected ISO 8601.')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, dt_timezone.utc)
+    until = timezone.now() - timedelta(seconds=getattr(settings, 'DELTA_EXPORT_LAG_SECONDS', 300))
+    if since is not None and since > until:
+        # Polled again within the lag: nothing has settled yet
+        until = since
+
+    response = StreamingHttpResponse(iter_delta_lines(kind, since, until), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{kind}_delta_{until.strftime("%Y%m%d_%H%M%S")}.jsonl"'
+    response['X-Since'] = since.isoformat() if since else ''
+    response['X-Next-Since'] = until.isoformat()
+    return response
+
+
+@staff_member_required
+def profiling_report(request):
+    """Per-view query counts and timings from the sampled profiling buffer"""
+    if request.method == 'POST':
+        clear_requests()
+        messages.success(request, 'Profiling buffer cleared.')
+        return redirect('admin_profiling_report')
+    records = recent_requests()
+    context = {
+        'sample_rate': getattr(settings, 'QUERY_PROFILING_SAMPLE_RATE', 0.0),
+        'summary': view_summary(records),
+        'recent': records[:50],
+    }
+    return render(request, 'jobs/admin_profiling_report.html', context)
+
+
+@staff_member_required
+def profiling_report_json(request):
+    """JSON form of the profiling report: per-view summary plus raw records"""
+    records = recent_requests()
+    return JsonResponse({'summary': view_summary(records), 'requests': records})
@@ -0,0 +1,200 @@
+"""
+Benchmarks of the key read paths, for comparing performance across commits.
+
+Each case times one call (a view through RequestFactory, or a library
+function) against whatever data is in the database, normally a dataset built
+by `manage.py generate_dataset`. run_benchmarks() records the best and median
+wall time plus the query count of every case, and results are saved as JSON
+together with the git commit and the table sizes so runs can be compared.
+"""
+import json
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from accounts.models import Message, Profile
+from accounts.views import conversation_list
+from .models import Job, JobApplication, SavedCandidateSearch
+from .recommendations import recommend_candidates_for_job, recommend_jobs_for_profile
+from .search_utils import find_candidates_for_search
+from .export_utils import export_applications_csv, export_jobs_csv, export_profiles_csv
+from .views import job_list
+
+
+# Center used by the radius cases (New York, the gazetteer's largest city)
+RADIUS_CENTER = (40.7128, -74.0060)
+
+CASES = {}
+
+
+def benchmark(name):
+    """Register a case: a function that prepares its inputs and returns a callable to time."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _get(view, path, params=None, user=None):
+    request = RequestFactory().get(path, params or {})
+    request.user = user or AnonymousUser()
+    return lambda: view(request)
+
+
+def _sample_seeker():
+    return (
+        Profile.objects.filter(role='seeker').exclude(skills__isnull=True).exclude(skills='')
+        .select_related('user').order_by('pk').first()
+    )
+
+
+@benchmark('job_list_search')
+def _job_list_search():
+    return _get(job_list, '/jobs/', {'search': 'Engineer', 'skills': 'Python'})
+
+
+@benchmark('job_list_radius')
+def _job_list_radius():
+    lat, lon = RADIUS_CENTER
+    return _get(job_list, '/jobs/', {'location_lat': lat, 'location_lon': lon, 'location_radius': 25})
+
+
+@benchmark('recommend_jobs_for_profile')
+def _recommend_jobs():
+    profile = _sample_seeker()
+    return profile and (lambda: recommend_jobs_for_profile(profile))
+
+
+@benchmark('recommend_candidates_for_job')
+def _recommend_candidates():
+    job = Job.objects.filter(is_active=True).exclude(required_skills='').order_by('pk').first()
+    return job and (lambda: recommend_candidates_for_job(job))
+
+
+@benchmark('find_candidates_for_search')
+def _find_candidates():
+    # Unsaved, so the run leaves no rows behind
+    search = SavedCandidateSearch(name='benchmark', skills='Python, SQL', location='New York')
+    return lambda: len(find_candidates_for_search(search))
+
+
+@benchmark('find_candidates_for_search_radius')
+def _find_candidates_radius():
+    lat, lon = RADIUS_CENTER
+    search = SavedCandidateSearch(name='benchmark', skills='Python', radius_miles=50, latitude=lat, longitude=lon)
+    return lambda: len(find_candidates_for_search(search))
+
+
+@benchmark('export_jobs_csv')
+def _export_jobs():
+    return export_jobs_csv
+
+
+@benchmark('export_applications_csv')
+def _export_applications():
+    return export_applications_csv
+
+
+@benchmark('export_profiles_csv')
+def _export_profiles():
+    return export_profiles_csv
+
+
+@benchmark('conversation_list')
+def _conversation_list():
+    message = Message.objects.select_related('recipient__user').order_by('pk').first()
+    return message and _get(conversation_list, '/accounts/messages/', user=message.recipient.user)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_sizes():
+    return {
+        'jobs': Job.objects.count(),
+        'profiles': Profile.objects.count(),
+        'applications': JobApplication.objects.count(),
+        'messages': Message.objects.count(),
+    }
+
+
+def time_case(func, repeat):
+    """Run func `repeat` times; returns (timings in ms, queries per run)."""
+    queries = [0]
+
+    def count_query(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    timings = []
+    with connection.execute_wrapper(count_query):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, queries[0] // repeat
+
+
+def run_benchmarks(names=None, repeat=5, progress=None):
+    """Time the selected cases (all by default) and return the result document."""
+    progress = progress or (lambda message: None)
+    results = {}
+    for name in names or CASES:
+        func = CASES[name]()
+        if not func:
+            progress(f'{name}: skipped (no data)')
+            continue
+        func()  # warm caches and lazy imports
+        timings, queries = time_case(func, repeat)
+        results[name] = {
+            'best_ms': round(min(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'queries': queries,
+        }
+        progress(f'{name}: {results[name]["median_ms"]:.1f} ms median, {queries} queries')
+    return {
+        'commit': git_commit(),
+        'created_at': timezone.now().isoformat(),
+        'repeat': repeat,
+        'dataset': dataset_sizes(),
+        'results': results,
+    }
+
+
+def results_dir():
+    return Path(getattr(settings, 'BENCHMARK_RESULTS_DIR', Path(settings.BASE_DIR) / 'benchmark_results'))
+
+
+def save_results(document, path=None):
+    if path is None:
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+        path = results_dir() / f"{stamp}_{document['commit'] or 'nocommit'}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2))
+    return path
+
+
+def compare(current, baseline):
+    """[(case, baseline median, current median, change ratio)] for cases present in both runs."""
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before:
+            rows.append((name, before['median_ms'], result['median_ms'],
+                         result['median_ms'] / before['median_ms'] if before['median_ms'] else None))
+    return rows
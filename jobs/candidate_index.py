@@ -0,0 +1,110 @@
+"""
+In-memory index of candidate profiles for evaluating many saved searches.
+
+The index is built once per matching run from plain values (no model
+instances) and each saved search is reduced to a SearchSpec, so evaluating a
+search is set arithmetic instead of a query plus a skills re-parse per search.
+Nothing here touches the ORM, which keeps the index cheap to hand to worker
+processes.
+"""
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import FrozenSet, Optional, Tuple
+
+from .distance import haversine_miles_many
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    """The matching criteria of one SavedCandidateSearch."""
+    search_id: int
+    query: str = ''
+    location: str = ''
+    center: Optional[Tuple[float, float]] = None
+    radius_miles: Optional[float] = None
+    skills: FrozenSet[str] = frozenset()
+    # Only consider candidates updated at or after this time (incremental runs)
+    since: Optional[datetime] = None
+
+
+class CandidateIndex:
+    """
+    Candidates keyed by id with lower-cased text, coordinates and an inverted
+    skill -> candidate ids index. Matching mirrors find_candidates_for_search.
+    """
+
+    def __init__(self):
+        self.ids = set()
+        self.text = {}
+        self.location = {}
+        self.updated = {}
+        self.by_skill = defaultdict(set)
+        self.geo_ids = array('q')
+        self.geo_lats = array('d')
+        self.geo_lons = array('d')
+
+    def add(self, candidate_id, skills, location='', latitude=None, longitude=None, text_fields=(),
+            updated_at=None):
+        """Add one candidate; skills must already be parsed and lower-cased."""
+        self.ids.add(candidate_id)
+        self.updated[candidate_id] = updated_at
+        self.text[candidate_id] = tuple((value or '').lower() for value in text_fields)
+        self.location[candidate_id] = (location or '').lower()
+        for skill in skills:
+            self.by_skill[skill].add(candidate_id)
+        if latitude is not None and longitude is not None:
+            self.geo_ids.append(candidate_id)
+            self.geo_lats.append(latitude)
+            self.geo_lons.append(longitude)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def within_radius(self, center, radius_miles):
+        distances = haversine_miles_many(center[0], center[1], self.geo_lats, self.geo_lons)
+        return {pk for pk, distance in zip(self.geo_ids, distances) if distance <= radius_miles}
+
+    def match(self, spec):
+        """Return the set of candidate ids matching a SearchSpec."""
+        if spec.skills:
+            # Any overlapping skill is a match, as in find_candidates_for_search
+            matched = set()
+            for skill in spec.skills:
+                matched |= self.by_skill.get(skill, set())
+        else:
+            matched = set(self.ids)
+
+        if spec.since is not None:
+            matched = {
+                pk for pk in matched
+                if self.updated[pk] is None or self.updated[pk] >= spec.since
+            }
+
+        if spec.radius_miles is not None and spec.center is not None:
+            matched &= self.within_radius(spec.center, spec.radius_miles)
+        elif spec.location:
+            needle = spec.location.lower()
+            matched = {pk for pk in matched if needle in self.location[pk]}
+
+        if spec.query:
+            needle = spec.query.strip().lower()
+            matched = {pk for pk in matched if any(needle in field for field in self.text[pk])}
+        return matched
+
+
+# Set in each worker process by init_worker so the index is sent once per
+# process rather than once per task.
+_worker_index = None
+
+
+def init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def match_specs(specs, index=None):
+    """Evaluate a batch of SearchSpecs; returns [(search_id, candidate ids)]."""
+    index = index if index is not None else _worker_index
+    return [(spec.search_id, index.match(spec)) for spec in specs]
@@ -0,0 +1,88 @@
+"""
+Zoom-aware clustering for the map endpoints.
+
+Points inside the requested bounding box are bucketed on a grid whose cell
+size halves with every zoom level, so a zoomed-out map receives a handful of
+clusters (count plus centroid, computed by the database) instead of every
+geocoded row. Individual points are only loaded once the map is zoomed in far
+enough for them to be told apart.
+"""
+from django.db.models import Avg, Count, F, FloatField, Q, Value
+from django.db.models.functions import Floor
+
+
+MAX_ZOOM = 19
+# At or above this zoom level the endpoints return individual points.
+POINT_ZOOM = 13
+# Grid cells across one 256px map tile; 8 gives ~32px buckets on screen.
+CELLS_PER_TILE = 8
+# Upper bound on individual points returned for a single viewport.
+MAX_POINTS = 500
+
+
+def parse_bbox(value):
+    """
+    Parse a ``minLon,minLat,maxLon,maxLat`` string (Leaflet's
+    ``bounds.toBBoxString()``). Raises ValueError when malformed.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in (value or "").split(","))
+    except ValueError:
+        raise ValueError("bbox must be minLon,minLat,maxLon,maxLat")
+    if min_lat > max_lat:
+        raise ValueError("bbox minLat must not exceed maxLat")
+    # Leaflet reports longitudes beyond +/-180 after panning across the
+    # antimeridian; a viewport wider than the world simply covers all of it.
+    if max_lon - min_lon >= 360:
+        min_lon, max_lon = -180.0, 180.0
+    else:
+        min_lon = (min_lon + 180) % 360 - 180
+        max_lon = (max_lon + 180) % 360 - 180
+    return (min_lon, max(min_lat, -90.0), max_lon, min(max_lat, 90.0))
+
+
+def parse_zoom(value):
+    """Parse the zoom level, clamped to the range Leaflet supports."""
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("zoom must be an integer")
+    return max(0, min(zoom, MAX_ZOOM))
+
+
+def cell_size(zoom):
+    """Width of one grid cell in degrees at the given zoom level."""
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def within_bbox(queryset, bbox, lat_field="latitude", lon_field="longitude"):
+    """Restrict ``queryset`` to rows whose coordinates fall inside ``bbox``."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    queryset = queryset.filter(**{f"{lat_field}__gte": min_lat, f"{lat_field}__lte": max_lat})
+    if min_lon <= max_lon:
+        return queryset.filter(**{f"{lon_field}__gte": min_lon, f"{lon_field}__lte": max_lon})
+    # The viewport crosses the antimeridian
+    return queryset.filter(Q(**{f"{lon_field}__gte": min_lon}) | Q(**{f"{lon_field}__lte": max_lon}))
+
+
+def grid_clusters(queryset, bbox, zoom, lat_field="latitude", lon_field="longitude"):
+    """
+    Aggregate the rows of ``queryset`` inside ``bbox`` into grid cells for
+    ``zoom``. Returns ``[{"lat", "lon", "count"}]`` with the centroid of each
+    non-empty cell, computed with a single GROUP BY query.
+    """
+    size = cell_size(zoom)
+    rows = (
+        within_bbox(queryset, bbox, lat_field, lon_field)
+        .annotate(
+            cell_x=Floor((F(lon_field) + Value(180.0)) / Value(size), output_field=FloatField()),
+            cell_y=Floor((F(lat_field) + Value(90.0)) / Value(size), output_field=FloatField()),
+        )
+        .values("cell_x", "cell_y")
+        .annotate(count=Count("pk"), lat=Avg(lat_field), lon=Avg(lon_field))
+        .order_by()
+    )
+    return [
+        {"lat": round(row["lat"], 6), "lon": round(row["lon"], 6), "count": row["count"]}
+        for row in rows
+    ]
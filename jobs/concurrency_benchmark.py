@@ -0,0 +1,151 @@
+"""
+Concurrency benchmark for the SQLite database configuration.
+
+Each profile gets a scratch database file in a temporary directory,
+registered as an extra connection alias, seeded with a table of rows. Reader
+threads then run indexed aggregate queries in autocommit mode while writer
+threads run read-then-write atomic blocks (the shape of a typical
+get-modify-save), all for a fixed duration. The result per profile is the
+throughput, the latency percentiles and the number of operations that failed
+with "database is locked".
+
+The "baseline" profile is Django's stock SQLite backend with default
+settings; "tuned" is jobboard.sqlite_backend with the OPTIONS of the default
+database (or DEFAULT_TUNED_OPTIONS when the default database does not use it).
+"""
+import copy
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+
+TUNED_ENGINE = 'jobboard.sqlite_backend'
+
+DEFAULT_TUNED_OPTIONS = {
+    'pragmas': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,
+        'cache_size': -20000,
+        'mmap_size': 134217728,
+        'temp_store': 'memory',
+    },
+    'transaction_mode': 'IMMEDIATE',
+}
+
+BUCKETS = 50
+
+
+def profiles():
+    """{name: (ENGINE, OPTIONS)} for the configurations compared by the benchmark."""
+    default = connections.settings[DEFAULT_DB_ALIAS]
+    tuned = default['OPTIONS'] if default['ENGINE'] == TUNED_ENGINE else DEFAULT_TUNED_OPTIONS
+    return {
+        'baseline': ('django.db.backends.sqlite3', {}),
+        'tuned': (TUNED_ENGINE, copy.deepcopy(tuned)),
+    }
+
+
+def _create_schema(alias, rows):
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        cursor.execute(
+            'CREATE TABLE bench_row (id INTEGER PRIMARY KEY, bucket INTEGER NOT NULL, '
+            'hits INTEGER NOT NULL, payload TEXT NOT NULL)'
+        )
+        cursor.execute('CREATE INDEX bench_row_bucket ON bench_row (bucket)')
+        cursor.executemany(
+            'INSERT INTO bench_row (bucket, hits, payload) VALUES (%s, %s, %s)',
+            [(i % BUCKETS, 0, 'x' * 200) for i in range(rows)],
+        )
+
+
+def _read(alias, rows):
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT COUNT(*), SUM(hits) FROM bench_row WHERE bucket = %s', [random.randrange(BUCKETS)])
+        cursor.fetchone()
+
+
+def _write(alias, rows):
+    row_id = random.randint(1, rows)
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        cursor.execute('SELECT hits FROM bench_row WHERE id = %s', [row_id])
+        hits = cursor.fetchone()[0]
+        cursor.execute('UPDATE bench_row SET hits = %s WHERE id = %s', [hits + 1, row_id])
+
+
+def _worker(operation, alias, rows, deadline, stats):
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                operation(alias, rows)
+            except OperationalError:
+                stats['errors'] += 1
+            else:
+                stats['latencies'].append((time.perf_counter() - started) * 1000)
+    finally:
+        connections[alias].close()
+        del connections[alias]
+
+
+def _summary(stats, duration):
+    latencies = sorted(latency for s in stats for latency in s['latencies'])
+    count = len(latencies)
+    return {
+        'operations': count,
+        'errors': sum(s['errors'] for s in stats),
+        'per_second': round(count / duration, 1),
+        'median_ms': round(statistics.median(latencies), 3) if latencies else None,
+        'p95_ms': round(latencies[int(count * 0.95) - 1], 3) if count >= 20 else None,
+        'max_ms': round(latencies[-1], 3) if latencies else None,
+    }
+
+
+def run_profile(engine, options, readers=4, writers=2, duration=5.0, rows=10000):
+    """Run the workload against a scratch database with this ENGINE and OPTIONS."""
+    alias = f'concurrency_benchmark_{threading.get_ident()}'
+    with tempfile.TemporaryDirectory() as tmp:
+        connections.settings[alias] = dict(
+            copy.deepcopy(connections.settings[DEFAULT_DB_ALIAS]),
+            ENGINE=engine, NAME=str(Path(tmp) / 'benchmark.sqlite3'), OPTIONS=options,
+        )
+        try:
+            _create_schema(alias, rows)
+            connections[alias].close()
+
+            reader_stats = [{'errors': 0, 'latencies': []} for _ in range(readers)]
+            writer_stats = [{'errors': 0, 'latencies': []} for _ in range(writers)]
+            deadline = time.perf_counter() + duration
+            threads = [
+                threading.Thread(target=_worker, args=(_read, alias, rows, deadline, stats))
+                for stats in reader_stats
+            ] + [
+                threading.Thread(target=_worker, args=(_write, alias, rows, deadline, stats))
+                for stats in writer_stats
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+    return {'reads': _summary(reader_stats, duration), 'writes': _summary(writer_stats, duration)}
+
+
+def run_concurrency_benchmark(readers=4, writers=2, duration=5.0, rows=10000, names=None, progress=None):
+    """Run every profile (or those in `names`) and return {profile: result}."""
+    progress = progress or (lambda message: None)
+    results = {}
+    for name, (engine, options) in profiles().items():
+        if names and name not in names:
+            continue
+        progress(f'{name}: {readers} readers, {writers} writers for {duration:g}s')
+        results[name] = run_profile(engine, options, readers, writers, duration, rows)
+    return results
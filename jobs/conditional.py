@@ -0,0 +1,101 @@
+"""
+Conditional GET (ETag / Last-Modified) for the JSON APIs and the public
+detail pages.
+
+Each view computes cheap validators before doing its real work: an aggregate
+query giving the row count and latest modification time of the data behind
+the response (the count changes when rows are deleted, the timestamp when
+they are added or saved), or for detail pages the cached object's updated_at.
+If the request's If-None-Match / If-Modified-Since still match, the view
+returns 304 without running its main query or rendering anything.
+
+Collections only send an ETag: a deletion changes the count but not the
+latest timestamp, so Last-Modified alone could miss it. Detail pages send
+both. Responses carry Cache-Control: no-cache, so clients revalidate every
+time rather than showing a stale copy. Bump CONDITIONAL_GET_VERSION when a
+deploy changes the markup or JSON shape of these responses.
+"""
+import hashlib
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+Validators = namedtuple('Validators', 'etag last_modified private', defaults=(None, False))
+
+
+def make_etag(*parts):
+    """Strong ETag over the given values (and CONDITIONAL_GET_VERSION)."""
+    source = repr((getattr(settings, 'CONDITIONAL_GET_VERSION', 1),) + parts)
+    return f'"{hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def query_key(request):
+    """The query string in a canonical order, for ETags of filtered responses."""
+    return sorted(request.GET.lists())
+
+
+def csrf_secret(request):
+    """
+    The CSRF secret the page will be rendered with. Pages embedding a CSRF
+    token include it in their ETag; get_token() creates the secret up front
+    when the visitor has no cookie yet, so the first response's ETag already
+    matches the cookie it sets.
+    """
+    get_token(request)
+    return request.META.get('CSRF_COOKIE')
+
+
+def collection_version(queryset, field='updated_at'):
+    """(row count, latest `field`) for a queryset, in one aggregate query."""
+    stats = queryset.aggregate(count=Count('pk'), latest=Max(field))
+    return stats['count'], stats['latest']
+
+
+def set_validators(response, etag, last_modified=None, private=False):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True, **({'private': True} if private else {}))
+    return response
+
+
+def not_modified(request, etag, last_modified=None, private=False):
+    """A 304 response if the request's validators match, else None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified, private)
+    return response
+
+
+def conditional(get_validators):
+    """
+    Answer GET/HEAD requests with 304 when the validators still match.
+
+    get_validators(request, *args, **kwargs) returns Validators, or None to
+    serve the view unconditionally (for example when the view will reject
+    the request). Successful responses get the ETag and Last-Modified headers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            validators = None
+            if request.method in ('GET', 'HEAD'):
+                validators = get_validators(request, *args, **kwargs)
+            if validators is None:
+                return view(request, *args, **kwargs)
+            response = not_modified(request, *validators)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    set_validators(response, *validators)
+            return response
+        return wrapper
+    return decorator
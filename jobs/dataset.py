@@ -0,0 +1,342 @@
+"""
+Synthetic dataset generator for load and benchmark runs.
+
+Rows are built in batches and written with bulk_create, so millions of rows
+can be generated without per-row saves or signals. Distributions are meant to
+look like production rather than be uniform:
+
+- locations come from the bundled gazetteer weighted by population, with
+  coordinates jittered around the city center and a share of remote jobs;
+- skills follow a Zipf-like popularity curve over a fixed catalogue;
+- a popular minority of jobs receives most applications, and each seeker
+  applies to a job at most once;
+- every application comes with the ApplicationStatusEvent history that
+  JobApplication.save would have recorded, moving through the pipeline to its
+  current status, so the funnel rollups have the same input as in production.
+
+Every generated user name starts with GENERATED_PREFIX so a dataset can be
+removed again with clear_generated().
+"""
+import csv
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from accounts.models import Conversation, Message, Profile
+from .geocode import GAZETTEER_PATH
+from .models import ApplicationStatusEvent, Job, JobApplication
+
+
+GENERATED_PREFIX = 'gen_'
+
+SKILLS = [
+    'Python', 'JavaScript', 'SQL', 'Java', 'React', 'AWS', 'Docker', 'Git', 'TypeScript', 'Django',
+    'Node.js', 'PostgreSQL', 'Kubernetes', 'Go', 'C++', 'Machine Learning', 'Linux', 'HTML', 'CSS',
+    'Spring Boot', 'Terraform', 'pandas', 'Figma', 'Swift', 'Kotlin', 'Rust', 'GraphQL', 'Redis',
+    'MongoDB', 'Azure', 'GCP', 'Spark', 'Tableau', 'Excel', 'Scala', 'Ruby', 'Rails', 'PHP', 'Vue',
+    'Angular', 'Flask', 'FastAPI', 'C#', '.NET', 'TensorFlow', 'PyTorch', 'Airflow', 'Kafka', 'Jest',
+    'Selenium',
+]
+# Weight of the n-th most popular skill is 1 / n ** SKILL_SKEW
+SKILL_SKEW = 1.1
+
+TITLES = [
+    'Software Engineer', 'Senior Software Engineer', 'Frontend Developer', 'Backend Developer',
+    'Full Stack Developer', 'Data Scientist', 'Data Engineer', 'DevOps Engineer', 'Product Designer',
+    'Mobile Developer', 'Machine Learning Engineer', 'QA Engineer', 'Site Reliability Engineer',
+    'Data Analyst', 'Engineering Manager',
+]
+LEVELS = (('Entry', 0.2), ('Mid-level', 0.45), ('Senior', 0.3), ('Lead', 0.05))
+JOB_TYPES = (('Full-time', 0.8), ('Contract', 0.12), ('Part-time', 0.05), ('Internship', 0.03))
+WORK_TYPES = (('onsite', 0.45), ('hybrid', 0.4), ('remote', 0.15))
+STATUSES = (('applied', 0.55), ('review', 0.2), ('interview', 0.12), ('offer', 0.03), ('closed', 0.1))
+# Order applications move through; 'closed' can follow any of these stages
+PIPELINE = ['applied', 'review', 'interview', 'offer']
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn',
+               'Priya', 'Wei', 'Diego', 'Fatima', 'Noah', 'Olivia', 'Liam', 'Emma', 'Mateo', 'Aisha']
+LAST_NAMES = ['Smith', 'Johnson', 'Lee', 'Garcia', 'Brown', 'Nguyen', 'Patel', 'Kim', 'Martinez', 'Chen',
+              'Davis', 'Lopez', 'Wilson', 'Khan', 'Clark', 'Singh', 'Lewis', 'Walker', 'Young', 'Hall']
+COMPANY_WORDS = ['Tech', 'Data', 'Cloud', 'Bright', 'North', 'Blue', 'Quantum', 'Peak', 'Nova', 'Vertex']
+COMPANY_SUFFIXES = ['Corp', 'Labs', 'Systems', 'Inc.', 'Works', 'Solutions']
+
+# Degrees of jitter around a city center (roughly 0-20 miles)
+COORDINATE_JITTER = 0.3
+# Maximum age of generated jobs and applications
+HISTORY_DAYS = 365
+
+
+@dataclass
+class DatasetCounts:
+    recruiters: int = 0
+    seekers: int = 0
+    jobs: int = 0
+    applications: int = 0
+    conversations: int = 0
+    messages: int = 0
+
+
+@lru_cache(maxsize=None)
+def _weighted(choices):
+    values, weights = zip(*choices)
+    return values, weights
+
+
+class DatasetGenerator:
+    """
+    Generates related users, profiles, jobs, applications and conversations.
+    The same seed always produces the same dataset.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, progress=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+        self.now = timezone.now()
+        self.password = make_password(None)
+        self.cities = self._load_cities()
+        self.city_weights = [city[3] for city in self.cities]
+        self.skill_weights = [1 / (rank ** SKILL_SKEW) for rank in range(1, len(SKILLS) + 1)]
+
+    @staticmethod
+    def _load_cities():
+        with open(GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+            return [
+                (f"{row['name']}, {row['region']}" if row['region'] else row['name'],
+                 float(row['latitude']), float(row['longitude']), int(row['population'] or 1))
+                for row in csv.DictReader(handle)
+            ]
+
+    # Value generators
+
+    def skills(self, low=3, high=8):
+        count = self.rng.randint(low, high)
+        picked = dict.fromkeys(self.rng.choices(SKILLS, weights=self.skill_weights, k=count * 2))
+        return ', '.join(list(picked)[:count])
+
+    def place(self):
+        name, lat, lon, _ = self.rng.choices(self.cities, weights=self.city_weights)[0]
+        return (
+            name,
+            round(lat + self.rng.uniform(-COORDINATE_JITTER, COORDINATE_JITTER), 6),
+            round(lon + self.rng.uniform(-COORDINATE_JITTER, COORDINATE_JITTER), 6),
+        )
+
+    def pick(self, choices):
+        values, weights = _weighted(choices)
+        return self.rng.choices(values, weights=weights)[0]
+
+    def past(self, max_days=HISTORY_DAYS):
+        # Skewed towards recent dates
+        return self.now - timedelta(days=max_days * self.rng.random() ** 2, seconds=self.rng.randint(0, 86399))
+
+    # Batched writers
+
+    def _bulk_create(self, model, objects):
+        """bulk_create an iterable of unsaved objects in batches; returns their pks."""
+        pks = []
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                pks += [o.pk for o in model.objects.bulk_create(batch)]
+                batch = []
+        if batch:
+            pks += [o.pk for o in model.objects.bulk_create(batch)]
+        return pks
+
+    def create_users(self, role, count):
+        """Create users with profiles; returns [(profile pk, user pk)]."""
+        start = User.objects.filter(username__startswith=f'{GENERATED_PREFIX}{role}_').count()
+        created = []
+        for offset in range(0, count, self.batch_size):
+            users = []
+            for i in range(start + offset, start + min(offset + self.batch_size, count)):
+                first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                users.append(User(
+                    username=f'{GENERATED_PREFIX}{role}_{i:07d}',
+                    first_name=first,
+                    last_name=last,
+                    email=f'{GENERATED_PREFIX}{role}_{i:07d}@example.com',
+                    password=self.password,
+                    date_joined=self.past(),
+                ))
+            users = User.objects.bulk_create(users)
+            profiles = [self._profile(user, role) for user in users]
+            created += [(p.pk, p.user_id) for p in Profile.objects.bulk_create(profiles)]
+            self.progress(f'{role}s: {len(created)}/{count}')
+        return created
+
+    def _profile(self, user, role):
+        name, lat, lon = self.place()
+        if role == 'recruiter':
+            company = f'{self.rng.choice(COMPANY_WORDS)}{self.rng.choice(COMPANY_WORDS).lower()} {self.rng.choice(COMPANY_SUFFIXES)}'
+            return Profile(user=user, role=role, email=user.email, location=name, latitude=lat, longitude=lon,
+                           company_name=company, position_title='Recruiter')
+        title = self.rng.choice(TITLES)
+        return Profile(
+            user=user, role=role, email=user.email, location=name, latitude=lat, longitude=lon,
+            headline=f'{self.pick(LEVELS)} {title}', skills=self.skills(),
+            bio=f'{title} with {self.rng.randint(0, 20)} years of experience.',
+            is_public=self.rng.random() < 0.9,
+        )
+
+    def create_jobs(self, count, recruiter_pks):
+        companies = {}
+        for offset in range(0, len(recruiter_pks), self.batch_size):
+            chunk = recruiter_pks[offset:offset + self.batch_size]
+            companies.update(Profile.objects.filter(pk__in=chunk).values_list('pk', 'company_name'))
+
+        def jobs():
+            for i in range(count):
+                recruiter = self.rng.choice(recruiter_pks)
+                work_type = self.pick(WORK_TYPES)
+                if work_type == 'remote':
+                    location, lat, lon = 'Remote', None, None
+                else:
+                    location, lat, lon = self.place()
+                title = self.rng.choice(TITLES)
+                salary_min = self.rng.randrange(50000, 180000, 5000)
+                yield Job(
+                    title=title,
+                    description=f'{title} role. ' * self.rng.randint(5, 40),
+                    company=companies.get(recruiter) or 'Generated Co.',
+                    location=location,
+                    latitude=lat,
+                    longitude=lon,
+                    salary_min=salary_min if self.rng.random() < 0.8 else None,
+                    salary_max=salary_min + self.rng.randrange(10000, 80000, 5000),
+                    required_skills=self.skills(2, 6),
+                    work_type=work_type,
+                    visa_sponsorship=self.rng.random() < 0.25,
+                    job_type=self.pick(JOB_TYPES),
+                    experience_level=self.pick(LEVELS),
+                    posted_date=self.past(),
+                    is_active=self.rng.random() < 0.85,
+                    contact_email='jobs@example.com',
+                    posted_by_id=recruiter,
+                )
+                if (i + 1) % self.batch_size == 0:
+                    self.progress(f'jobs: {i + 1}/{count}')
+
+        return self._bulk_create(Job, jobs())
+
+    def status_history(self, status, applied):
+        """[(from_status, to_status, changed_at)] from applying up to ``status``, oldest first."""
+        if status == 'closed':
+            stages = PIPELINE[:self.rng.randint(1, len(PIPELINE))] + ['closed']
+        else:
+            stages = PIPELINE[:PIPELINE.index(status) + 1]
+        span = (self.now - applied).total_seconds()
+        times = [applied] + sorted(
+            applied + timedelta(seconds=span * self.rng.random()) for _ in stages[1:]
+        )
+        return list(zip([''] + stages[:-1], stages, times))
+
+    def create_applications(self, count, job_pks, seeker_user_pks):
+        """
+        Spread count applications over the seekers. Jobs are drawn with a
+        quadratic bias towards the front of job_pks, so a minority of jobs
+        gets most applicants; duplicates per seeker are redrawn. Each batch of
+        applications is followed by the status events of its rows.
+        """
+        if not job_pks or not seeker_user_pks:
+            return 0
+        per_seeker, extra = divmod(count, len(seeker_user_pks))
+        per_seeker_cap = min(len(job_pks), 200)
+
+        def applications():
+            for index, applicant_id in enumerate(seeker_user_pks):
+                wanted = min(per_seeker + (1 if index < extra else 0), per_seeker_cap)
+                chosen = set()
+                while len(chosen) < wanted:
+                    chosen.add(job_pks[int(len(job_pks) * self.rng.random() ** 2)])
+                for job_id in chosen:
+                    applied = self.past(180)
+                    history = self.status_history(self.pick(STATUSES), applied)
+                    yield JobApplication(
+                        job_id=job_id,
+                        applicant_id=applicant_id,
+                        status=history[-1][1],
+                        applied_date=applied,
+                        status_changed_at=history[-1][2],
+                    ), history
+
+        created = 0
+        batch = []
+        for row in applications():
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                created += self._create_application_batch(batch)
+                batch = []
+        if batch:
+            created += self._create_application_batch(batch)
+        return created
+
+    def _create_application_batch(self, batch):
+        # bulk_create sets the pks the events point at
+        JobApplication.objects.bulk_create([application for application, _ in batch])
+
+        def events():
+            for application, history in batch:
+                entered = None
+                for from_status, to_status, changed_at in history:
+                    yield ApplicationStatusEvent(
+                        application_id=application.pk,
+                        job_id=application.job_id,
+                        from_status=from_status,
+                        to_status=to_status,
+                        changed_at=changed_at,
+                        seconds_in_previous=int((changed_at - entered).total_seconds()) if entered else None,
+                    )
+                    entered = changed_at
+
+        self._bulk_create(ApplicationStatusEvent, events())
+        return len(batch)
+
+    def create_conversations(self, count, recruiter_pks, seeker_pks):
+        """Recruiter/seeker threads of 1-6 messages each; returns (conversations, messages)."""
+        if not recruiter_pks or not seeker_pks:
+            return 0, 0
+        conversation_pks = self._bulk_create(
+            Conversation, (Conversation(subject=f'Opportunity {i}') for i in range(count))
+        )
+
+        def messages():
+            for conversation_id in conversation_pks:
+                recruiter, seeker = self.rng.choice(recruiter_pks), self.rng.choice(seeker_pks)
+                for n in range(self.rng.randint(1, 6)):
+                    sender, recipient = (recruiter, seeker) if n % 2 == 0 else (seeker, recruiter)
+                    yield Message(
+                        conversation_id=conversation_id,
+                        sender_id=sender,
+                        recipient_id=recipient,
+                        body=self.rng.choice(['Hi, are you open to new roles?', 'Thanks, tell me more.',
+                                              'Could we schedule a call?', 'Sounds good!']),
+                        is_read=self.rng.random() < 0.7,
+                    )
+
+        return len(conversation_pks), len(self._bulk_create(Message, messages()))
+
+    def generate(self, recruiters=0, seekers=0, jobs=0, applications=0, conversations=0):
+        counts = DatasetCounts()
+        recruiter_pks = [profile for profile, _ in self.create_users('recruiter', recruiters)]
+        seekers = self.create_users('seeker', seekers)
+        seeker_pks = [profile for profile, _ in seekers]
+        counts.recruiters, counts.seekers = len(recruiter_pks), len(seeker_pks)
+        job_pks = self.create_jobs(jobs, recruiter_pks) if recruiter_pks else []
+        counts.jobs = len(job_pks)
+        counts.applications = self.create_applications(applications, job_pks, [user for _, user in seekers])
+        counts.conversations, counts.messages = self.create_conversations(conversations, recruiter_pks, seeker_pks)
+        return counts
+
+
+def clear_generated():
+    """Delete every generated user and, through cascades, their data."""
+    Conversation.objects.filter(messages__sender__user__username__startswith=GENERATED_PREFIX).delete()
+    deleted, _ = User.objects.filter(username__startswith=GENERATED_PREFIX).delete()
+    return deleted
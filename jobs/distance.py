@@ -0,0 +1,160 @@
+"""
+Great-circle distance helpers for radius search and distance ordering.
+
+haversine_miles is the scalar formula. haversine_miles_many evaluates it for a
+whole column of coordinates in one call, using NumPy when it is installed and
+a pure-Python loop over array('d') buffers otherwise. rank_by_distance applies
+a radius filter and distance ordering using only the (id, latitude, longitude)
+columns of a queryset, so model instances are built just for the rows a page
+actually shows (see load_ranked). distance_expression is the same formula as a
+database expression, for radius filters that have to stay a lazy queryset.
+"""
+from array import array
+from math import asin, cos, radians, sin, sqrt
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+def numpy_available():
+    return np is not None
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Distance in miles between two points."""
+    lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * asin(sqrt(a))
+
+
+def haversine_miles_many(lat, lon, lats, lons, use_numpy=None):
+    """
+    Distances in miles from (lat, lon) to every point of the ``lats``/``lons``
+    sequences. Returns a NumPy array when NumPy is used, else an array('d').
+    Pass ``use_numpy=False`` to force the pure-Python kernel.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    lat1 = radians(lat)
+    lon1 = radians(lon)
+    cos_lat1 = cos(lat1)
+
+    if use_numpy:
+        lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+        lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    # Constants are hoisted and math functions bound locally; the per-point
+    # work is the bare formula.
+    diameter = 2 * EARTH_RADIUS_MILES
+    to_rad = radians(1)
+    _sin, _cos, _asin, _sqrt = sin, cos, asin, sqrt
+    out = array('d')
+    append = out.append
+    for lat2, lon2 in zip(lats, lons):
+        lat2 *= to_rad
+        dlat = _sin((lat2 - lat1) / 2)
+        dlon = _sin((lon2 * to_rad - lon1) / 2)
+        a = dlat * dlat + cos_lat1 * _cos(lat2) * dlon * dlon
+        append(diameter * _asin(_sqrt(a if a < 1.0 else 1.0)))
+    return out
+
+
+def within_radius_box(queryset, lat, lon, radius_miles):
+    """
+    Cheap SQL prefilter: restrict ``queryset`` to the lat/lon box enclosing
+    the radius so only plausible rows are pulled for the exact distance check.
+    """
+    lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+    queryset = queryset.filter(latitude__gte=lat - lat_delta, latitude__lte=lat + lat_delta)
+    cos_lat = cos(radians(lat))
+    if cos_lat > 0.01:
+        lon_delta = lat_delta / cos_lat
+        if lon_delta < 180 and -180 <= lon - lon_delta and lon + lon_delta <= 180:
+            queryset = queryset.filter(longitude__gte=lon - lon_delta, longitude__lte=lon + lon_delta)
+    return queryset
+
+
+def distance_expression(lat, lon):
+    """
+    Haversine distance in miles from (lat, lon) to each row's latitude and
+    longitude, evaluated by the database (Django registers the math functions
+    on SQLite).
+    """
+    lat2 = Radians(F('latitude'))
+    a = (
+        Power(Sin((lat2 - Value(radians(lat))) / 2), 2)
+        + Value(cos(radians(lat))) * Cos(lat2) * Power(Sin((Radians(F('longitude')) - Value(radians(lon))) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_MILES) * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
+
+
+def coordinate_columns(queryset):
+    """Pull (ids, lats, lons) arrays for the geocoded rows of ``queryset``."""
+    ids, lats, lons = array('q'), array('d'), array('d')
+    rows = (
+        queryset.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+        .values_list('id', 'latitude', 'longitude')
+    )
+    for pk, row_lat, row_lon in rows.iterator(chunk_size=5000):
+        ids.append(pk)
+        lats.append(row_lat)
+        lons.append(row_lon)
+    return ids, lats, lons
+
+
+def rank_by_distance(queryset, lat, lon, radius_miles=None, order_by_distance=True):
+    """
+    Return ``[(id, distance_miles)]`` for the geocoded rows of ``queryset``,
+    limited to ``radius_miles`` when given. Rows are nearest first, or keep
+    the queryset's own ordering when ``order_by_distance`` is False.
+    """
+    if radius_miles is not None:
+        queryset = within_radius_box(queryset, lat, lon, radius_miles)
+    ids, lats, lons = coordinate_columns(queryset)
+    if not ids:
+        return []
+    distances = haversine_miles_many(lat, lon, lats, lons)
+
+    if np is not None:
+        id_array = np.frombuffer(ids, dtype=np.int64)
+        keep = np.flatnonzero(distances <= radius_miles) if radius_miles is not None else np.arange(len(ids))
+        if order_by_distance:
+            keep = keep[np.argsort(distances[keep], kind='stable')]
+        return list(zip(id_array[keep].tolist(), distances[keep].tolist()))
+
+    ranked = [
+        (pk, distance) for pk, distance in zip(ids, distances)
+        if radius_miles is None or distance <= radius_miles
+    ]
+    if order_by_distance:
+        ranked.sort(key=lambda item: item[1])
+    return ranked
+
+
+def load_ranked(queryset, ranked, precision=1):
+    """
+    Fetch the model instances for a slice of ``rank_by_distance`` output, in
+    that order, with a rounded ``search_distance`` attribute. Entries with a
+    ``None`` distance are loaded without one.
+    """
+    objects = queryset.in_bulk([pk for pk, _ in ranked])
+    loaded = []
+    for pk, distance in ranked:
+        obj = objects.get(pk)
+        if obj is None:
+            continue
+        if distance is not None:
+            obj.search_distance = round(distance, precision)
+        loaded.append(obj)
+    return loaded
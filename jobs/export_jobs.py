@@ -0,0 +1,147 @@
+"""
+Background export jobs: queued from the reporting dashboard, written to
+EXPORT_ROOT in chunks by the process_export_jobs worker, then downloaded.
+Exports can be CSV (optionally gzipped), gzip JSON Lines, or Parquet.
+"""
+import csv
+import gzip
+import io
+import logging
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobboard.routers import replica_reads
+
+from .export_utils import COLUMNAR_SPECS, EXPORT_KINDS, write_jsonl_gz, write_parquet
+from .metrics import EXPORT_DURATION
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# Running exports whose worker has not reported progress within this time are retried
+STALE_EXPORT_AFTER = timedelta(minutes=15)
+
+
+class ClaimLost(Exception):
+    """The export was reclaimed by another worker while this one was running it"""
+
+
+def export_root():
+    return Path(getattr(settings, 'EXPORT_ROOT', Path(settings.BASE_DIR) / 'exports'))
+
+
+def claim_next_export_job(now=None):
+    """
+    Atomically move the oldest pending export to running and return it,
+    or None when the queue is empty. Safe to call from several workers:
+    each claim gets its own claim_token.
+    """
+    now = now or timezone.now()
+    # Recover exports whose worker died mid-run (no heartbeat for a while)
+    ExportJob.objects.filter(status='running', locked_at__lt=now - STALE_EXPORT_AFTER).update(
+        status='pending', rows_written=0, claim_token=None,
+    )
+
+    for job_id in ExportJob.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True)[:10]:
+        token = uuid.uuid4()
+        claimed = ExportJob.objects.filter(id=job_id, status='pending').update(
+            status='running', started_at=now, locked_at=now, claim_token=token,
+        )
+        if claimed:
+            return ExportJob.objects.get(id=job_id)
+    return None
+
+
+def _update_claimed(export_job, **fields):
+    """Update the export only while this worker still holds its claim; raises ClaimLost otherwise"""
+    updated = ExportJob.objects.filter(
+        pk=export_job.pk, status='running', claim_token=export_job.claim_token,
+    ).update(**fields)
+    if not updated:
+        raise ClaimLost(f'Export job {export_job.pk} was reclaimed by another worker')
+    for name, value in fields.items():
+        setattr(export_job, name, value)
+
+
+def _open_output(path, compress):
+    if compress:
+        return io.TextIOWrapper(gzip.open(path, 'wb'), encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _write_csv(export_job, path, queryset, chunk_size, report_progress):
+    header, rows, _ = EXPORT_KINDS[export_job.kind]
+    written = 0
+    with _open_output(path, export_job.compress) as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        for row in rows(queryset.iterator(chunk_size=chunk_size)):
+            writer.writerow(row)
+            written += 1
+            if written % chunk_size == 0:
+                report_progress(written)
+    return written
+
+
+def run_export_job(export_job, chunk_size=2000):
+    """
+    Write the export to disk, saving progress (and the claim's heartbeat)
+    after every chunk of rows. A worker whose claim was taken over stops at
+    its next progress update and leaves the job to the new holder.
+    """
+    _, _, build_queryset = EXPORT_KINDS[export_job.kind]
+    # Each claim writes its own file, so a superseded worker never touches the current one
+    relative_path = Path(f'{export_job.pk}_{export_job.claim_token.hex[:8]}_{export_job.download_filename()}')
+    path = export_root() / relative_path
+
+    def report_progress(written):
+        _update_claimed(export_job, rows_written=written, locked_at=timezone.now())
+
+    started = time.perf_counter()
+    try:
+        queryset = build_queryset(export_job.filter_value or None)
+        # The rows themselves are read from the replica when one is configured
+        with replica_reads():
+            total_rows = queryset.count()
+        _update_claimed(export_job, total_rows=total_rows, locked_at=timezone.now())
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with replica_reads():
+            if export_job.format == 'jsonl':
+                with open(path, 'wb') as handle:
+                    written = write_jsonl_gz(handle, queryset, COLUMNAR_SPECS[export_job.kind], chunk_size, report_progress)
+            elif export_job.format == 'parquet':
+                written = write_parquet(path, queryset, COLUMNAR_SPECS[export_job.kind], chunk_size, report_progress)
+            else:
+                written = _write_csv(export_job, path, queryset, chunk_size, report_progress)
+        _update_claimed(
+            export_job, rows_written=written, file_path=str(relative_path), status='done', finished_at=timezone.now(),
+        )
+    except ClaimLost:
+        logger.warning('Export job %s was reclaimed by another worker; stopping', export_job.pk)
+        path.unlink(missing_ok=True)
+        export_job.refresh_from_db()
+        return export_job
+    except Exception as exc:
+        logger.exception('Export job %s failed', export_job.pk)
+        path.unlink(missing_ok=True)
+        try:
+            _update_claimed(export_job, status='failed', error_text=str(exc), finished_at=timezone.now())
+        except ClaimLost:
+            export_job.refresh_from_db()
+            return export_job
+        EXPORT_DURATION.observe(time.perf_counter() - started, kind=export_job.kind, format=export_job.format,
+                                status='failed')
+        return export_job
+
+    EXPORT_DURATION.observe(time.perf_counter() - started, kind=export_job.kind, format=export_job.format, status='done')
+    return export_job
+
+
+def export_file_path(export_job):
+    return export_root() / export_job.file_path
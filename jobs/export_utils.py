@@ -1,42 +1,102 @@
 """
 CSV Export Utilities for Admin Reporting
+
+Each export is defined once as a header plus a row generator so the same rows
+can be written to an HTTP response or, for background export jobs, to a file.
+Typed column specs back the analytics formats (gzip JSONL, and Parquet when
+pyarrow is installed), which read raw values instead of display strings.
 """
 import csv
+import gzip
+import json
+from itertools import islice
 from django.http import HttpResponse
-from django.db.models import Count, Q
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from datetime import datetime
-from jobs.models import Job, JobApplication, SavedJob, SavedCandidateSearch
+from jobs.models import Job, JobApplication, SavedJob, SavedCandidateSearch, DeletionTombstone
 from accounts.models import Profile
 from django.contrib.auth.models import User
+from jobs.reporting import DAILY_METRIC_FIELDS, activity_totals
 
 
-def export_jobs_csv(queryset=None, include_stats=True):
-    """Export jobs to CSV"""
-    if queryset is None:
-        queryset = Job.objects.select_related('posted_by__user').all()
-    
+JOB_HEADER = [
+    'ID', 'Title', 'Company', 'Location', 'Latitude', 'Longitude',
+    'Salary Min', 'Salary Max', 'Work Type', 'Job Type', 'Experience Level',
+    'Visa Sponsorship', 'Required Skills', 'Contact Email',
+    'Posted By (Username)', 'Posted By (Email)', 'Posted Date',
+    'Application Deadline', 'Is Active', 'Application Count',
+    'Description'
+]
+
+APPLICATION_HEADER = [
+    'ID', 'Job ID', 'Job Title', 'Company', 'Applicant Username',
+    'Applicant Email', 'Applicant Full Name', 'Applicant Location',
+    'Applicant Headline', 'Status', 'Applied Date', 'Last Updated',
+    'Cover Note', 'Recruiter Notes'
+]
+
+USER_HEADER = [
+    'ID', 'Username', 'Email', 'First Name', 'Last Name',
+    'Is Staff', 'Is Superuser', 'Is Active', 'Date Joined', 'Last Login',
+    'Role', 'Location', 'Headline', 'Company Name', 'Skills',
+    'Profile Created', 'Total Applications', 'Total Jobs Posted'
+]
+
+PROFILE_HEADER = [
+    'ID', 'Username', 'Email', 'Role', 'Location', 'Latitude', 'Longitude',
+    'Headline', 'Bio', 'Skills', 'Links', 'Company Name', 'Company Website',
+    'Position Title', 'Is Public', 'Show Email', 'Show Links',
+    'Show Education', 'Show Work', 'Show Skills'
+]
+
+
+def _csv_response(prefix):
     response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="jobs_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write header
-    writer.writerow([
-        'ID', 'Title', 'Company', 'Location', 'Latitude', 'Longitude',
-        'Salary Min', 'Salary Max', 'Work Type', 'Job Type', 'Experience Level',
-        'Visa Sponsorship', 'Required Skills', 'Contact Email',
-        'Posted By (Username)', 'Posted By (Email)', 'Posted Date',
-        'Application Deadline', 'Is Active', 'Application Count',
-        'Description'
-    ])
-    
-    # Write data
+    response['Content-Disposition'] = f'attachment; filename="{prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+    return response
+
+
+def _format_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def _flatten_text(value):
+    return (value or '').replace('\n', ' ').replace('\r', ' ')[:500]
+
+
+def with_job_stats(queryset):
+    """Annotate the per-job counts used by job_rows, so rows need no extra queries"""
+    if 'application_count' in queryset.query.annotations:
+        return queryset
+    return queryset.annotate(application_count=Count('applications'))
+
+
+def with_user_stats(queryset):
+    """Annotate the per-user counts used by user_rows"""
+    if 'application_count' in queryset.query.annotations:
+        return queryset
+    # Subqueries rather than Count() so the two joins don't multiply each other
+    applications = JobApplication.objects.filter(applicant=OuterRef('pk')).order_by().values('applicant')
+    jobs = Job.objects.filter(posted_by__user=OuterRef('pk')).order_by().values('posted_by')
+    return queryset.annotate(
+        application_count=Coalesce(Subquery(applications.annotate(n=Count('id')).values('n')), 0),
+        jobs_posted_count=Coalesce(Subquery(jobs.annotate(n=Count('id')).values('n')), 0),
+    )
+
+
+def job_rows(queryset, include_stats=True):
+    """Yield one CSV row per job"""
     for job in queryset:
         posted_by_username = job.posted_by.user.username if job.posted_by else 'N/A'
         posted_by_email = job.posted_by.user.email if job.posted_by and job.posted_by.user else 'N/A'
-        app_count = job.applications.count() if include_stats else 0
-        
-        writer.writerow([
+        app_count = 0
+        if include_stats:
+            app_count = getattr(job, 'application_count', None)
+            if app_count is None:
+                app_count = job.applications.count()
+
+        yield [
             job.id,
             job.title,
             job.company,
@@ -53,43 +113,24 @@ def export_jobs_csv(queryset=None, include_stats=True):
             job.contact_email,
             posted_by_username,
             posted_by_email,
-            job.posted_date.strftime('%Y-%m-%d %H:%M:%S') if job.posted_date else '',
-            job.application_deadline.strftime('%Y-%m-%d %H:%M:%S') if job.application_deadline else '',
+            _format_datetime(job.posted_date),
+            _format_datetime(job.application_deadline),
             'Yes' if job.is_active else 'No',
             app_count,
-            job.description.replace('\n', ' ').replace('\r', ' ')[:500],  # Truncate long descriptions
-        ])
-    
-    return response
+            _flatten_text(job.description),  # Truncate long descriptions
+        ]
 
 
-def export_applications_csv(queryset=None):
-    """Export job applications to CSV"""
-    if queryset is None:
-        queryset = JobApplication.objects.select_related('job', 'applicant__profile').all()
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="applications_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write header
-    writer.writerow([
-        'ID', 'Job ID', 'Job Title', 'Company', 'Applicant Username',
-        'Applicant Email', 'Applicant Full Name', 'Applicant Location',
-        'Applicant Headline', 'Status', 'Applied Date', 'Last Updated',
-        'Cover Note', 'Recruiter Notes'
-    ])
-    
-    # Write data
+def application_rows(queryset):
+    """Yield one CSV row per job application"""
     for app in queryset:
         applicant_profile = getattr(app.applicant, 'profile', None)
         applicant_name = app.applicant.get_full_name() or app.applicant.username
         applicant_email = app.applicant.email or (applicant_profile.email if applicant_profile else '')
         applicant_location = applicant_profile.location if applicant_profile else ''
         applicant_headline = applicant_profile.headline if applicant_profile else ''
-        
-        writer.writerow([
+
+        yield [
             app.id,
             app.job.id,
             app.job.title,
@@ -100,34 +141,15 @@ def export_applications_csv(queryset=None):
             applicant_location,
             applicant_headline,
             app.get_status_display(),
-            app.applied_date.strftime('%Y-%m-%d %H:%M:%S') if app.applied_date else '',
-            app.last_updated.strftime('%Y-%m-%d %H:%M:%S') if app.last_updated else '',
-            app.cover_note.replace('\n', ' ').replace('\r', ' ')[:500],
-            app.recruiter_notes.replace('\n', ' ').replace('\r', ' ')[:500],
-        ])
-    
-    return response
+            _format_datetime(app.applied_date),
+            _format_datetime(app.last_updated),
+            _flatten_text(app.cover_note),
+            _flatten_text(app.recruiter_notes),
+        ]
 
 
-def export_users_csv(queryset=None):
-    """Export users to CSV"""
-    if queryset is None:
-        queryset = User.objects.select_related('profile').all()
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="users_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write header
-    writer.writerow([
-        'ID', 'Username', 'Email', 'First Name', 'Last Name',
-        'Is Staff', 'Is Superuser', 'Is Active', 'Date Joined', 'Last Login',
-        'Role', 'Location', 'Headline', 'Company Name', 'Skills',
-        'Profile Created', 'Total Applications', 'Total Jobs Posted'
-    ])
-    
-    # Write data
+def user_rows(queryset):
+    """Yield one CSV row per user"""
     for user in queryset:
         profile = getattr(user, 'profile', None)
         role = profile.get_role_display() if profile else 'No Profile'
@@ -135,12 +157,16 @@ def export_users_csv(queryset=None):
         headline = profile.headline if profile else ''
         company_name = profile.company_name if profile else ''
         skills = profile.skills if profile else ''
-        
-        # Count applications and jobs posted
-        app_count = user.job_applications.count()
-        jobs_posted = user.profile.posted_jobs.count() if profile else 0
-        
-        writer.writerow([
+
+        # Count applications and jobs posted (annotated by with_user_stats)
+        app_count = getattr(user, 'application_count', None)
+        if app_count is None:
+            app_count = user.job_applications.count()
+        jobs_posted = getattr(user, 'jobs_posted_count', None)
+        if jobs_posted is None:
+            jobs_posted = user.profile.posted_jobs.count() if profile else 0
+
+        yield [
             user.id,
             user.username,
             user.email or '',
@@ -149,8 +175,8 @@ def export_users_csv(queryset=None):
             'Yes' if user.is_staff else 'No',
             'Yes' if user.is_superuser else 'No',
             'Yes' if user.is_active else 'No',
-            user.date_joined.strftime('%Y-%m-%d %H:%M:%S') if user.date_joined else '',
-            user.last_login.strftime('%Y-%m-%d %H:%M:%S') if user.last_login else '',
+            _format_datetime(user.date_joined),
+            _format_datetime(user.last_login),
             role,
             location,
             headline,
@@ -159,32 +185,13 @@ def export_users_csv(queryset=None):
             'Yes' if profile else 'No',
             app_count,
             jobs_posted,
-        ])
-    
-    return response
+        ]
 
 
-def export_profiles_csv(queryset=None):
-    """Export profiles to CSV"""
-    if queryset is None:
-        queryset = Profile.objects.select_related('user').all()
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="profiles_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write header
-    writer.writerow([
-        'ID', 'Username', 'Email', 'Role', 'Location', 'Latitude', 'Longitude',
-        'Headline', 'Bio', 'Skills', 'Links', 'Company Name', 'Company Website',
-        'Position Title', 'Is Public', 'Show Email', 'Show Links',
-        'Show Education', 'Show Work', 'Show Skills'
-    ])
-    
-    # Write data
+def profile_rows(queryset):
+    """Yield one CSV row per profile"""
     for profile in queryset:
-        writer.writerow([
+        yield [
             profile.id,
             profile.user.username if profile.user else '',
             profile.email or (profile.user.email if profile.user else ''),
@@ -193,7 +200,7 @@ def export_profiles_csv(queryset=None):
             profile.latitude or '',
             profile.longitude or '',
             profile.headline or '',
-            (profile.bio or '').replace('\n', ' ').replace('\r', ' ')[:500],
+            _flatten_text(profile.bio),
             profile.skills or '',
             profile.links or '',
             profile.company_name or '',
@@ -205,15 +212,290 @@ def export_profiles_csv(queryset=None):
             'Yes' if profile.show_education else 'No',
             'Yes' if profile.show_work else 'No',
             'Yes' if profile.show_skills else 'No',
-        ])
-    
+        ]
+
+
+def jobs_export_queryset(is_active=None):
+    queryset = with_job_stats(Job.objects.select_related('posted_by__user'))
+    if is_active:
+        queryset = queryset.filter(is_active=is_active.lower() == 'true')
+    return queryset
+
+
+def applications_export_queryset(status=None):
+    queryset = JobApplication.objects.select_related('job', 'applicant__profile').all()
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def users_export_queryset(role=None):
+    queryset = with_user_stats(User.objects.select_related('profile'))
+    if role:
+        queryset = queryset.filter(profile__role=role)
+    return queryset
+
+
+def profiles_export_queryset(role=None):
+    queryset = Profile.objects.select_related('user').all()
+    if role:
+        queryset = queryset.filter(role=role)
+    return queryset
+
+
+# kind -> (header, row generator, queryset builder taking the optional filter value)
+EXPORT_KINDS = {
+    'jobs': (JOB_HEADER, job_rows, jobs_export_queryset),
+    'applications': (APPLICATION_HEADER, application_rows, applications_export_queryset),
+    'users': (USER_HEADER, user_rows, users_export_queryset),
+    'profiles': (PROFILE_HEADER, profile_rows, profiles_export_queryset),
+}
+
+
+# ---------- Analytics formats (JSONL.gz / Parquet) ----------
+
+# kind -> [(column name, ORM lookup, type)], type is one of int, float, string, bool, timestamp
+COLUMNAR_SPECS = {
+    'jobs': [
+        ('id', 'id', 'int'),
+        ('title', 'title', 'string'),
+        ('company', 'company', 'string'),
+        ('location', 'location', 'string'),
+        ('latitude', 'latitude', 'float'),
+        ('longitude', 'longitude', 'float'),
+        ('salary_min', 'salary_min', 'int'),
+        ('salary_max', 'salary_max', 'int'),
+        ('work_type', 'work_type', 'string'),
+        ('job_type', 'job_type', 'string'),
+        ('experience_level', 'experience_level', 'string'),
+        ('visa_sponsorship', 'visa_sponsorship', 'bool'),
+        ('required_skills', 'required_skills', 'string'),
+        ('contact_email', 'contact_email', 'string'),
+        ('posted_by_username', 'posted_by__user__username', 'string'),
+        ('posted_date', 'posted_date', 'timestamp'),
+        ('application_deadline', 'application_deadline', 'timestamp'),
+        ('is_active', 'is_active', 'bool'),
+        ('description', 'description', 'string'),
+    ],
+    'applications': [
+        ('id', 'id', 'int'),
+        ('job_id', 'job_id', 'int'),
+        ('job_title', 'job__title', 'string'),
+        ('company', 'job__company', 'string'),
+        ('applicant_id', 'applicant_id', 'int'),
+        ('applicant_username', 'applicant__username', 'string'),
+        ('applicant_email', 'applicant__email', 'string'),
+        ('applicant_location', 'applicant__profile__location', 'string'),
+        ('status', 'status', 'string'),
+        ('applied_date', 'applied_date', 'timestamp'),
+        ('last_updated', 'last_updated', 'timestamp'),
+        ('cover_note', 'cover_note', 'string'),
+        ('recruiter_notes', 'recruiter_notes', 'string'),
+    ],
+    'users': [
+        ('id', 'id', 'int'),
+        ('username', 'username', 'string'),
+        ('email', 'email', 'string'),
+        ('first_name', 'first_name', 'string'),
+        ('last_name', 'last_name', 'string'),
+        ('is_staff', 'is_staff', 'bool'),
+        ('is_active', 'is_active', 'bool'),
+        ('date_joined', 'date_joined', 'timestamp'),
+        ('last_login', 'last_login', 'timestamp'),
+        ('role', 'profile__role', 'string'),
+        ('location', 'profile__location', 'string'),
+    ],
+    'profiles': [
+        ('id', 'id', 'int'),
+        ('user_id', 'user_id', 'int'),
+        ('username', 'user__username', 'string'),
+        ('role', 'role', 'string'),
+        ('location', 'location', 'string'),
+        ('latitude', 'latitude', 'float'),
+        ('longitude', 'longitude', 'float'),
+        ('headline', 'headline', 'string'),
+        ('bio', 'bio', 'string'),
+        ('skills', 'skills', 'string'),
+        ('company_name', 'company_name', 'string'),
+        ('is_public', 'is_public', 'bool'),
+    ],
+}
+
+
+def iter_record_batches(queryset, columns, batch_size=5000):
+    """
+    Yield lists of value tuples (in column order) straight from the database,
+    batch_size rows at a time, without instantiating model objects.
+    """
+    lookups = [lookup for _, lookup, _ in columns]
+    rows = queryset.order_by().values_list(*lookups).iterator(chunk_size=batch_size)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def write_jsonl_gz(handle, queryset, columns, batch_size=5000, on_batch=None):
+    """
+    Write one compact JSON object per row to a binary file handle, gzip-compressed.
+    on_batch, if given, is called with the running row count after each batch.
+    Returns the number of rows written.
+    """
+    names = [name for name, _, _ in columns]
+    written = 0
+    with gzip.GzipFile(fileobj=handle, mode='wb') as gz:
+        for batch in iter_record_batches(queryset, columns, batch_size):
+            lines = [
+                json.dumps(dict(zip(names, row)), default=_json_default, separators=(',', ':'))
+                for row in batch
+            ]
+            gz.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            written += len(batch)
+            if on_batch:
+                on_batch(written)
+    return written
+
+
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_parquet(path, queryset, columns, batch_size=5000, on_batch=None):
+    """
+    Write a typed Parquet file one record batch at a time. Requires pyarrow.
+    on_batch works as in write_jsonl_gz. Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'string': pa.string(),
+        'bool': pa.bool_(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+    }
+    schema = pa.schema([(name, arrow_types[kind]) for name, _, kind in columns])
+
+    written = 0
+    with pq.ParquetWriter(str(path), schema, compression='zstd') as writer:
+        for batch in iter_record_batches(queryset, columns, batch_size):
+            arrays = [
+                pa.array([row[i] for row in batch], type=schema.field(i).type)
+                for i in range(len(columns))
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            written += len(batch)
+            if on_batch:
+                on_batch(written)
+    return written
+
+
+# ---------- Incremental (delta) exports ----------
+
+# kind -> indexed timestamp column that advances whenever a row is added or changed
+DELTA_WATERMARKS = {
+    'jobs': 'updated_at',
+    'applications': 'last_updated',
+    'users': 'date_joined',
+}
+
+
+def delta_queryset(kind, since, until):
+    """Rows of `kind` added or changed in the window (since, until]; since=None means everything"""
+    _, _, build_queryset = EXPORT_KINDS[kind]
+    field = DELTA_WATERMARKS[kind]
+    queryset = build_queryset().filter(**{f'{field}__lte': until})
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gt': since})
+    return queryset
+
+
+def iter_delta_lines(kind, since, until, batch_size=5000):
+    """
+    Yield gzip-free JSON Lines for a delta export: one {"op": "upsert", ...} line
+    per new or changed row, then one {"op": "delete", "id": ...} line per tombstone.
+    """
+    columns = COLUMNAR_SPECS[kind]
+    names = [name for name, _, _ in columns]
+    for batch in iter_record_batches(delta_queryset(kind, since, until), columns, batch_size):
+        yield ''.join(
+            json.dumps({'op': 'upsert', **dict(zip(names, row))}, default=_json_default, separators=(',', ':')) + '\n'
+            for row in batch
+        )
+
+    tombstones = DeletionTombstone.objects.filter(kind=kind, deleted_at__lte=until)
+    if since is not None:
+        tombstones = tombstones.filter(deleted_at__gt=since)
+    for object_id in tombstones.values_list('object_id', flat=True).iterator(chunk_size=batch_size):
+        yield json.dumps({'op': 'delete', 'id': object_id}) + '\n'
+
+
+def export_jobs_csv(queryset=None, include_stats=True):
+    """Export jobs to CSV"""
+    if queryset is None:
+        queryset = jobs_export_queryset()
+    if include_stats:
+        queryset = with_job_stats(queryset)
+
+    response = _csv_response('jobs_export')
+    writer = csv.writer(response)
+    writer.writerow(JOB_HEADER)
+    writer.writerows(job_rows(queryset, include_stats))
     return response
 
 
-def export_usage_stats_csv():
-    """Export usage statistics to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="usage_stats_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+def export_applications_csv(queryset=None):
+    """Export job applications to CSV"""
+    if queryset is None:
+        queryset = applications_export_queryset()
+
+    response = _csv_response('applications_export')
+    writer = csv.writer(response)
+    writer.writerow(APPLICATION_HEADER)
+    writer.writerows(application_rows(queryset))
+    return response
+
+
+def export_users_csv(queryset=None):
+    """Export users to CSV"""
+    if queryset is None:
+        queryset = users_export_queryset()
+    queryset = with_user_stats(queryset)
+
+    response = _csv_response('users_export')
+    writer = csv.writer(response)
+    writer.writerow(USER_HEADER)
+    writer.writerows(user_rows(queryset))
+    return response
+
+
+def export_profiles_csv(queryset=None):
+    """Export profiles to CSV"""
+    if queryset is None:
+        queryset = profiles_export_queryset()
+
+    response = _csv_response('profiles_export')
+    writer = csv.writer(response)
+    writer.writerow(PROFILE_HEADER)
+    writer.writerows(profile_rows(queryset))
+    return response
+
+
+def export_usage_stats_csv(rollups=None, start=None, end=None):
+    """Export usage statistics to CSV, with activity totals summed from daily rollups"""
+    response = _csv_response('usage_stats')
     
     writer = csv.writer(response)
     
@@ -260,6 +542,29 @@ def export_usage_stats_csv():
     for item in jobs_by_work_type:
         work_type_display = dict(Job.WORK_TYPE_CHOICES).get(item['work_type'], item['work_type'])
         writer.writerow([work_type_display, item['count']])
+
+    if rollups is not None:
+        totals = activity_totals(rollups)
+        writer.writerow(['', ''])
+        writer.writerow([f'Activity {start} to {end}' if start else 'Activity', ''])
+        writer.writerow(['Jobs Posted', totals['jobs_posted']])
+        for status_code, status_name in JobApplication.STATUS_CHOICES:
+            writer.writerow([f'Applications Moved to {status_name}', totals[f'applications_{status_code}']])
+        writer.writerow(['Seeker Signups', totals['signups_seeker']])
+        writer.writerow(['Recruiter Signups', totals['signups_recruiter']])
+        writer.writerow(['Messages Sent', totals['messages_sent']])
     
     return response
 
+
+def export_daily_activity_csv(rollups):
+    """Export pre-aggregated daily activity rows to CSV"""
+    response = _csv_response('daily_activity')
+
+    writer = csv.writer(response)
+    writer.writerow(['Day'] + [name.replace('_', ' ').title() for name in DAILY_METRIC_FIELDS])
+    for row in rollups.order_by('day').values_list('day', *DAILY_METRIC_FIELDS):
+        writer.writerow([row[0].isoformat(), *row[1:]])
+
+    return response
+
@@ -1,5 +1,7 @@
 from django import forms
-from .models import Job, JobApplication, SavedCandidateSearch
+from .models import Job, JobApplication, SavedCandidateSearch, ExportJob
+from .export_utils import pyarrow_available
+from .geocode import geocode, normalize_place
 
 
 class JobSearchForm(forms.Form):
@@ -98,6 +100,20 @@ class JobSearchForm(forms.Form):
         label='Requires Visa Sponsorship'
     )
 
+    # Ordering
+    SORT_CHOICES = [
+        ('', 'Default'),
+        ('distance', 'Nearest first'),
+        ('newest', 'Newest first'),
+    ]
+    sort = forms.ChoiceField(
+        choices=SORT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Sort By',
+        help_text='Nearest first uses the selected address, or the location typed above.',
+    )
+
 
 class JobApplicationForm(forms.ModelForm):
     """Form for applying to a job"""
@@ -170,6 +186,21 @@ class JobPostForm(forms.ModelForm):
             'application_deadline': 'Leave blank for no deadline',
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        # Prefer server-side coordinates for known places over whatever the browser posted
+        location = cleaned_data.get('location')
+        moved = normalize_place(location) != normalize_place(self.initial.get('location'))
+        if location and (moved or cleaned_data.get('latitude') is None):
+            result = geocode(location)
+            if result is not None:
+                cleaned_data['latitude'] = result.lat
+                cleaned_data['longitude'] = result.lon
+            elif moved and 'latitude' not in self.changed_data:
+                # The posted coordinates still belong to the previous location
+                cleaned_data['latitude'] = cleaned_data['longitude'] = None
+        return cleaned_data
+
 
 class ApplicationStatusUpdateForm(forms.ModelForm):
     """Form for recruiters to update application status"""
@@ -198,7 +229,7 @@ class SavedCandidateSearchForm(forms.ModelForm):
 
     class Meta:
         model = SavedCandidateSearch
-        fields = ['name', 'search_query', 'location', 'skills', 'is_active']
+        fields = ['name', 'search_query', 'location', 'radius_miles', 'skills', 'is_active']
         widgets = {
             'name': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -212,6 +243,12 @@ class SavedCandidateSearchForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'City, State, or "Remote"'
             }),
+            'radius_miles': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': 1,
+                'max': 500,
+                'placeholder': 'e.g., 25'
+            }),
             'skills': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 3,
@@ -223,6 +260,7 @@ class SavedCandidateSearchForm(forms.ModelForm):
             'name': 'Search Name',
             'search_query': 'Keywords',
             'location': 'Location',
+            'radius_miles': 'Within (miles)',
             'skills': 'Required Skills',
             'is_active': 'Active (receive notifications)',
         }
@@ -230,6 +268,53 @@ class SavedCandidateSearchForm(forms.ModelForm):
             'name': 'Give this search a memorable name',
             'search_query': 'Search in candidate names, headlines, and bios',
             'location': 'Filter candidates by location',
+            'radius_miles': 'Leave blank to match the location text instead of distance',
             'skills': 'Comma-separated list of required skills',
             'is_active': 'If checked, you will receive email notifications when new candidates match this search',
         }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        location = cleaned_data.get('location')
+        radius = cleaned_data.get('radius_miles')
+        if radius is None:
+            self.instance.latitude = self.instance.longitude = None
+            return cleaned_data
+        if not location:
+            self.add_error('location', 'Enter a location to search within a radius.')
+            return cleaned_data
+        result = geocode(location)
+        if result is None:
+            self.add_error('location', f'Could not find "{location}" on the map. Try "City, ST".')
+            return cleaned_data
+        self.instance.latitude = result.lat
+        self.instance.longitude = result.lon
+        return cleaned_data
+
+
+class ExportJobForm(forms.ModelForm):
+    """Form for queueing a background CSV export from the reporting dashboard"""
+
+    class Meta:
+        model = ExportJob
+        fields = ['kind', 'format', 'filter_value', 'compress']
+        widgets = {
+            'kind': forms.Select(attrs={'class': 'form-select form-select-sm'}),
+            'format': forms.Select(attrs={'class': 'form-select form-select-sm'}),
+            'filter_value': forms.TextInput(attrs={
+                'class': 'form-control form-control-sm',
+                'placeholder': 'Optional filter, e.g. true, interview, seeker'
+            }),
+            'compress': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        }
+        labels = {
+            'kind': 'Export',
+            'filter_value': 'Filter',
+            'compress': 'Gzip',
+        }
+
+    def clean_format(self):
+        export_format = self.cleaned_data['format']
+        if export_format == 'parquet' and not pyarrow_available():
+            raise forms.ValidationError('Parquet exports require pyarrow to be installed on the server.')
+        return export_format
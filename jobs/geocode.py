@@ -0,0 +1,276 @@
+"""
+Server-side geocoding backed by the GeocodedPlace cache table.
+
+Place strings are normalized ("San Francisco, California, USA" and
+"san francisco, ca" are the same key) and looked up locally. The table is
+seeded from the bundled offline gazetteer (jobs/data/gazetteer.csv) by a data
+migration (and the load_gazetteer command), so common lookups never leave the
+database.
+
+Lookups are cache-only by default, since they run inside web requests
+(forms, job and candidate search) and a remote call there would block for
+its timeout and rate limit. Misses are resolved offline by the
+backfill_coordinates command (or any worker passing `remote=True`), which
+sends them to a pluggable geocoder (any callable taking a place string and
+returning a GeocodeResult or None) selected by the GEOCODER setting. Places
+it cannot resolve are remembered in the cache for a day so repeated runs do
+not call it again.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from .models import GeocodedPlace
+
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+
+# How long a place the geocoder could not resolve is not asked for again
+MISS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Smallest prefix the autocomplete endpoint will search for
+MIN_PREFIX_LENGTH = 2
+
+US_STATES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca',
+    'colorado': 'co', 'connecticut': 'ct', 'delaware': 'de', 'district of columbia': 'dc',
+    'florida': 'fl', 'georgia': 'ga', 'hawaii': 'hi', 'idaho': 'id', 'illinois': 'il',
+    'indiana': 'in', 'iowa': 'ia', 'kansas': 'ks', 'kentucky': 'ky', 'louisiana': 'la',
+    'maine': 'me', 'maryland': 'md', 'massachusetts': 'ma', 'michigan': 'mi', 'minnesota': 'mn',
+    'mississippi': 'ms', 'missouri': 'mo', 'montana': 'mt', 'nebraska': 'ne', 'nevada': 'nv',
+    'new hampshire': 'nh', 'new jersey': 'nj', 'new mexico': 'nm', 'new york': 'ny',
+    'north carolina': 'nc', 'north dakota': 'nd', 'ohio': 'oh', 'oklahoma': 'ok', 'oregon': 'or',
+    'pennsylvania': 'pa', 'rhode island': 'ri', 'south carolina': 'sc', 'south dakota': 'sd',
+    'tennessee': 'tn', 'texas': 'tx', 'utah': 'ut', 'vermont': 'vt', 'virginia': 'va',
+    'washington': 'wa', 'west virginia': 'wv', 'wisconsin': 'wi', 'wyoming': 'wy',
+}
+
+COUNTRY_SUFFIXES = {'us', 'usa', 'u s', 'u s a', 'united states', 'united states of america'}
+
+# Locations that intentionally have no coordinates
+NON_GEOGRAPHIC = {'remote', 'anywhere', 'worldwide', 'n a', 'tbd'}
+
+_PUNCTUATION = re.compile(r"[^\w\s,-]")
+
+
+@dataclass
+class GeocodeResult:
+    label: str
+    lat: float
+    lon: float
+
+
+def normalize_place(text: str | None) -> str:
+    """Return the cache key for a free-form place string"""
+    if not text:
+        return ''
+    cleaned = _PUNCTUATION.sub(' ', text.lower()).replace('-', ' ')
+    parts = [' '.join(part.split()) for part in cleaned.split(',')]
+    parts = [part for part in parts if part]
+    if len(parts) > 1 and parts[-1] in COUNTRY_SUFFIXES:
+        parts.pop()
+    if len(parts) > 1 and parts[-1] in US_STATES:
+        parts[-1] = US_STATES[parts[-1]]
+    return ', '.join(parts)
+
+
+def _result(place: GeocodedPlace) -> GeocodeResult:
+    return GeocodeResult(label=place.display_name, lat=place.latitude, lon=place.longitude)
+
+
+def _prefix_filter(key: str):
+    # A range scan instead of LIKE so every backend can use the unique index
+    return {'normalized_name__gte': key, 'normalized_name__lt': key + '\uffff'}
+
+
+def lookup_cached(text: str | None) -> Optional[GeocodeResult]:
+    """Exact cache hit for a place string, without any prefix fallback"""
+    key = normalize_place(text)
+    if not key or key in NON_GEOGRAPHIC:
+        return None
+    place = GeocodedPlace.objects.filter(normalized_name=key).first()
+    return _result(place) if place else None
+
+
+def geocode(
+    text: str | None,
+    resolver: Callable[[str], Optional[GeocodeResult]] | None = None,
+    remote: bool = False,
+) -> Optional[GeocodeResult]:
+    """
+    Resolve a place string to coordinates.
+
+    Tries an exact cache hit, then the most populous cached place starting with
+    the string (so "Atlanta" finds "Atlanta, GA"), then `resolver`. Without
+    one, misses return None unless `remote` is true, in which case the
+    configured geocoder is used; request code leaves it off and lets
+    backfill_coordinates fill in the coordinates later. Resolver results are
+    written back to the cache so each string is only resolved remotely once.
+    """
+    key = normalize_place(text)
+    if not key or key in NON_GEOGRAPHIC:
+        return None
+
+    place = GeocodedPlace.objects.filter(normalized_name=key).first()
+    if place is None and ',' not in key:
+        place = GeocodedPlace.objects.filter(**_prefix_filter(key + ',')).order_by('-population').first()
+    if place is not None:
+        return _result(place)
+
+    if resolver is None and remote:
+        resolver = default_geocoder()
+    if resolver is None:
+        return None
+    miss_key = f'geocode:miss:{hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()}'
+    if cache.get(miss_key):
+        return None
+    try:
+        result = resolver(text)
+    except Exception:
+        logger.warning('Geocoding %r failed', text, exc_info=True)
+        return None
+    if result is None:
+        cache.set(miss_key, True, MISS_CACHE_TIMEOUT)
+    else:
+        GeocodedPlace.objects.get_or_create(
+            normalized_name=key,
+            defaults={
+                'display_name': result.label or text.strip(),
+                'latitude': result.lat,
+                'longitude': result.lon,
+                'source': 'remote',
+            },
+        )
+    return result
+
+
+def autocomplete(prefix: str | None, limit: int = 8) -> List[GeocodeResult]:
+    """Cached places whose normalized name starts with the prefix, most populous first"""
+    key = normalize_place(prefix)
+    if len(key) < MIN_PREFIX_LENGTH:
+        return []
+    places = GeocodedPlace.objects.filter(**_prefix_filter(key)).order_by('-population', 'normalized_name')[:limit]
+    return [_result(place) for place in places]
+
+
+def gazetteer_places(path: Path = GAZETTEER_PATH) -> List[dict]:
+    """GeocodedPlace field values for each row of a gazetteer CSV (name, region, latitude, longitude, population)"""
+    places = []
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            display = f"{row['name']}, {row['region']}" if row['region'] else row['name']
+            places.append({
+                'normalized_name': normalize_place(display),
+                'display_name': display,
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'population': int(row['population'] or 0),
+                'source': 'gazetteer',
+            })
+    return places
+
+
+def load_gazetteer(path: Path = GAZETTEER_PATH) -> int:
+    """
+    Seed the cache from a gazetteer CSV. Existing entries are left alone.
+    Returns the number of places added.
+    """
+    places = [GeocodedPlace(**fields) for fields in gazetteer_places(path)]
+    before = GeocodedPlace.objects.count()
+    GeocodedPlace.objects.bulk_create(places, batch_size=500, ignore_conflicts=True)
+    return GeocodedPlace.objects.count() - before
+
+
+# ---------- Pluggable geocoders for cache misses ----------
+
+class FileGeocoder:
+    """
+    Resolve places from a local CSV with name, latitude, longitude columns.
+    Useful as an offline stand-in for a remote service (tests, air-gapped hosts).
+    """
+
+    def __init__(self, path):
+        self.places = {}
+        with open(path, newline='', encoding='utf-8') as handle:
+            for row in csv.DictReader(handle):
+                self.places[normalize_place(row['name'])] = GeocodeResult(
+                    label=row['name'], lat=float(row['latitude']), lon=float(row['longitude']),
+                )
+
+    def __call__(self, text):
+        return self.places.get(normalize_place(text))
+
+
+class NominatimGeocoder:
+    """Resolve places with the public Nominatim API, respecting its 1 request/second policy"""
+
+    url = 'https://nominatim.openstreetmap.org/search'
+
+    def __init__(self, user_agent='jobboard-geocoder', min_interval=1.0, timeout=10):
+        self.user_agent = user_agent
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self._last_request = 0.0
+        # Serializes callers sharing the instance so the interval holds across threads
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        query = urllib.parse.urlencode({'q': text, 'format': 'jsonv2', 'limit': 1})
+        request = urllib.request.Request(f'{self.url}?{query}', headers={'User-Agent': self.user_agent})
+        with self._lock:
+            wait = self.min_interval - (time.monotonic() - self._last_request)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    data = json.load(response)
+            finally:
+                self._last_request = time.monotonic()
+        if not data:
+            return None
+        return GeocodeResult(label=data[0]['display_name'], lat=float(data[0]['lat']), lon=float(data[0]['lon']))
+
+
+def get_geocoder(name=None, **kwargs):
+    """
+    Build a geocoder: 'file' or 'nominatim', a dotted path to a callable or
+    class, or None for cache-only lookups. Defaults to the GEOCODER setting.
+    """
+    name = name if name is not None else getattr(settings, 'GEOCODER', None)
+    if not name:
+        return None
+    if name == 'file':
+        return FileGeocoder(kwargs['path'])
+    if name == 'nominatim':
+        return NominatimGeocoder(**kwargs)
+    return import_string(name)(**kwargs)
+
+
+_default_geocoder = (None, None)
+
+
+def default_geocoder():
+    """The geocoder named by the GEOCODER setting, built once per process so its rate limiting holds"""
+    global _default_geocoder
+    name = getattr(settings, 'GEOCODER', None)
+    options = getattr(settings, 'GEOCODER_OPTIONS', {})
+    if _default_geocoder[0] != (name, options):
+        _default_geocoder = ((name, options), get_geocoder(name, **options) if name else None)
+    return _default_geocoder[1]
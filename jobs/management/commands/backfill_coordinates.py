@@ -0,0 +1,139 @@
+"""
+Management command to fill in latitude/longitude for Jobs and Profiles that
+have a location string but no coordinates.
+
+Each distinct normalized location is resolved once per run (local cache
+first, then the configured geocoder) and rows are written with bulk_update
+in batches. bulk_update sends no post_save, so the map tiles and cached
+objects the signal receivers would have dropped are invalidated once each
+batch commits. Progress is checkpointed, so an interrupted run resumes where
+it stopped; use --restart to revisit rows that could not be resolved before.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import Profile
+from jobs.geocode import geocode, get_geocoder, normalize_place
+from jobs.map_tiles import invalidate_point
+from jobs.models import Job, RollupCheckpoint
+from jobs.object_cache import invalidate_job, invalidate_profile_bundle
+
+
+MODELS = {
+    'jobs': Job,
+    'profiles': Profile,
+}
+
+
+def invalidate_cached(obj):
+    """Drop what the post_save receivers in jobs.signals would have for a backfilled row"""
+    if isinstance(obj, Job):
+        invalidate_point(obj.latitude, obj.longitude)
+        invalidate_job(obj.pk)
+    else:
+        invalidate_profile_bundle(obj.user_id)
+
+
+class Command(BaseCommand):
+    help = 'Geocode Jobs and Profiles that have a location but no coordinates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=['jobs', 'profiles', 'all'],
+            default='all',
+            help='Which rows to backfill',
+        )
+        parser.add_argument(
+            '--geocoder',
+            help="Geocoder for cache misses: 'file', 'nominatim' or a dotted path (default: GEOCODER setting)",
+        )
+        parser.add_argument(
+            '--file',
+            help="CSV of name, latitude, longitude used by --geocoder file",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk_update',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the saved checkpoint and scan all rows again',
+        )
+
+    def handle(self, *args, **options):
+        if options['geocoder'] == 'file' and not options['file']:
+            raise CommandError('--geocoder file requires --file')
+        kwargs = {'path': options['file']} if options['geocoder'] == 'file' else {}
+        resolver = get_geocoder(options['geocoder'], **kwargs)
+
+        names = list(MODELS) if options['model'] == 'all' else [options['model']]
+        for name in names:
+            self.backfill(name, MODELS[name], resolver, options['batch_size'], options['restart'])
+
+    def backfill(self, name, model, resolver, batch_size, restart):
+        checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=f'backfill_coordinates:{name}')
+        if restart:
+            checkpoint.position = 0
+            checkpoint.save(update_fields=['position', 'updated_at'])
+
+        pending = (
+            model.objects.filter(latitude__isnull=True, pk__gt=checkpoint.position)
+            .exclude(location__isnull=True).exclude(location='')
+            .order_by('pk')
+        )
+        self.stdout.write(f'\n{name}: {pending.count()} row(s) to check (resuming after id {checkpoint.position})')
+
+        resolved = {}  # normalized location -> GeocodeResult or None
+        updated = scanned = 0
+        started = time.monotonic()
+
+        fields = ['pk', 'location'] + (['user_id'] if model is Profile else [])
+        while True:
+            batch = list(pending.filter(pk__gt=checkpoint.position).only(*fields)[:batch_size])
+            if not batch:
+                break
+
+            changed = []
+            now = timezone.now()
+            for obj in batch:
+                key = normalize_place(obj.location)
+                if key not in resolved:
+                    try:
+                        resolved[key] = geocode(obj.location, resolver=resolver)
+                    except Exception as exc:
+                        self.stdout.write(self.style.WARNING(f'  ⚠ Lookup failed for "{obj.location}": {exc}'))
+                        resolved[key] = None
+                result = resolved[key]
+                if result is not None:
+                    obj.latitude, obj.longitude = result.lat, result.lon
+                    # bulk_update skips auto_now; bump it so delta exports and
+                    # incremental matching see the new coordinates
+                    obj.updated_at = now
+                    changed.append(obj)
+
+            with transaction.atomic():
+                model.objects.bulk_update(changed, ['latitude', 'longitude', 'updated_at'])
+                checkpoint.position = batch[-1].pk
+                checkpoint.save(update_fields=['position', 'updated_at'])
+            for obj in changed:
+                invalidate_cached(obj)
+
+            scanned += len(batch)
+            updated += len(changed)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'  {scanned} scanned, {updated} updated, {len(resolved)} distinct location(s) '
+                f'({scanned / elapsed if elapsed else scanned:.0f} rows/s)'
+            )
+
+        unresolved = sum(1 for result in resolved.values() if result is None)
+        self.stdout.write(self.style.SUCCESS(
+            f'{name}: updated {updated} of {scanned} row(s); '
+            f'{len(resolved) - unresolved} location(s) resolved, {unresolved} unresolved'
+        ))
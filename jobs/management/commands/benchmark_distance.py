@@ -0,0 +1,56 @@
+"""
+Management command to benchmark the batched haversine kernel.
+
+Compares the per-row scalar formula (what the radius search used to do) with
+haversine_miles_many over the same random points, using NumPy when it is
+installed and always reporting the pure-Python array fallback as well.
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from jobs.distance import haversine_miles, haversine_miles_many, numpy_available
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Time scalar vs batched haversine distance calculations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=100000, help='Number of coordinates (default: 100000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per kernel; the best time is reported')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        count = options['points']
+        lats = [rng.uniform(25.0, 49.0) for _ in range(count)]
+        lons = [rng.uniform(-124.0, -67.0) for _ in range(count)]
+        origin = (33.7756, -84.3963)
+        repeat = options['repeat']
+
+        kernels = [
+            ('scalar loop', lambda: [haversine_miles(origin[0], origin[1], la, lo) for la, lo in zip(lats, lons)]),
+            ('array fallback', lambda: haversine_miles_many(origin[0], origin[1], lats, lons, use_numpy=False)),
+        ]
+        if numpy_available():
+            kernels.append(('numpy', lambda: haversine_miles_many(origin[0], origin[1], lats, lons, use_numpy=True)))
+        else:
+            self.stdout.write(self.style.WARNING('NumPy is not installed; only the fallback kernel is timed'))
+
+        baseline = None
+        self.stdout.write(f'{count} points, best of {repeat}:')
+        for name, func in kernels:
+            elapsed = _best_of(repeat, func)
+            baseline = baseline or elapsed
+            self.stdout.write(f'  {name:<15} {elapsed * 1000:9.1f} ms  {baseline / elapsed:5.1f}x')
+        self.stdout.write(self.style.SUCCESS('Done'))
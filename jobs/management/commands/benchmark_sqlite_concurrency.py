@@ -0,0 +1,39 @@
+"""
+Management command comparing SQLite throughput under concurrent readers and
+writers with the stock backend and the tuned jobboard.sqlite_backend.
+
+Runs against scratch database files, never the configured database:
+
+    python manage.py benchmark_sqlite_concurrency --readers 8 --writers 4 --duration 10
+"""
+from django.core.management.base import BaseCommand
+from jobs.concurrency_benchmark import run_concurrency_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark SQLite with parallel readers and writers, stock vs tuned settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Reader threads (default: 4)')
+        parser.add_argument('--writers', type=int, default=2, help='Writer threads (default: 2)')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile (default: 5)')
+        parser.add_argument('--rows', type=int, default=10000, help='Rows in the scratch table (default: 10000)')
+        parser.add_argument('--only', nargs='+', choices=['baseline', 'tuned'], help='Run only these profiles')
+
+    def handle(self, *args, **options):
+        results = run_concurrency_benchmark(
+            options['readers'], options['writers'], options['duration'], options['rows'], options['only'],
+            progress=lambda message: self.stdout.write(f'  {message}'),
+        )
+        self.stdout.write(f'{"profile":<10} {"kind":<7} {"ops/s":>10} {"errors":>7} {"median ms":>10} {"p95 ms":>9} {"max ms":>9}')
+        for name, result in results.items():
+            for kind in ('reads', 'writes'):
+                row = result[kind]
+                self.stdout.write(
+                    f'{name:<10} {kind:<7} {row["per_second"]:>10.1f} {row["errors"]:>7} '
+                    f'{_ms(row["median_ms"]):>10} {_ms(row["p95_ms"]):>9} {_ms(row["max_ms"]):>9}'
+                )
+
+
+def _ms(value):
+    return '-' if value is None else f'{value:.2f}'
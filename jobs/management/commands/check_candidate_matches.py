@@ -3,12 +3,24 @@ Management command to check for new candidate matches for saved searches
 and send email notifications to recruiters.
 
 Run this command periodically (e.g., via cron) to check for new matches.
+Candidates are loaded and their skills parsed once per run; every active
+search is then matched against that shared index (optionally across a process
+pool with --workers) and new matches are written in bulk.
+
+Runs are incremental: each search only considers profiles updated since its
+last_checked, which is cleared when the search criteria change. --full forces
+a rescan of every profile.
+
+Recruiters receive one digest email covering all of their searches once the
+MATCH_DIGEST_MINUTES window has passed (see send_match_digests).
 """
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from jobs.models import SavedCandidateSearch, CandidateSearchMatch
-from jobs.search_utils import find_new_matches_for_search, create_matches_for_search
-from jobs.signals import send_match_notification_email
+from jobs.models import SavedCandidateSearch
+from jobs.notifications import send_match_digests
+from jobs.search_utils import (
+    build_candidate_index, incremental_since, match_saved_searches, new_matches, record_new_matches,
+)
 
 
 class Command(BaseCommand):
@@ -20,74 +32,65 @@ class Command(BaseCommand):
             action='store_true',
             help='Run without sending emails or creating matches',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Match searches in this many worker processes (default: 1, in-process)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Saved searches per worker task (default: 50)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-evaluate every profile instead of only those changed since the last check',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1')
         
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No emails will be sent, no matches will be created'))
 
         # Get all active saved searches
-        active_searches = SavedCandidateSearch.objects.filter(is_active=True)
+        active_searches = list(SavedCandidateSearch.objects.filter(is_active=True))
+
+        incremental = not options['full']
+        since = incremental_since(active_searches) if incremental else None
+        started = timezone.now()
+        index = build_candidate_index(since=since)
+        scope = f'changed since {since:%Y-%m-%d %H:%M}' if since else 'in total'
+        self.stdout.write(f'Indexed {len(index)} candidate(s) {scope} for {len(active_searches)} active search(es)')
+        results = match_saved_searches(
+            active_searches, index, workers=options['workers'], batch_size=options['batch_size'],
+            incremental=incremental,
+        )
+        created = new_matches(results) if dry_run else record_new_matches(results, checked_at=started)
         
         total_new_matches = 0
         total_notifications_sent = 0
 
         for search in active_searches:
-            self.stdout.write(f'\nChecking search: "{search.name}" (ID: {search.pk})')
-            
-            # Find new matches
-            new_candidates = find_new_matches_for_search(search)
-            
+            new_candidates = created.get(search.pk)
             if not new_candidates:
-                self.stdout.write(f'  No new matches found')
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'\nChecking search: "{search.name}" (ID: {search.pk})')
+                    self.stdout.write(f'  No new matches found')
                 continue
 
+            self.stdout.write(f'\nChecking search: "{search.name}" (ID: {search.pk})')
             self.stdout.write(f'  Found {len(new_candidates)} new match(es)')
             total_new_matches += len(new_candidates)
 
-            if not dry_run:
-                # Create match records
-                matches_created = create_matches_for_search(search, new_candidates)
-                self.stdout.write(f'  Created {matches_created} match record(s)')
-
-                # Get the newly created matches that need notification
-                new_matches = CandidateSearchMatch.objects.filter(
-                    saved_search=search,
-                    notified=False
-                ).select_related('candidate__user')
-
-                if new_matches.exists():
-                    # Send email notification
-                    recruiter = search.recruiter
-                    recruiter_email = recruiter.email or recruiter.user.email
-                    
-                    if recruiter_email:
-                        try:
-                            send_match_notification_email(
-                                recruiter_email,
-                                recruiter.user.username,
-                                search,
-                                new_matches
-                            )
-                            
-                            # Mark matches as notified
-                            new_matches.update(notified=True, notified_date=timezone.now())
-                            search.last_notified = timezone.now()
-                            search.save(update_fields=['last_notified'])
-                            
-                            total_notifications_sent += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(f'  ✓ Sent notification email to {recruiter_email}')
-                            )
-                        except Exception as e:
-                            self.stdout.write(
-                                self.style.ERROR(f'  ✗ Failed to send email: {str(e)}')
-                            )
-                    else:
-                        self.stdout.write(
-                            self.style.WARNING(f'  ⚠ No email address for recruiter {recruiter.user.username}')
-                        )
+        if not dry_run:
+            # One digest per recruiter whose window has passed, over one connection
+            total_notifications_sent = send_match_digests()
 
         self.stdout.write('\n' + '='*50)
         self.stdout.write(
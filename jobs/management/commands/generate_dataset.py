@@ -0,0 +1,59 @@
+"""
+Management command to fill the database with a synthetic dataset.
+
+Rows are written with bulk_create in batches (see jobs.dataset), so
+production-sized datasets for load tests and benchmarks take minutes rather
+than hours:
+
+    python manage.py generate_dataset --jobs 200000 --seekers 500000 --applications 5000000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from jobs.dataset import DatasetGenerator, clear_generated
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic recruiters, seekers, jobs, applications and conversations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recruiters', type=int, default=None,
+                            help='Recruiter accounts (default: one per 50 jobs, at least 1)')
+        parser.add_argument('--seekers', type=int, default=1000)
+        parser.add_argument('--jobs', type=int, default=500)
+        parser.add_argument('--applications', type=int, default=5000)
+        parser.add_argument('--conversations', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create (default: 5000)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = clear_generated()
+            self.stdout.write(f'Deleted {deleted} generated rows')
+
+        recruiters = options['recruiters']
+        if recruiters is None:
+            recruiters = max(1, options['jobs'] // 50)
+
+        generator = DatasetGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=lambda message: self.stdout.write(f'  {message}'),
+        )
+        started = time.perf_counter()
+        with transaction.atomic():
+            counts = generator.generate(
+                recruiters=recruiters,
+                seekers=options['seekers'],
+                jobs=options['jobs'],
+                applications=options['applications'],
+                conversations=options['conversations'],
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {counts.recruiters} recruiters, {counts.seekers} seekers, {counts.jobs} jobs, '
+            f'{counts.applications} applications, {counts.conversations} conversations '
+            f'({counts.messages} messages) in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,26 @@
+"""
+Management command to seed the local geocoding cache from the bundled
+offline gazetteer (or another CSV with the same columns).
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.geocode import GAZETTEER_PATH, load_gazetteer
+
+
+class Command(BaseCommand):
+    help = 'Load cities and states from the offline gazetteer into the geocoding cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=str(GAZETTEER_PATH),
+            help='CSV with name, region, latitude, longitude, population columns',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        if not path.exists():
+            raise CommandError(f'Gazetteer file not found: {path}')
+        added = load_gazetteer(path)
+        self.stdout.write(self.style.SUCCESS(f'Added {added} place(s) to the geocoding cache'))
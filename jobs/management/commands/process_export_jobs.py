@@ -0,0 +1,55 @@
+"""
+Management command that works through queued CSV export jobs.
+
+Run it as a long-lived worker process (or from cron with --once) so large
+exports never tie up web request workers.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from jobs.export_jobs import claim_next_export_job, run_export_job
+
+
+class Command(BaseCommand):
+    help = 'Process pending background CSV export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling for new jobs',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between queue checks when idle',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched per database round trip and between progress updates',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            export_job = claim_next_export_job()
+            if export_job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Running {export_job}')
+            started = time.monotonic()
+            run_export_job(export_job, chunk_size=options['chunk_size'])
+            elapsed = time.monotonic() - started
+
+            if export_job.status == 'done':
+                rate = export_job.rows_written / elapsed if elapsed else export_job.rows_written
+                self.stdout.write(self.style.SUCCESS(
+                    f'  ✓ Wrote {export_job.rows_written} row(s) in {elapsed:.1f}s ({rate:.0f} rows/s)'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'  ✗ Failed: {export_job.error_text}'))
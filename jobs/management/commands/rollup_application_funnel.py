@@ -0,0 +1,35 @@
+"""
+Management command to fold new application status events into the
+precomputed per-job and per-recruiter funnel aggregates.
+
+Run this command periodically (e.g., via cron); each run only processes
+events recorded since the previous run and at least
+FUNNEL_ROLLUP_LAG_SECONDS ago.
+"""
+from django.core.management.base import BaseCommand
+from jobs.reporting import rollup_application_funnel, reset_application_funnel
+
+
+class Command(BaseCommand):
+    help = 'Roll up application status events into funnel aggregates for reporting'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Discard existing aggregates and rebuild them from the full event log',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of events to process per transaction',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_application_funnel()
+            self.stdout.write(self.style.WARNING('Cleared existing funnel aggregates'))
+
+        processed = rollup_application_funnel(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} status event(s)'))
@@ -0,0 +1,41 @@
+"""
+Management command to materialize per-day activity counts for reporting.
+
+Run this command nightly (e.g., via cron); each run only computes the complete
+days that have not been rolled up yet.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.reporting import rollup_daily_activity
+
+
+def _parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Roll up jobs, applications, signups and messages into one row per day'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Recompute days from this date (YYYY-MM-DD) instead of resuming after the last rolled-up day',
+        )
+        parser.add_argument(
+            '--through',
+            help='Last day to roll up (YYYY-MM-DD); defaults to and is capped at yesterday (UTC)',
+        )
+
+    def handle(self, *args, **options):
+        since = _parse_day(options['since']) if options['since'] else None
+        through = _parse_day(options['through']) if options['through'] else None
+
+        days = rollup_daily_activity(through=through, since=since)
+        if not days:
+            self.stdout.write('Daily activity is already up to date')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {len(days)} day(s): {days[0]} to {days[-1]}'))
@@ -0,0 +1,43 @@
+"""
+Management command to time the key read paths and save the results as JSON.
+
+Run it against a generated dataset (see generate_dataset) and pass --compare
+with an earlier result file to see the change per case:
+
+    python manage.py run_benchmarks --compare benchmark_results/<earlier>.json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.benchmarks import CASES, compare, run_benchmarks, save_results
+
+
+class Command(BaseCommand):
+    help = 'Benchmark search, recommendation, export and messaging paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (default: 5)')
+        parser.add_argument('--only', nargs='+', choices=sorted(CASES), help='Run only these cases')
+        parser.add_argument('--output', help='Result file (default: BENCHMARK_RESULTS_DIR/<time>_<commit>.json)')
+        parser.add_argument('--compare', help='Earlier result file to compare against')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Could not read {options["compare"]}: {exc}')
+
+        document = run_benchmarks(
+            options['only'], options['repeat'], progress=lambda message: self.stdout.write(f'  {message}'),
+        )
+        path = save_results(document, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Saved results to {path}'))
+
+        if baseline:
+            self.stdout.write(f'Compared with {baseline.get("commit") or options["compare"]}:')
+            for name, before, after, ratio in compare(document, baseline):
+                change = f'{ratio:5.2f}x' if ratio is not None else '   n/a'
+                self.stdout.write(f'  {name:<36} {before:9.1f} ms -> {after:9.1f} ms  {change}')
@@ -0,0 +1,27 @@
+"""
+Management command to email recruiters their pending candidate-match digests.
+
+Run this every few minutes (e.g., via cron). A recruiter's digest is sent once
+their oldest unnotified match is MATCH_DIGEST_MINUTES old; all digests due in
+one run share a single mail connection.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from jobs.notifications import send_match_digests
+
+
+class Command(BaseCommand):
+    help = 'Send per-recruiter digest emails for new saved-search matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Send every pending digest now, ignoring the digest window',
+        )
+
+    def handle(self, *args, **options):
+        window = timedelta(0) if options['all'] else None
+        sent = send_match_digests(window=window)
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} digest email(s)'))
@@ -0,0 +1,118 @@
+"""
+Cached z/x/y tiles for the job map.
+
+Each tile is a small JSON document holding the job clusters (or, at high zoom,
+the individual jobs) inside one Web Mercator tile. Rendered tiles are kept in
+the cache backend together with an ETag, so panning the map is served from the
+cache and revalidated with If-None-Match. When a job is created, moved,
+edited, deactivated or deleted only the tiles covering its old and new
+positions are dropped.
+"""
+import hashlib
+import json
+from math import asinh, atan, degrees, floor, pi, radians, sinh, tan
+
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from .clustering import MAX_POINTS, MAX_ZOOM, POINT_ZOOM, grid_clusters, within_bbox
+from .metrics import record_cache_lookup
+from .models import Job
+
+
+TILE_CACHE_TIMEOUT = 60 * 60 * 24
+# Web Mercator cannot represent the poles; tiles stop at this latitude.
+MAX_LATITUDE = 85.0511287798
+
+
+def job_point(job, distance=None):
+    """JSON representation of a single job marker."""
+    return {
+        "id": job.id,
+        "title": job.title,
+        "company": job.company or "",
+        "location": job.location or "",
+        "lat": job.latitude,
+        "lon": job.longitude,
+        "distance_miles": round(distance, 2) if distance is not None else None,
+        "url": reverse("job_detail", args=[job.id]),
+    }
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_bbox(z, x, y):
+    """Return the (minLon, minLat, maxLon, maxLat) covered by a tile."""
+    n = 2 ** z
+
+    def lat(row):
+        return degrees(atan(sinh(pi * (1 - 2 * row / n))))
+
+    return (x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y))
+
+
+def tile_for_point(lat, lon, z):
+    """Return the (x, y) of the tile containing a coordinate at zoom ``z``."""
+    n = 2 ** z
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = floor((lon + 180.0) / 360.0 * n)
+    y = floor((1 - asinh(tan(radians(lat))) / pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_cache_key(z, x, y):
+    return f"jobs:map-tile:{z}:{x}:{y}"
+
+
+def render_tile(z, x, y):
+    """Build the payload for one tile from the database."""
+    bbox = tile_bbox(z, x, y)
+    qs = Job.objects.filter(is_active=True).exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+    if z >= POINT_ZOOM:
+        jobs = within_bbox(qs, bbox).only(
+            "id", "title", "company", "location", "latitude", "longitude"
+        ).order_by("-posted_date")[:MAX_POINTS]
+        return {"zoom": z, "clusters": [], "jobs": [job_point(job) for job in jobs]}
+    return {"zoom": z, "clusters": grid_clusters(qs, bbox, z), "jobs": []}
+
+
+def get_tile(z, x, y):
+    """
+    Return ``(body, etag)`` for a tile, rendering and caching it on a miss.
+    The body is the serialized JSON so cache hits skip re-encoding.
+    """
+    key = tile_cache_key(z, x, y)
+    cached = cache.get(key)
+    record_cache_lookup("map_tiles", cached is not None)
+    if cached is not None:
+        return cached
+    body = json.dumps(render_tile(z, x, y), separators=(",", ":")).encode()
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    cache.set(key, (body, etag), TILE_CACHE_TIMEOUT)
+    return body, etag
+
+
+def invalidate_point(lat, lon):
+    """
+    Drop the cached tile containing a coordinate at every zoom level, now and
+    again once the current transaction commits: a tile rendered in between
+    would still be built from the pre-commit rows.
+    """
+    if lat is None or lon is None:
+        return
+    keys = [tile_cache_key(z, *tile_for_point(lat, lon, z)) for z in range(MAX_ZOOM + 1)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_job_tiles(job):
+    """Invalidate the tiles at a job's previous and current positions."""
+    previous = getattr(job, "_loaded_coordinates", None)
+    current = (job.latitude, job.longitude)
+    if previous and previous != current:
+        invalidate_point(*previous)
+    invalidate_point(*current)
+    job._loaded_coordinates = current
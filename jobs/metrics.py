@@ -0,0 +1,379 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms live in a module-level registry and are
+rendered by the /metrics view. Nothing outside the standard library is
+needed. MetricsMiddleware records latency, status and query count for every
+request; the rest of the code records its own metrics through the objects
+defined at the bottom of this module.
+
+Several WSGI workers each keep their own registry. When METRICS_MULTIPROC_DIR
+is set, every process periodically writes its counters and histograms to a
+JSON file in that directory (one file per pid) and /metrics sums the files,
+so any worker can answer a scrape with site-wide totals. Gauges are computed
+from the database at scrape time and are never aggregated.
+"""
+import atexit
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+RESULT_COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 500)
+EXPORT_BUCKETS = (1, 5, 15, 60, 300, 900, 3600)
+
+# Seconds between snapshot writes in multiprocess mode
+FLUSH_INTERVAL = 5.0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        self.registry = registry if registry is not None else REGISTRY
+        self.registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+    def samples(self, values):
+        """Yield exposition lines for a {label values: value} mapping."""
+        for key, value in sorted(values.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.touched()
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """
+    A value computed when the registry is collected. `function` returns
+    either a number or a {label values tuple: number} mapping.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, function, labelnames=(), registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.function = function
+
+    def snapshot(self):
+        try:
+            result = self.function()
+        except Exception:
+            logger.exception('Could not compute gauge %s', self.name)
+            return {}
+        if isinstance(result, dict):
+            return {tuple(str(v) for v in key): value for key, value in result.items()}
+        return {(): result}
+
+
+class Histogram(Metric):
+    """Values are [count per bucket..., count above the last bucket, sum]."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(float(b) for b in buckets)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+        self.registry.touched()
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        counts = self._values.get(self._key(labels))
+        return sum(counts[:-1]) if counts else 0
+
+    def _copy(self, value):
+        return list(value)
+
+    def samples(self, values):
+        for key, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {_format_value(counts[-1])}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+
+    def reset(self):
+        for metric in self.metrics.values():
+            metric.reset()
+
+    def snapshot(self):
+        """{metric name: {label values: value}} for counters and histograms."""
+        return {
+            name: metric.snapshot()
+            for name, metric in self.metrics.items()
+            if not isinstance(metric, Gauge)
+        }
+
+    # Multiprocess mode
+
+    def write_snapshot(self, directory, pid=None):
+        """Atomically write this process's counters and histograms to directory."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        pid = pid or os.getpid()
+        data = {
+            name: [[list(key), value] for key, value in values.items()]
+            for name, values in self.snapshot().items()
+        }
+        tmp = directory / f'.metrics_{pid}.json.tmp'
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, directory / f'metrics_{pid}.json')
+
+    def read_snapshots(self, directory):
+        """Sum the snapshots of every process that has written to directory."""
+        totals = {name: {} for name in self.snapshot()}
+        for path in sorted(Path(directory).glob('metrics_*.json')):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                logger.warning('Skipping unreadable metrics snapshot %s', path)
+                continue
+            for name, samples in data.items():
+                if name not in totals:
+                    continue
+                for key, value in samples:
+                    key = tuple(key)
+                    current = totals[name].get(key)
+                    if current is None:
+                        totals[name][key] = value
+                    elif isinstance(value, list):
+                        totals[name][key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        totals[name][key] = current + value
+        return totals
+
+    def touched(self):
+        """Called after every update; writes a snapshot at most every FLUSH_INTERVAL."""
+        directory = multiprocess_dir()
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < FLUSH_INTERVAL or not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = now
+            self.write_snapshot(directory)
+        except OSError:
+            logger.exception('Could not write metrics snapshot to %s', directory)
+        finally:
+            self._flush_lock.release()
+
+    def flush(self):
+        directory = multiprocess_dir()
+        if directory:
+            self.write_snapshot(directory)
+
+    def render(self):
+        """The registry in the Prometheus text format, aggregated across processes if enabled."""
+        directory = multiprocess_dir()
+        if directory:
+            self.flush()
+            values = self.read_snapshots(directory)
+        else:
+            values = self.snapshot()
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            metric_values = metric.snapshot() if isinstance(metric, Gauge) else values.get(name, {})
+            lines.extend(metric.samples(metric_values))
+        return '\n'.join(lines) + '\n'
+
+
+def multiprocess_dir():
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+
+
+REGISTRY = Registry()
+
+# A forked child (a pool worker, or a preforked WSGI worker) starts from zero
+# so it never re-reports the parent's counts under its own pid.
+os.register_at_fork(after_in_child=REGISTRY.reset)
+atexit.register(lambda: multiprocess_dir() and REGISTRY.flush())
+
+
+class MetricsMiddleware:
+    """Record latency, status and query count per URL name for every request."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        # Unresolved paths share one label so 404 probes cannot explode cardinality
+        view = (match.view_name or match._func_path) if match else 'unmatched'
+        REQUEST_LATENCY.observe(elapsed, view=view, method=request.method)
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        REQUEST_QUERIES.observe(queries[0], view=view)
+        return response
+
+
+def _pending_match_notifications():
+    from .models import CandidateSearchMatch
+    return CandidateSearchMatch.objects.filter(notified=False, saved_search__is_active=True).count()
+
+
+def _outbox_messages():
+    from django.db.models import Count
+    from accounts.models import OutboxEmail
+    rows = OutboxEmail.objects.exclude(status='sent').values('status').annotate(n=Count('id'))
+    return {(row['status'],): row['n'] for row in rows}
+
+
+def _export_jobs():
+    from django.db.models import Count
+    from .models import ExportJob
+    rows = ExportJob.objects.filter(status__in=['pending', 'running']).values('status').annotate(n=Count('id'))
+    return {(row['status'],): row['n'] for row in rows}
+
+
+REQUEST_LATENCY = Histogram(
+    'jobboard_http_request_duration_seconds', 'Request latency by URL name.', ['view', 'method'],
+)
+REQUESTS = Counter('jobboard_http_requests_total', 'Requests by URL name and status.', ['view', 'method', 'status'])
+REQUEST_QUERIES = Histogram(
+    'jobboard_http_request_db_queries', 'Database queries per request by URL name.', ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+SEARCH_RESULTS = Histogram(
+    'jobboard_search_results', 'Result count of job and candidate searches.', ['search'],
+    buckets=RESULT_COUNT_BUCKETS,
+)
+CACHE_REQUESTS = Counter('jobboard_cache_requests_total', 'Cache lookups by cache and hit/miss.', ['cache', 'result'])
+EMAIL_SEND_LATENCY = Histogram(
+    'jobboard_email_send_seconds', 'Time to hand one outbox message to the delivery backend.', ['result'],
+)
+EXPORT_DURATION = Histogram(
+    'jobboard_export_duration_seconds', 'Background export run time.', ['kind', 'format', 'status'],
+    buckets=EXPORT_BUCKETS,
+)
+PENDING_MATCH_NOTIFICATIONS = Gauge(
+    'jobboard_match_notifications_pending', 'Saved-search matches waiting for a digest email.',
+    _pending_match_notifications,
+)
+OUTBOX_MESSAGES = Gauge(
+    'jobboard_email_outbox_messages', 'Undelivered outbox messages by status.', _outbox_messages, ['status'],
+)
+EXPORT_QUEUE = Gauge('jobboard_export_jobs', 'Queued and running background exports.', _export_jobs, ['status'])
+
+
+def record_cache_lookup(cache_name, hit):
+    CACHE_REQUESTS.inc(cache=cache_name, result='hit' if hit else 'miss')
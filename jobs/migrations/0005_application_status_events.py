@@ -0,0 +1,98 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_status_events(apps, schema_editor):
+    """Record the current status of existing applications as their first event"""
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    ApplicationStatusEvent = apps.get_model('jobs', 'ApplicationStatusEvent')
+
+    JobApplication.objects.filter(status_changed_at__isnull=True).update(status_changed_at=F('last_updated'))
+
+    batch = []
+    for app in JobApplication.objects.only('id', 'job_id', 'status', 'applied_date').iterator():
+        batch.append(ApplicationStatusEvent(
+            application_id=app.id,
+            job_id=app.job_id,
+            from_status='',
+            to_status=app.status,
+            changed_at=app.applied_date,
+        ))
+        if len(batch) >= 1000:
+            ApplicationStatusEvent.objects.bulk_create(batch)
+            batch = []
+    ApplicationStatusEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_add_profile_lat_lon'),
+        ('jobs', '0004_savedcandidatesearch_candidatesearchmatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobapplication',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, help_text='When the current status was entered', null=True),
+        ),
+        migrations.CreateModel(
+            name='ApplicationFunnelStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('applied', 'Applied'), ('review', 'Under Review'), ('interview', 'Interview'), ('offer', 'Offer'), ('closed', 'Closed')], max_length=20)),
+                ('entered_count', models.PositiveIntegerField(default=0, help_text='Applications that entered this stage')),
+                ('exited_count', models.PositiveIntegerField(default=0, help_text='Applications that moved on from this stage')),
+                ('total_seconds_in_stage', models.PositiveBigIntegerField(default=0, help_text='Summed time in stage for exited applications')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='funnel_stats', to='jobs.job')),
+                ('recruiter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='funnel_stats', to='accounts.profile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ApplicationStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('applied', 'Applied'), ('review', 'Under Review'), ('interview', 'Interview'), ('offer', 'Offer'), ('closed', 'Closed')], help_text='Blank for the initial application event', max_length=20)),
+                ('to_status', models.CharField(choices=[('applied', 'Applied'), ('review', 'Under Review'), ('interview', 'Interview'), ('offer', 'Offer'), ('closed', 'Closed')], max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('seconds_in_previous', models.PositiveIntegerField(blank=True, help_text='Time spent in from_status before this transition', null=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='jobs.jobapplication')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='jobs.job')),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='applicationfunnelstat',
+            constraint=models.UniqueConstraint(fields=('recruiter', 'job', 'stage'), name='unique_job_funnel_stage'),
+        ),
+        migrations.AddConstraint(
+            model_name='applicationfunnelstat',
+            constraint=models.UniqueConstraint(condition=models.Q(('job__isnull', True)), fields=('recruiter', 'stage'), name='unique_recruiter_funnel_stage'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationstatusevent',
+            index=models.Index(fields=['job', 'changed_at'], name='jobs_applic_job_id_6f94dd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationstatusevent',
+            index=models.Index(fields=['application', 'changed_at'], name='jobs_applic_applica_fd738a_idx'),
+        ),
+        migrations.RunPython(seed_status_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_application_status_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('jobs_posted', models.PositiveIntegerField(default=0)),
+                ('applications_applied', models.PositiveIntegerField(default=0)),
+                ('applications_review', models.PositiveIntegerField(default=0)),
+                ('applications_interview', models.PositiveIntegerField(default=0)),
+                ('applications_offer', models.PositiveIntegerField(default=0)),
+                ('applications_closed', models.PositiveIntegerField(default=0)),
+                ('signups_seeker', models.PositiveIntegerField(default=0)),
+                ('signups_recruiter', models.PositiveIntegerField(default=0)),
+                ('messages_sent', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+    ]
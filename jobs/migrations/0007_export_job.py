@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_daily_activity_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('jobs', 'Jobs'), ('applications', 'Applications'), ('users', 'Users'), ('profiles', 'Profiles')], max_length=20)),
+                ('filter_value', models.CharField(blank=True, help_text='Optional filter (is_active for jobs, status for applications, role for users/profiles)', max_length=50)),
+                ('compress', models.BooleanField(default=False, help_text='Write a gzip-compressed file')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('file_path', models.CharField(blank=True, help_text='Path relative to EXPORT_ROOT', max_length=500)),
+                ('error_text', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='jobs_export_status_dd839e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_export_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines (gzip)'), ('parquet', 'Parquet')], default='csv', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='compress',
+            field=models.BooleanField(default=False, help_text='Write a gzip-compressed file (CSV only; JSON Lines is always gzipped)'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:50
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_job_updated_at(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.update(updated_at=F('posted_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('jobs', '0008_export_job_format'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='posted_date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='DeletionTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('jobs', 'Job'), ('applications', 'Job Application'), ('users', 'User')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at'],
+                'indexes': [models.Index(fields=['kind', 'deleted_at'], name='jobs_deleti_kind_228957_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_job_updated_at, migrations.RunPython.noop),
+        # auth.User belongs to another app, so its watermark index is created here
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_date_joined_idx ON auth_user (date_joined)',
+            'DROP INDEX IF EXISTS auth_user_date_joined_idx',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_delta_export_watermarks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedPlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+                ('display_name', models.CharField(max_length=255)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('population', models.PositiveIntegerField(default=0, help_text='Used to rank autocomplete suggestions')),
+                ('source', models.CharField(choices=[('gazetteer', 'Bundled gazetteer'), ('remote', 'Remote geocoder'), ('manual', 'Manual')], default='gazetteer', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['normalized_name'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-19 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_geocoded_place'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savedcandidatesearch',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='savedcandidatesearch',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='savedcandidatesearch',
+            name='radius_miles',
+            field=models.PositiveIntegerField(blank=True, help_text='Match candidates within this distance of the location', null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def seed_gazetteer(apps, schema_editor):
+    """Load the bundled gazetteer so common places geocode on a fresh database"""
+    from jobs.geocode import gazetteer_places
+
+    GeocodedPlace = apps.get_model('jobs', 'GeocodedPlace')
+    GeocodedPlace.objects.using(schema_editor.connection.alias).bulk_create(
+        [GeocodedPlace(**fields) for fields in gazetteer_places()], batch_size=500, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_saved_search_radius'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_gazetteer, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-19 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_seed_gazetteer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
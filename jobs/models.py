@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
@@ -38,7 +38,8 @@ class Job(models.Model):
     experience_level = models.CharField(max_length=50, default='Mid-level', help_text="Entry, Mid-level, Senior, etc.")
 
     # Meta
-    posted_date = models.DateTimeField(default=timezone.now)
+    posted_date = models.DateTimeField(default=timezone.now, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     application_deadline = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
@@ -55,6 +56,14 @@ class Job(models.Model):
     def get_absolute_url(self):
         return reverse('job_detail', kwargs={'pk': self.pk})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'latitude' in field_names and 'longitude' in field_names:
+            # Remembered so map tiles at the previous position can be invalidated
+            instance._loaded_coordinates = (instance.latitude, instance.longitude)
+        return instance
+
     def get_required_skills_list(self):
         """Return skills as a list"""
         return [skill.strip() for skill in self.required_skills.split(',') if skill.strip()]
@@ -70,6 +79,45 @@ class Job(models.Model):
         return "Salary not specified"
 
 
+class JobApplicationQuerySet(models.QuerySet):
+    """QuerySet helpers for JobApplication"""
+
+    def update_status(self, status):
+        """
+        Bulk status change that also appends one ApplicationStatusEvent per
+        application actually moved. Returns the number of applications updated.
+        """
+        now = timezone.now()
+        rows = list(
+            self.exclude(status=status).values_list('id', 'job_id', 'status', 'status_changed_at')
+        )
+        if not rows:
+            return 0
+
+        with transaction.atomic():
+            JobApplication.objects.filter(id__in=[row[0] for row in rows]).update(
+                status=status, status_changed_at=now, last_updated=now,
+            )
+            ApplicationStatusEvent.objects.bulk_create([
+                ApplicationStatusEvent(
+                    application_id=app_id,
+                    job_id=job_id,
+                    from_status=from_status,
+                    to_status=status,
+                    changed_at=now,
+                    seconds_in_previous=_seconds_between(changed_at, now),
+                )
+                for app_id, job_id, from_status, changed_at in rows
+            ])
+        return len(rows)
+
+
+def _seconds_between(start, end):
+    if start is None:
+        return None
+    return max(int((end - start).total_seconds()), 0)
+
+
 class JobApplication(models.Model):
     """Job application with status tracking"""
 
@@ -92,11 +140,17 @@ class JobApplication(models.Model):
 
     # Timestamps
     applied_date = models.DateTimeField(default=timezone.now)
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
+    status_changed_at = models.DateTimeField(null=True, blank=True, help_text="When the current status was entered")
 
     # Notes from recruiter/company
     recruiter_notes = models.TextField(blank=True, help_text="Internal notes (not visible to applicant)")
 
+    objects = JobApplicationQuerySet.as_manager()
+
+    # Status as loaded from the database, used to detect transitions on save
+    _loaded_status = None
+
     class Meta:
         unique_together = ('job', 'applicant')  # Prevent duplicate applications
         ordering = ['-applied_date']
@@ -104,6 +158,41 @@ class JobApplication(models.Model):
     def __str__(self):
         return f"{self.applicant.username} -> {self.job.title} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save and append an ApplicationStatusEvent when the status changed"""
+        creating = self._state.adding
+        from_status = '' if creating else self._loaded_status
+        status_changed = creating or self.status != from_status
+        seconds_in_previous = None
+
+        if status_changed:
+            now = timezone.now()
+            seconds_in_previous = None if creating else _seconds_between(self.status_changed_at, now)
+            self.status_changed_at = now
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'status' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'status_changed_at'}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if status_changed:
+                ApplicationStatusEvent.objects.create(
+                    application=self,
+                    job_id=self.job_id,
+                    from_status=from_status or '',
+                    to_status=self.status,
+                    changed_at=self.status_changed_at,
+                    seconds_in_previous=seconds_in_previous,
+                )
+        self._loaded_status = self.status
+
     def get_absolute_url(self):
         return reverse('application_detail', kwargs={'pk': self.pk})
 
@@ -141,6 +230,10 @@ class SavedCandidateSearch(models.Model):
     # Search criteria
     search_query = models.CharField(max_length=255, blank=True, help_text="Name, headline, or bio keywords")
     location = models.CharField(max_length=255, blank=True, help_text="Location filter")
+    radius_miles = models.PositiveIntegerField(null=True, blank=True, help_text="Match candidates within this distance of the location")
+    # Center of the radius filter, geocoded from location when the search is saved
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     skills = models.TextField(blank=True, help_text="Comma-separated list of required skills")
     
     # Tracking
@@ -159,6 +252,33 @@ class SavedCandidateSearch(models.Model):
         """Return skills as a list"""
         return [skill.strip() for skill in self.skills.split(',') if skill.strip()]
 
+    @property
+    def has_radius_filter(self):
+        return self.radius_miles is not None and self.latitude is not None and self.longitude is not None
+
+    # Changing any of these invalidates earlier match results
+    CRITERIA_FIELDS = ('search_query', 'location', 'radius_miles', 'latitude', 'longitude', 'skills')
+
+    def criteria(self):
+        return tuple(getattr(self, name) for name in self.CRITERIA_FIELDS)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in field_names for name in cls.CRITERIA_FIELDS):
+            instance._loaded_criteria = instance.criteria()
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save, clearing last_checked when the criteria changed so the next run rescans everyone"""
+        loaded = getattr(self, '_loaded_criteria', None)
+        if loaded is not None and loaded != self.criteria():
+            self.last_checked = None
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'last_checked'}
+        super().save(*args, **kwargs)
+        self._loaded_criteria = self.criteria()
+
 
 class CandidateSearchMatch(models.Model):
     """Track which candidates match a saved search and whether they've been notified"""
@@ -173,4 +293,224 @@ class CandidateSearchMatch(models.Model):
         ordering = ['-first_matched_date']
         
     def __str__(self):
-        return f"{self.candidate.user.username} matches {self.saved_search.name}"
\ No newline at end of file
+        return f"{self.candidate.user.username} matches {self.saved_search.name}"
+
+
+class ApplicationStatusEvent(models.Model):
+    """Append-only log of JobApplication status transitions"""
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='status_events')
+    # Denormalized from the application so per-job rollups never need a join
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, blank=True, choices=JobApplication.STATUS_CHOICES,
+                                   help_text="Blank for the initial application event")
+    to_status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+    seconds_in_previous = models.PositiveIntegerField(null=True, blank=True,
+                                                      help_text="Time spent in from_status before this transition")
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            models.Index(fields=['job', 'changed_at']),
+            models.Index(fields=['application', 'changed_at']),
+        ]
+
+    def __str__(self):
+        return f"Application {self.application_id}: {self.from_status or '-'} -> {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("ApplicationStatusEvent rows are append-only")
+        super().save(*args, **kwargs)
+
+
+class ApplicationFunnelStat(models.Model):
+    """
+    Precomputed funnel aggregates per stage, maintained by the
+    rollup_application_funnel command. Rows with job=None hold recruiter-wide totals.
+    """
+    recruiter = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='funnel_stats')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True, related_name='funnel_stats')
+    stage = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    entered_count = models.PositiveIntegerField(default=0, help_text="Applications that entered this stage")
+    exited_count = models.PositiveIntegerField(default=0, help_text="Applications that moved on from this stage")
+    total_seconds_in_stage = models.PositiveBigIntegerField(default=0, help_text="Summed time in stage for exited applications")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recruiter', 'job', 'stage'], name='unique_job_funnel_stage'),
+            models.UniqueConstraint(fields=['recruiter', 'stage'], condition=models.Q(job__isnull=True),
+                                    name='unique_recruiter_funnel_stage'),
+        ]
+
+    def __str__(self):
+        scope = self.job.title if self.job_id else self.recruiter.user.username
+        return f"{scope}: {self.get_stage_display()} ({self.entered_count})"
+
+    def average_days_in_stage(self):
+        """Return mean days spent in this stage by applications that left it"""
+        if not self.exited_count:
+            return None
+        return round(self.total_seconds_in_stage / self.exited_count / 86400, 1)
+
+
+class RollupCheckpoint(models.Model):
+    """Watermark for incremental rollup jobs (e.g. the last event id processed)"""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class DailyActivityRollup(models.Model):
+    """
+    One row of site activity counts per UTC day, written by the
+    rollup_daily_activity command so reports never scan the raw tables.
+    """
+    day = models.DateField(unique=True)
+    jobs_posted = models.PositiveIntegerField(default=0)
+    # Applications entering each status that day (from ApplicationStatusEvent)
+    applications_applied = models.PositiveIntegerField(default=0)
+    applications_review = models.PositiveIntegerField(default=0)
+    applications_interview = models.PositiveIntegerField(default=0)
+    applications_offer = models.PositiveIntegerField(default=0)
+    applications_closed = models.PositiveIntegerField(default=0)
+    signups_seeker = models.PositiveIntegerField(default=0)
+    signups_recruiter = models.PositiveIntegerField(default=0)
+    messages_sent = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['day']
+
+    def __str__(self):
+        return f"Activity for {self.day}"
+
+    @property
+    def signups_total(self):
+        return self.signups_seeker + self.signups_recruiter
+
+
+class ExportJob(models.Model):
+    """A CSV export queued from the reporting dashboard and written to disk by a worker"""
+
+    KIND_CHOICES = [
+        ('jobs', 'Jobs'),
+        ('applications', 'Applications'),
+        ('users', 'Users'),
+        ('profiles', 'Profiles'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines (gzip)'),
+        ('parquet', 'Parquet'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    filter_value = models.CharField(max_length=50, blank=True,
+                                    help_text="Optional filter (is_active for jobs, status for applications, role for users/profiles)")
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    compress = models.BooleanField(default=False, help_text="Write a gzip-compressed file (CSV only; JSON Lines is always gzipped)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs')
+
+    # Progress
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    file_path = models.CharField(max_length=500, blank=True, help_text="Path relative to EXPORT_ROOT")
+    error_text = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Claim held by the worker running the export: refreshed with every
+    # progress update, and only the current holder may finish the job
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.get_status_display()})"
+
+    def progress_percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(int(100 * self.rows_written / self.total_rows), 100)
+
+    def download_filename(self):
+        name = f"{self.kind}_export_{self.created_at.strftime('%Y%m%d_%H%M%S')}"
+        if self.format == 'jsonl':
+            return name + '.jsonl.gz'
+        if self.format == 'parquet':
+            return name + '.parquet'
+        return name + ('.csv.gz' if self.compress else '.csv')
+
+    def content_type(self):
+        if self.format == 'parquet':
+            return 'application/vnd.apache.parquet'
+        if self.format == 'jsonl' or self.compress:
+            return 'application/gzip'
+        return 'text/csv'
+
+
+class DeletionTombstone(models.Model):
+    """Record of a deleted row so incremental exports can propagate deletions"""
+
+    KIND_CHOICES = [
+        ('jobs', 'Job'),
+        ('applications', 'Job Application'),
+        ('users', 'User'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [models.Index(fields=['kind', 'deleted_at'])]
+
+    def __str__(self):
+        return f"Deleted {self.get_kind_display()} {self.object_id}"
+
+
+class GeocodedPlace(models.Model):
+    """Local geocoding cache: normalized place string -> coordinates"""
+
+    SOURCE_CHOICES = [
+        ('gazetteer', 'Bundled gazetteer'),
+        ('remote', 'Remote geocoder'),
+        ('manual', 'Manual'),
+    ]
+
+    # Unique index doubles as the prefix-lookup index for autocomplete
+    normalized_name = models.CharField(max_length=255, unique=True)
+    display_name = models.CharField(max_length=255)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    population = models.PositiveIntegerField(default=0, help_text="Used to rank autocomplete suggestions")
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='gazetteer')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['normalized_name']
+
+    def __str__(self):
+        return f"{self.display_name} ({self.latitude:.4f}, {self.longitude:.4f})"
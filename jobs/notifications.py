@@ -0,0 +1,141 @@
+"""
+Digest emails for saved-search candidate matches.
+
+Unnotified CandidateSearchMatch rows are coalesced per recruiter across all of
+their saved searches. A recruiter's digest becomes due once their oldest
+pending match has waited MATCH_DIGEST_MINUTES, so profiles trickling in turn
+into one email instead of one per match. Every due digest is sent over a
+single SMTP connection.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import CandidateSearchMatch, SavedCandidateSearch
+from .search_utils import ID_CHUNK_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+# Candidates listed per saved search in one digest
+MAX_CANDIDATES_PER_SEARCH = 10
+
+
+def digest_window():
+    return timedelta(minutes=getattr(settings, 'MATCH_DIGEST_MINUTES', 30))
+
+
+def _site_url():
+    return getattr(settings, 'SITE_URL', 'http://localhost:8000')
+
+
+def pending_matches(recruiter_ids=None, until=None):
+    """Unnotified matches of active searches, optionally for some recruiters only."""
+    matches = CandidateSearchMatch.objects.filter(notified=False, saved_search__is_active=True)
+    if recruiter_ids is not None:
+        matches = matches.filter(saved_search__recruiter_id__in=recruiter_ids)
+    if until is not None:
+        matches = matches.filter(first_matched_date__lte=until)
+    return matches
+
+
+def due_recruiter_ids(now=None, window=None, recruiter_ids=None):
+    """Recruiters whose oldest pending match has waited at least the digest window."""
+    now = now or timezone.now()
+    window = digest_window() if window is None else window
+    rows = (
+        pending_matches(recruiter_ids, until=now)
+        .values('saved_search__recruiter_id')
+        .annotate(oldest=Min('first_matched_date'))
+        .filter(oldest__lte=now - window)
+    )
+    return [row['saved_search__recruiter_id'] for row in rows]
+
+
+def build_digest(recruiter, matches_by_search, to):
+    """
+    Render one digest EmailMessage. matches_by_search maps each
+    SavedCandidateSearch to its pending CandidateSearchMatch rows.
+    """
+    total = sum(len(matches) for matches in matches_by_search.values())
+    plural = 'match' if total == 1 else 'matches'
+    if len(matches_by_search) == 1:
+        search = next(iter(matches_by_search))
+        subject = f'{total} new candidate {plural} for "{search.name}"'
+    else:
+        subject = f'{total} new candidate {plural} across {len(matches_by_search)} saved searches'
+
+    site_url = _site_url()
+    lines = [f'Hello {recruiter.user.username},', '']
+    for search, matches in matches_by_search.items():
+        lines.append(f'Saved search "{search.name}": {len(matches)} new candidate(s)')
+        lines.append('')
+        for i, match in enumerate(matches[:MAX_CANDIDATES_PER_SEARCH], 1):
+            candidate = match.candidate
+            entry = f'{i}. {candidate.user.get_full_name() or candidate.user.username}'
+            if candidate.headline:
+                entry += f' - {candidate.headline}'
+            if candidate.location:
+                entry += f' ({candidate.location})'
+            lines.append(entry)
+            lines.append(f'   View profile: {site_url}/accounts/u/{candidate.user.username}/')
+        if len(matches) > MAX_CANDIDATES_PER_SEARCH:
+            lines.append(f'... and {len(matches) - MAX_CANDIDATES_PER_SEARCH} more match(es).')
+        lines.append(f'View all matches: {site_url}/jobs/searches/{search.pk}/matches/')
+        lines.append('')
+    lines += ['Best regards,', 'JobBoard Team']
+
+    return EmailMessage(subject, '\n'.join(lines), settings.DEFAULT_FROM_EMAIL, [to])
+
+
+def send_match_digests(now=None, window=None, recruiter_ids=None, connection=None):
+    """
+    Send every due digest, reusing one mail connection, and mark the included
+    matches as notified. Pass window=timedelta(0) to flush everything pending.
+    Returns the number of digests sent.
+    """
+    now = now or timezone.now()
+    due = due_recruiter_ids(now, window, recruiter_ids)
+    if not due:
+        return 0
+
+    matches = (
+        pending_matches(due, until=now)
+        .select_related('saved_search__recruiter__user', 'candidate__user')
+        .order_by('saved_search_id', '-first_matched_date')
+    )
+    grouped = defaultdict(lambda: defaultdict(list))
+    for match in matches:
+        grouped[match.saved_search.recruiter][match.saved_search].append(match)
+
+    sent = 0
+    connection = connection or get_connection()
+    with connection:
+        for recruiter, matches_by_search in grouped.items():
+            to = recruiter.email or recruiter.user.email
+            if not to:
+                logger.warning('No email address for recruiter %s; digest skipped', recruiter.user.username)
+                continue
+            try:
+                if not connection.send_messages([build_digest(recruiter, matches_by_search, to)]):
+                    continue
+            except Exception:
+                # Matches stay unnotified and are retried with the next digest
+                logger.exception('Failed to send match digest to %s', to)
+                continue
+            # Only the matches in this email: the matcher backdates first_matched_date,
+            # so rows inserted since the SELECT can still fall before `now`
+            match_ids = [match.pk for matches in matches_by_search.values() for match in matches]
+            for start in range(0, len(match_ids), ID_CHUNK_SIZE):
+                CandidateSearchMatch.objects.filter(pk__in=match_ids[start:start + ID_CHUNK_SIZE]).update(
+                    notified=True, notified_date=now,
+                )
+            search_ids = [search.pk for search in matches_by_search]
+            SavedCandidateSearch.objects.filter(pk__in=search_ids).update(last_notified=now)
+            sent += 1
+    return sent
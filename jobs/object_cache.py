@@ -0,0 +1,91 @@
+"""
+Read-through cache for the objects behind the most viewed pages.
+
+get_job() returns a Job for job_detail and get_profile_bundle() a public
+profile bundle for profile_detail: the Profile with its user, education and
+work experience prefetched, looked up by username but stored by user id.
+Receivers in jobs.signals drop an entry whenever any part of it is saved or
+deleted, both immediately and again once the surrounding transaction
+commits, so a request that reads between the write and the commit cannot
+leave the old version cached.
+
+Misses are filled from the primary database so a lagging read replica cannot
+put stale rows back right after an invalidation.
+"""
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+
+from accounts.models import Profile
+from .metrics import record_cache_lookup
+from .models import Job
+
+
+OBJECT_CACHE_TIMEOUT = 60 * 60
+
+
+def job_cache_key(pk):
+    return f'object:job:{pk}'
+
+
+def profile_cache_key(user_id):
+    return f'object:profile:{user_id}'
+
+
+def _profile_user_id_key(username):
+    # Which user a username belongs to. Losing this entry only costs a query:
+    # bundles are stored and invalidated by user id, so a stale bundle cannot
+    # outlive it
+    return f'object:profile_user_id:{username}'
+
+
+def get_job(pk):
+    """The Job with `poster_user_id` annotated, or None if it does not exist."""
+    key = job_cache_key(pk)
+    job = cache.get(key)
+    record_cache_lookup('jobs', job is not None)
+    if job is None:
+        job = (
+            Job.objects.using(DEFAULT_DB_ALIAS).annotate(poster_user_id=F('posted_by__user_id'))
+            .filter(pk=pk).first()
+        )
+        if job is None:
+            return None
+        cache.set(key, job, OBJECT_CACHE_TIMEOUT)
+    return job
+
+
+def get_profile_bundle(username):
+    """The Profile for `username` with user, education and work experience loaded, or None."""
+    user_id = cache.get(_profile_user_id_key(username))
+    profile = cache.get(profile_cache_key(user_id)) if user_id is not None else None
+    if profile is not None and profile.user.username != username:
+        # The user was renamed since the mapping was stored
+        profile = None
+    record_cache_lookup('profiles', profile is not None)
+    if profile is None:
+        profile = (
+            Profile.objects.using(DEFAULT_DB_ALIAS).select_related('user')
+            .prefetch_related('education', 'work_experience')
+            .filter(user__username=username).first()
+        )
+        if profile is None:
+            return None
+        cache.set_many({
+            profile_cache_key(profile.user_id): profile,
+            _profile_user_id_key(username): profile.user_id,
+        }, OBJECT_CACHE_TIMEOUT)
+    return profile
+
+
+def _delete(keys):
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_job(pk):
+    _delete([job_cache_key(pk)])
+
+
+def invalidate_profile_bundle(user_id):
+    _delete([profile_cache_key(user_id)])
@@ -0,0 +1,173 @@
+"""
+Sampled per-request query profiling.
+
+QueryProfilingMiddleware wraps every database connection with an execute
+wrapper for a random sample of requests (QUERY_PROFILING_SAMPLE_RATE) and
+records the query count, total DB time, repeated SQL fingerprints (the usual
+N+1 signature) and wall time. Records go to a small in-process ring buffer
+that backs the staff profiling report; requests over the configured
+thresholds are also logged as warnings. With a sample rate of 0 the
+middleware removes itself from the chain and costs nothing.
+
+The buffer is per process, so each worker reports on the requests it served.
+Queries run while a streaming response is being consumed are not counted.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+_buffer = deque(maxlen=200)
+_buffer_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, f'QUERY_PROFILING_{name}', default)
+
+
+def fingerprint(sql):
+    """
+    Normalize SQL so repeats of the same statement with different values
+    (including IN lists of different lengths) share a fingerprint.
+    """
+    return _NUMBER_RE.sub('N', _IN_LIST_RE.sub('(...)', sql))
+
+
+class QueryProfile:
+    """Execute wrapper accumulating statistics for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, limit=5):
+        """[(fingerprint, count)] for statements run more than once, most repeated first."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common(limit) if n > 1]
+
+
+def record_request(record):
+    global _buffer
+    maxlen = _setting('BUFFER_SIZE', 200)
+    with _buffer_lock:
+        if _buffer.maxlen != maxlen:
+            _buffer = deque(_buffer, maxlen=maxlen)
+        _buffer.append(record)
+
+
+def recent_requests():
+    """Profiled requests in the buffer, newest first."""
+    with _buffer_lock:
+        return list(reversed(_buffer))
+
+
+def clear_requests():
+    with _buffer_lock:
+        _buffer.clear()
+
+
+def view_summary(records):
+    """Aggregate buffered records per view, most total DB time first."""
+    views = {}
+    for record in records:
+        stats = views.setdefault(record['view'], {
+            'view': record['view'], 'requests': 0, 'queries': 0, 'max_queries': 0,
+            'db_ms': 0.0, 'wall_ms': 0.0, 'max_wall_ms': 0.0, 'duplicate_requests': 0,
+        })
+        stats['requests'] += 1
+        stats['queries'] += record['queries']
+        stats['max_queries'] = max(stats['max_queries'], record['queries'])
+        stats['db_ms'] += record['db_ms']
+        stats['wall_ms'] += record['wall_ms']
+        stats['max_wall_ms'] = max(stats['max_wall_ms'], record['wall_ms'])
+        if record['duplicates']:
+            stats['duplicate_requests'] += 1
+    summary = []
+    for stats in views.values():
+        n = stats['requests']
+        summary.append({
+            'view': stats['view'],
+            'requests': n,
+            'avg_queries': round(stats['queries'] / n, 1),
+            'max_queries': stats['max_queries'],
+            'avg_db_ms': round(stats['db_ms'] / n, 2),
+            'avg_wall_ms': round(stats['wall_ms'] / n, 2),
+            'max_wall_ms': stats['max_wall_ms'],
+            'duplicate_requests': stats['duplicate_requests'],
+            'total_db_ms': round(stats['db_ms'], 2),
+        })
+    summary.sort(key=lambda row: row['total_db_ms'], reverse=True)
+    return summary
+
+
+class QueryProfilingMiddleware:
+    """Record query statistics for a sample of requests (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.sample_rate = _setting('SAMPLE_RATE', 0.0)
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'at': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'view': (match.view_name or match._func_path) if match else request.path,
+            'status': response.status_code,
+            'queries': profile.count,
+            'db_ms': round(profile.db_seconds * 1000, 2),
+            'wall_ms': round(wall_ms, 2),
+            'duplicates': profile.duplicates(),
+        }
+        record_request(record)
+        self._warn_if_slow(record)
+        return response
+
+    def _warn_if_slow(self, record):
+        problems = []
+        if record['queries'] > _setting('MAX_QUERIES', 50):
+            problems.append(f"{record['queries']} queries")
+        if record['wall_ms'] > _setting('SLOW_MS', 500):
+            problems.append(f"{record['wall_ms']:.0f} ms")
+        if record['duplicates'] and record['duplicates'][0][1] > _setting('MAX_DUPLICATES', 10):
+            problems.append(f"statement repeated {record['duplicates'][0][1]} times")
+        if problems:
+            logger.warning('Slow request %s %s (%s): %s', record['method'], record['path'],
+                           record['view'], ', '.join(problems))
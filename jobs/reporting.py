@@ -0,0 +1,234 @@
+"""
+Incremental rollups that back the admin reporting dashboard.
+
+Each rollup reads only rows it has not processed yet and folds them into small
+precomputed tables, so the dashboard never scans the raw history at request time.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.models import Message
+from .models import (
+    ApplicationFunnelStat, ApplicationStatusEvent, DailyActivityRollup, Job,
+    JobApplication, RollupCheckpoint,
+)
+
+
+FUNNEL_CHECKPOINT = 'application_funnel'
+
+
+def funnel_settle_time():
+    return timedelta(seconds=getattr(settings, 'FUNNEL_ROLLUP_LAG_SECONDS', 300))
+
+
+def rollup_application_funnel(batch_size=5000, now=None):
+    """
+    Fold ApplicationStatusEvent rows newer than the checkpoint into
+    ApplicationFunnelStat. Returns the number of events processed.
+
+    The checkpoint is an event id, but ids are handed out at insert time, not
+    commit time: a transaction holding a lower id can become visible after a
+    higher one. So the read stops at the first event recorded less than
+    FUNNEL_ROLLUP_LAG_SECONDS ago, leaving slower transactions time to commit
+    before the checkpoint moves past their ids.
+    """
+    cutoff = (now or timezone.now()) - funnel_settle_time()
+    processed = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=FUNNEL_CHECKPOINT)
+            batch = list(
+                ApplicationStatusEvent.objects.filter(id__gt=checkpoint.position)
+                .order_by('id')
+                .values_list('id', 'job_id', 'job__posted_by_id', 'from_status', 'to_status', 'seconds_in_previous',
+                             'changed_at')
+                [:batch_size]
+            )
+            events = []
+            for event in batch:
+                if event[-1] > cutoff:
+                    break
+                events.append(event[:-1])
+            if not events:
+                return processed
+
+            # (recruiter_id, job_id or None, stage) -> [entered, exited, seconds]
+            deltas = defaultdict(lambda: [0, 0, 0])
+            for _, job_id, recruiter_id, from_status, to_status, seconds in events:
+                for scope_job_id in (job_id, None):
+                    deltas[(recruiter_id, scope_job_id, to_status)][0] += 1
+                    if from_status:
+                        delta = deltas[(recruiter_id, scope_job_id, from_status)]
+                        delta[1] += 1
+                        delta[2] += seconds or 0
+
+            _apply_funnel_deltas(deltas)
+            checkpoint.position = events[-1][0]
+            checkpoint.save(update_fields=['position', 'updated_at'])
+            processed += len(events)
+            if len(events) < len(batch):
+                return processed
+
+
+def _apply_funnel_deltas(deltas):
+    recruiter_ids = {key[0] for key in deltas}
+    existing = {
+        (stat.recruiter_id, stat.job_id, stat.stage): stat
+        for stat in ApplicationFunnelStat.objects.filter(recruiter_id__in=recruiter_ids)
+    }
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for key, (entered, exited, seconds) in deltas.items():
+        stat = existing.get(key)
+        if stat is None:
+            recruiter_id, job_id, stage = key
+            stat = ApplicationFunnelStat(recruiter_id=recruiter_id, job_id=job_id, stage=stage)
+            to_create.append(stat)
+        else:
+            to_update.append(stat)
+        stat.entered_count += entered
+        stat.exited_count += exited
+        stat.total_seconds_in_stage += seconds
+        stat.updated_at = now
+
+    ApplicationFunnelStat.objects.bulk_create(to_create)
+    ApplicationFunnelStat.objects.bulk_update(
+        to_update, ['entered_count', 'exited_count', 'total_seconds_in_stage', 'updated_at'],
+    )
+
+
+def reset_application_funnel():
+    """Drop all funnel aggregates so the next rollup rebuilds them from the event log"""
+    with transaction.atomic():
+        ApplicationFunnelStat.objects.all().delete()
+        RollupCheckpoint.objects.filter(name=FUNNEL_CHECKPOINT).delete()
+
+
+def funnel_summary(stats):
+    """
+    Turn ApplicationFunnelStat rows (already filtered to one scope) into an
+    ordered list of per-stage dicts with conversion from the previous stage.
+    """
+    totals = {
+        row['stage']: row
+        for row in stats.values('stage').annotate(
+            entered=Sum('entered_count'),
+            exited=Sum('exited_count'),
+            seconds=Sum('total_seconds_in_stage'),
+        )
+    }
+
+    summary = []
+    previous_entered = None
+    for code, name in JobApplication.STATUS_CHOICES:
+        row = totals.get(code, {})
+        entered = row.get('entered') or 0
+        exited = row.get('exited') or 0
+        seconds = row.get('seconds') or 0
+        conversion = None
+        # Closed can follow any stage, so a conversion rate is not meaningful for it
+        if previous_entered and code != 'closed':
+            conversion = round(100 * entered / previous_entered, 1)
+        summary.append({
+            'code': code,
+            'name': name,
+            'entered': entered,
+            'avg_days': round(seconds / exited / 86400, 1) if exited else None,
+            'conversion': conversion,
+        })
+        previous_entered = entered
+    return summary
+
+
+# ---------- Daily activity ----------
+
+DAILY_METRIC_FIELDS = [
+    'jobs_posted',
+    'applications_applied', 'applications_review', 'applications_interview',
+    'applications_offer', 'applications_closed',
+    'signups_seeker', 'signups_recruiter',
+    'messages_sent',
+]
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def _counts_by_day(queryset, date_field, start, end, *group_fields):
+    """Return {(day, *group values): count} for rows with date_field in [start, end)"""
+    rows = (
+        queryset.filter(**{f'{date_field}__gte': _day_start(start), f'{date_field}__lt': _day_start(end)})
+        .annotate(day=TruncDate(date_field, tzinfo=dt_timezone.utc))
+        .values('day', *group_fields)
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    return {(row['day'], *(row[f] for f in group_fields)): row['count'] for row in rows}
+
+
+def _first_activity_day():
+    firsts = [
+        Job.objects.aggregate(first=Min('posted_date'))['first'],
+        ApplicationStatusEvent.objects.aggregate(first=Min('changed_at'))['first'],
+        User.objects.aggregate(first=Min('date_joined'))['first'],
+        Message.objects.aggregate(first=Min('sent_at'))['first'],
+    ]
+    firsts = [value for value in firsts if value is not None]
+    if not firsts:
+        return None
+    return min(firsts).astimezone(dt_timezone.utc).date()
+
+
+def rollup_daily_activity(through=None, since=None):
+    """
+    Compute DailyActivityRollup rows for every complete UTC day that has not been
+    rolled up yet, up to and including `through` (default and latest allowed:
+    yesterday, since a partial day would never be recomputed). Passing `since`
+    recomputes from that day onward. Returns the list of days written.
+    """
+    yesterday = timezone.now().astimezone(dt_timezone.utc).date() - timedelta(days=1)
+    through = yesterday if through is None else min(through, yesterday)
+
+    if since is None:
+        last = DailyActivityRollup.objects.order_by('-day').values_list('day', flat=True).first()
+        since = last + timedelta(days=1) if last else _first_activity_day()
+    if since is None or since > through:
+        return []
+
+    end = through + timedelta(days=1)
+    jobs = _counts_by_day(Job.objects.all(), 'posted_date', since, end)
+    transitions = _counts_by_day(ApplicationStatusEvent.objects.all(), 'changed_at', since, end, 'to_status')
+    signups = _counts_by_day(User.objects.all(), 'date_joined', since, end, 'profile__role')
+    messages = _counts_by_day(Message.objects.all(), 'sent_at', since, end)
+
+    rows = []
+    day = since
+    while day <= through:
+        row = DailyActivityRollup(day=day, jobs_posted=jobs.get((day,), 0), messages_sent=messages.get((day,), 0))
+        for status, _ in JobApplication.STATUS_CHOICES:
+            setattr(row, f'applications_{status}', transitions.get((day, status), 0))
+        row.signups_seeker = signups.get((day, 'seeker'), 0)
+        row.signups_recruiter = signups.get((day, 'recruiter'), 0)
+        rows.append(row)
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        DailyActivityRollup.objects.filter(day__gte=since, day__lte=through).delete()
+        DailyActivityRollup.objects.bulk_create(rows, batch_size=500)
+    return [row.day for row in rows]
+
+
+def activity_totals(rollups):
+    """Sum every daily metric over a DailyActivityRollup queryset"""
+    totals = rollups.aggregate(**{field: Sum(field) for field in DAILY_METRIC_FIELDS})
+    return {field: value or 0 for field, value in totals.items()}
@@ -1,19 +1,48 @@
 """
 Utility functions for candidate search matching
 """
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
 from django.db.models import Q
 from accounts.models import Profile
 from .models import SavedCandidateSearch, CandidateSearchMatch
 from .recommendations import parse_skills, split_skills
+from .distance import distance_expression, within_radius_box
+from .candidate_index import CandidateIndex, SearchSpec, init_worker, match_specs
 from django.utils import timezone
 
 
-def find_candidates_for_search(saved_search):
+# Keeps IN (...) lists well below SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+
+def filter_candidates_by_radius(candidates, latitude, longitude, radius_miles):
+    """
+    Restrict a Profile queryset to candidates within radius_miles of a point,
+    annotated with their `distance_miles`. A lat/lon box narrows the rows
+    before the exact distance check, and both run in SQL, so no id list is
+    bound however many candidates are in range.
+    """
+    return (
+        within_radius_box(candidates, latitude, longitude, radius_miles)
+        .annotate(distance_miles=distance_expression(latitude, longitude))
+        .filter(distance_miles__lte=radius_miles)
+    )
+
+
+def find_candidates_for_search(saved_search, candidates=None):
     """
     Find all candidates that match a saved search criteria.
     Returns a queryset of Profile objects.
+
+    Pass a Profile queryset as candidates to check only those profiles, e.g.
+    a single profile that was just saved.
     """
-    candidates = Profile.objects.filter(role='seeker', is_public=True).select_related('user')
+    if candidates is None:
+        candidates = Profile.objects.all()
+    candidates = candidates.filter(role='seeker', is_public=True).select_related('user')
     
     # Text search (name, headline, bio)
     if saved_search.search_query:
@@ -26,8 +55,12 @@ def find_candidates_for_search(saved_search):
             Q(bio__icontains=query)
         )
     
-    # Location filter
-    if saved_search.location:
+    # Location filter: distance from the geocoded center when a radius is set
+    if saved_search.has_radius_filter:
+        candidates = filter_candidates_by_radius(
+            candidates, saved_search.latitude, saved_search.longitude, saved_search.radius_miles,
+        )
+    elif saved_search.location:
         candidates = candidates.filter(location__icontains=saved_search.location)
     
     # Skills filter - use proper skill parsing for accurate matching
@@ -62,12 +95,18 @@ def find_new_matches_for_search(saved_search):
     """
     Find new candidates that match a saved search but haven't been tracked yet.
     Returns a list of Profile objects.
+
+    Only profiles updated since the search was last checked are evaluated;
+    last_checked is cleared whenever the criteria change, forcing a rescan.
     """
     if not saved_search.is_active:
         return []
     
     # Get all matching candidates
-    matching_candidates = find_candidates_for_search(saved_search)
+    candidates = None
+    if saved_search.last_checked:
+        candidates = Profile.objects.filter(updated_at__gte=saved_search.last_checked)
+    matching_candidates = find_candidates_for_search(saved_search, candidates)
     
     # Get IDs of candidates we've already tracked
     existing_match_ids = CandidateSearchMatch.objects.filter(
@@ -85,21 +124,133 @@ def create_matches_for_search(saved_search, candidates):
     Create CandidateSearchMatch records for the given candidates.
     Returns the number of matches created.
     """
-    matches_created = 0
-    for candidate in candidates:
-        match, created = CandidateSearchMatch.objects.get_or_create(
-            saved_search=saved_search,
-            candidate=candidate,
-            defaults={
-                'first_matched_date': timezone.now(),
-            }
+    created = record_new_matches({saved_search.pk: {candidate.pk for candidate in candidates}})
+    return len(created.get(saved_search.pk, ()))
+
+
+def build_candidate_index(since=None, profiles=None):
+    """
+    Load searchable candidates once, with skills parsed, into a CandidateIndex.
+    With since, only profiles updated at or after that time are loaded; pass a
+    Profile queryset as profiles to index only those.
+    """
+    index = CandidateIndex()
+    profiles = (Profile.objects.all() if profiles is None else profiles).filter(role='seeker', is_public=True)
+    if since is not None:
+        profiles = profiles.filter(updated_at__gte=since)
+    rows = profiles.values_list(
+        'id', 'skills', 'location', 'latitude', 'longitude', 'updated_at',
+        'user__username', 'user__first_name', 'user__last_name', 'headline', 'bio',
+    )
+    for pk, skills, location, latitude, longitude, updated_at, *text_fields in rows.iterator(chunk_size=2000):
+        index.add(pk, parse_skills(skills), location, latitude, longitude, text_fields, updated_at)
+    return index
+
+
+def incremental_since(searches):
+    """
+    Oldest last_checked among searches, i.e. how far back the candidate index
+    must reach, or None when any search needs a full rescan.
+    """
+    checked = [search.last_checked for search in searches]
+    if not checked or None in checked:
+        return None
+    return min(checked)
+
+
+def search_spec(saved_search, incremental=True):
+    """
+    Reduce a SavedCandidateSearch to the plain SearchSpec the index matches on.
+    Incremental specs only consider profiles updated since last_checked.
+    """
+    return SearchSpec(
+        search_id=saved_search.pk,
+        query=saved_search.search_query or '',
+        location=saved_search.location or '',
+        center=(saved_search.latitude, saved_search.longitude) if saved_search.has_radius_filter else None,
+        radius_miles=saved_search.radius_miles if saved_search.has_radius_filter else None,
+        skills=frozenset(parse_skills(saved_search.skills)),
+        since=saved_search.last_checked if incremental else None,
+    )
+
+
+def match_saved_searches(searches, index=None, workers=1, batch_size=50, incremental=True):
+    """
+    Evaluate saved searches against a shared candidate index.
+    Returns {search_id: set of matching candidate ids}.
+
+    Incremental runs only look at profiles changed since each search's
+    last_checked, so the default index covers just the oldest of those.
+    With workers > 1 the searches are split into batches and matched in a
+    process pool; each worker receives the index once.
+    """
+    if index is None:
+        index = build_candidate_index(since=incremental_since(searches) if incremental else None)
+    specs = [search_spec(search, incremental) for search in searches]
+    if workers <= 1 or len(specs) <= batch_size:
+        return dict(match_specs(specs, index))
+
+    batches = [specs[i:i + batch_size] for i in range(0, len(specs), batch_size)]
+    # Workers only do in-memory matching against the index and never use the
+    # database connections they inherit from a fork.
+    start_methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork') if 'fork' in start_methods else None
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=init_worker, initargs=(index,)) as pool:
+        for batch_result in pool.map(match_specs, batches):
+            results.update(batch_result)
+    return results
+
+
+def _chunks(values, size=ID_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def new_matches(results):
+    """
+    Drop candidates already recorded for each search.
+    Takes and returns {search_id: set of candidate ids}.
+    """
+    existing = defaultdict(set)
+    for search_ids in _chunks(results):
+        pairs = CandidateSearchMatch.objects.filter(saved_search_id__in=search_ids).values_list(
+            'saved_search_id', 'candidate_id'
         )
-        if created:
-            matches_created += 1
-    
-    # Update last_checked timestamp
-    saved_search.last_checked = timezone.now()
-    saved_search.save(update_fields=['last_checked'])
-    
-    return matches_created
+        for search_id, candidate_id in pairs:
+            existing[search_id].add(candidate_id)
+    return {
+        search_id: candidate_ids - existing[search_id]
+        for search_id, candidate_ids in results.items()
+        if candidate_ids - existing[search_id]
+    }
+
 
+def record_new_matches(results, batch_size=1000, checked_at=None, mark_checked=True):
+    """
+    Bulk-insert CandidateSearchMatch rows for matches not seen before and,
+    unless mark_checked is False, stamp last_checked on every evaluated
+    search. Conflicting rows (e.g. from the post_save signal racing this run)
+    are skipped.
+
+    Pass the time the candidate index was loaded as checked_at so profiles
+    saved while the run was in progress are picked up by the next one.
+    Returns {search_id: set of newly matched candidate ids}.
+    """
+    created = new_matches(results)
+    now = checked_at or timezone.now()
+    CandidateSearchMatch.objects.bulk_create(
+        (
+            CandidateSearchMatch(saved_search_id=search_id, candidate_id=candidate_id, first_matched_date=now)
+            for search_id, candidate_ids in created.items()
+            for candidate_id in candidate_ids
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    if mark_checked:
+        for search_ids in _chunks(results):
+            SavedCandidateSearch.objects.filter(pk__in=search_ids).update(last_checked=now)
+    return created
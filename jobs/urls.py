@@ -33,6 +33,8 @@ urlpatterns = [
     path('<int:job_pk>/pipeline/', views.application_pipeline, name='application_pipeline'),
 
     path("api/jobs/", views.jobs_api, name="jobs_api"),
+    path("api/jobs/tiles/<int:z>/<int:x>/<int:y>.json", views.job_tile, name="job_tile"),
+    path("api/geocode/", views.geocode_api, name="geocode_api"),
     path("api/recommendations/", views.recommendations_api, name="recommendations_api"),
 
     # Saved candidate searches
@@ -56,5 +58,12 @@ urlpatterns = [
     path('admin/export/users/', admin_views.export_users, name='admin_export_users'),
     path('admin/export/profiles/', admin_views.export_profiles, name='admin_export_profiles'),
     path('admin/export/stats/', admin_views.export_usage_stats, name='admin_export_stats'),
+    path('admin/export/activity/', admin_views.export_daily_activity, name='admin_export_activity'),
+    path('admin/export/delta/<str:kind>/', admin_views.export_delta, name='admin_export_delta'),
+    path('admin/exports/queue/', admin_views.request_export, name='admin_request_export'),
+    path('admin/exports/<int:pk>/status/', admin_views.export_job_status, name='admin_export_job_status'),
+    path('admin/exports/<int:pk>/download/', admin_views.download_export, name='admin_download_export'),
+    path('admin/profiling/', admin_views.profiling_report, name='admin_profiling_report'),
+    path('admin/profiling/json/', admin_views.profiling_report_json, name='admin_profiling_report_json'),
 
 ]
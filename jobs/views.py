@@ -1,12 +1,16 @@
+import hmac
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.http import JsonResponse
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, Exists, Max, OuterRef, Q, Subquery
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, Http404
 from django.urls import reverse
 from django.core.paginator import Paginator
-from math import pi, sin, cos, asin, sqrt
 
+from django.utils.http import parse_etags
 from django.views.decorators.http import require_POST
 
 from .models import Job, JobApplication, SavedJob, SavedCandidateSearch, CandidateSearchMatch
@@ -16,7 +20,15 @@ from .recommendations import (
     recommend_jobs_for_profile,
     recommend_candidates_for_job,
 )
+from .geocode import autocomplete, geocode
+from .clustering import MAX_POINTS, POINT_ZOOM, grid_clusters, parse_bbox, parse_zoom, within_bbox
+from .map_tiles import get_tile, is_valid_tile, job_point
+from .object_cache import get_job
+from .conditional import Validators, collection_version, conditional, csrf_secret, make_etag, query_key
+from .distance import load_ranked, rank_by_distance
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, SEARCH_RESULTS
 from accounts.models import Profile
+from jobboard.routers import read_from_replica
 
 @login_required
 def recruiter_dashboard(request):
@@ -31,7 +43,7 @@ def recruiter_dashboard(request):
 
 
     context = {
-        "jobs": jobs,
+        "jobs": jobs.annotate(application_count=Count("applications")),
         "total_jobs": total_jobs,
         "total_applicants": total_applicants,
     }
@@ -39,6 +51,7 @@ def recruiter_dashboard(request):
 
 
 
+@read_from_replica
 def job_list(request):
     """Job search and listing page with filters"""
     form = JobSearchForm(request.GET or None)
@@ -46,6 +59,8 @@ def job_list(request):
     location_lat = None
     location_lon = None
     location_radius_value = form.fields["location_radius"].initial or 25
+    sort_origin = None
+    ranked = None
 
     # Apply search filters
     if form.is_valid():
@@ -94,29 +109,43 @@ def job_list(request):
         if visa_sponsorship:
             jobs = jobs.filter(visa_sponsorship=True)
 
+        sort = form.cleaned_data.get('sort')
+        if sort == 'distance' and (location_lat is None or location_lon is None) and location:
+            # Order by distance from the typed place without limiting the radius
+            place = geocode(location)
+            if place:
+                sort_origin = (place.lat, place.lon)
+
         # Location filter (distance-based when coordinates are provided)
         if location_lat is not None and location_lon is not None:
             try:
                 radius = float(location_radius_value or 25)
             except (TypeError, ValueError):
                 radius = 25
-            filtered_jobs = []
-            for job in jobs.exclude(latitude__isnull=True).exclude(longitude__isnull=True):
-                if job.latitude is None or job.longitude is None:
-                    continue
-                distance = _haversine_miles(location_lat, location_lon, job.latitude, job.longitude)
-                if distance <= radius:
-                    job.search_distance = round(distance, 1)
-                    filtered_jobs.append(job)
-            filtered_jobs.sort(key=lambda j: getattr(j, "search_distance", 0))
-            jobs = filtered_jobs
+            ranked = rank_by_distance(
+                jobs, location_lat, location_lon, radius, order_by_distance=sort != 'newest',
+            )
+        elif sort_origin:
+            ranked = rank_by_distance(jobs, *sort_origin)
+            # Jobs without coordinates are listed after the mapped ones
+            ranked += [
+                (pk, None) for pk in jobs.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True))
+                .values_list('id', flat=True)
+            ]
         elif location:
             jobs = jobs.filter(location__icontains=location)
 
     # Pagination
-    paginator = Paginator(jobs, 12)  # Show 12 jobs per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if ranked is not None:
+        # Paginate the (id, distance) pairs; only the visible jobs are loaded
+        paginator = Paginator(ranked, 12)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        page_obj.object_list = load_ranked(jobs, page_obj.object_list)
+    else:
+        paginator = Paginator(jobs, 12)  # Show 12 jobs per page
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+    SEARCH_RESULTS.observe(paginator.count, search='job_list')
 
     # Get user's saved jobs and applications for UI hints
     saved_job_ids = []
@@ -144,26 +173,46 @@ def job_list(request):
     return render(request, 'jobs/job_list.html', context)
 
 
+def _job_detail_validators(request, pk):
+    # Only anonymous pages are the same for every viewer
+    if request.user.is_authenticated:
+        return None
+    job = get_job(pk)
+    if job is None or not job.is_active:
+        return None
+    return Validators(make_etag('job_detail', job.pk, job.updated_at, csrf_secret(request)), job.updated_at)
+
+
+@read_from_replica
+@conditional(_job_detail_validators)
 def job_detail(request, pk):
     """Individual job detail page"""
-    job = get_object_or_404(Job, pk=pk, is_active=True)
+    job = get_job(pk)
+    if job is None or not job.is_active:
+        raise Http404("No Job matches the given query.")
 
     # Check if user has already applied or saved this job
     user_application = None
     has_saved = False
     is_job_owner = False
     if request.user.is_authenticated:
-        try:
-            user_application = JobApplication.objects.get(job=job, applicant=request.user)
-        except JobApplication.DoesNotExist:
-            pass
+        # Both per-user lookups in one query against the job row
+        applications = JobApplication.objects.filter(job=OuterRef('pk'), applicant=request.user)
+        row = Job.objects.filter(pk=job.pk).values_list(
+            Subquery(applications.values('pk')[:1]),
+            Subquery(applications.values('status')[:1]),
+            Exists(SavedJob.objects.filter(job=OuterRef('pk'), user=request.user)),
+        ).first()
+        if row is None:
+            raise Http404("No Job matches the given query.")
+        application_id, application_status, has_saved = row
+        if application_id is not None:
+            user_application = JobApplication(
+                pk=application_id, job=job, applicant=request.user, status=application_status,
+            )
 
-        has_saved = SavedJob.objects.filter(user=request.user, job=job).exists()
-        
         # Check if user is the job owner (recruiter)
-        profile = getattr(request.user, "profile", None)
-        if profile and job.posted_by == profile:
-            is_job_owner = True
+        is_job_owner = job.poster_user_id == request.user.pk
 
     context = {
         'job': job,
@@ -208,16 +257,13 @@ def apply_to_job(request, pk):
 @login_required
 def my_applications(request):
     """Dashboard showing user's job applications with status tracking"""
-    applications = JobApplication.objects.filter(applicant=request.user)
+    applications = JobApplication.objects.filter(applicant=request.user).select_related('job')
 
     # Group by status for dashboard view
-    status_counts = {
-        'applied': applications.filter(status='applied').count(),
-        'review': applications.filter(status='review').count(),
-        'interview': applications.filter(status='interview').count(),
-        'offer': applications.filter(status='offer').count(),
-        'closed': applications.filter(status='closed').count(),
-    }
+    status_counts = dict.fromkeys(dict(JobApplication.STATUS_CHOICES), 0)
+    status_counts.update(
+        applications.order_by().values_list('status').annotate(count=Count('id'))
+    )
 
     # Filter by status if requested
     status_filter = request.GET.get('status')
@@ -399,10 +445,9 @@ def application_pipeline(request, job_pk):
     job = get_object_or_404(Job, pk=job_pk, posted_by=request.user.profile)
 
     # Group applications by status
-    applications_by_status = {
-        status[0]: JobApplication.objects.filter(job=job, status=status[0])
-        for status in JobApplication.STATUS_CHOICES
-    }
+    applications_by_status = {status: [] for status, _ in JobApplication.STATUS_CHOICES}
+    for application in JobApplication.objects.filter(job=job).select_related('applicant'):
+        applications_by_status.setdefault(application.status, []).append(application)
 
     context = {
         "job": job,
@@ -431,59 +476,119 @@ def update_application_status(request, pk):
     return redirect("application_pipeline", job_pk=application.job.pk)
 
 
-def _haversine_miles(lat1, lon1, lat2, lon2):
-    R = 3958.8
-    p = pi / 180
-    dlat = (lat2 - lat1) * p
-    dlon = (lon2 - lon1) * p
-    a = (sin(dlat/2)**2) + cos(lat1*p) * cos(lat2*p) * (sin(dlon/2)**2)
-    return 2 * R * asin(sqrt(a))
+def _parse_viewport(request):
+    """Return (bbox, zoom) for clustered map requests, or raise ValueError."""
+    return parse_bbox(request.GET.get("bbox")), parse_zoom(request.GET.get("zoom"))
+
+def _jobs_api_validators(request):
+    jobs = Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+    return Validators(make_etag('jobs_api', query_key(request), *collection_version(jobs)))
 
+
+@read_from_replica
+@conditional(_jobs_api_validators)
 def jobs_api(request):
     """
     GET /jobs/api/jobs?lat=..&lon=..&radius_miles=..
     If Job has latitude/longitude fields, returns nearby jobs; otherwise empty list.
+
+    GET /jobs/api/jobs?bbox=minLon,minLat,maxLon,maxLat&zoom=..
+    Returns grid clusters for the viewport, plus individual jobs once zoomed in.
     """
+    if "bbox" in request.GET:
+        try:
+            bbox, zoom = _parse_viewport(request)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        qs = Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+        if zoom >= POINT_ZOOM:
+            jobs = within_bbox(qs, bbox).only(
+                "id", "title", "company", "location", "latitude", "longitude"
+            ).order_by("-posted_date")[:MAX_POINTS]
+            return JsonResponse({"zoom": zoom, "clusters": [], "jobs": [job_point(job) for job in jobs]})
+        return JsonResponse({"zoom": zoom, "clusters": grid_clusters(qs, bbox, zoom), "jobs": []})
+
     lat = request.GET.get("lat")
     lon = request.GET.get("lon")
     radius = request.GET.get("radius_miles")
 
-    # Only include jobs with lat/lon if those fields exist
-    qs = Job.objects.all()
-    has_latlon = all(hasattr(Job, f) for f in ["latitude", "longitude"])
-
-    items = []
-    if has_latlon:
-        qs = qs.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
-        if lat and lon and radius:
-            lat_f, lon_f, radius_f = float(lat), float(lon), float(radius)
-        else:
-            lat_f = lon_f = radius_f = None
-
-        for job in qs:
-            if job.latitude is None or job.longitude is None:
-                continue
-
-            distance = None
-            if lat_f is not None and lon_f is not None and radius_f is not None:
-                distance = _haversine_miles(lat_f, lon_f, job.latitude, job.longitude)
-                if distance > radius_f:
-                    continue
-
-            items.append({
-                "id": job.id,
-                "title": job.title,
-                "company": job.company or "",
-                "location": job.location or "",
-                "lat": job.latitude,
-                "lon": job.longitude,
-                "distance_miles": round(distance, 2) if distance is not None else None,
-                "url": reverse("job_detail", args=[job.id]),
-            })
+    qs = Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+    if lat and lon and radius:
+        ranked = rank_by_distance(qs, float(lat), float(lon), float(radius), order_by_distance=False)
+        jobs = qs.in_bulk([pk for pk, _ in ranked])
+        items = [job_point(jobs[pk], distance) for pk, distance in ranked]
+    else:
+        items = [job_point(job) for job in qs]
 
+    SEARCH_RESULTS.observe(len(items), search='jobs_api')
     return JsonResponse({"jobs": items})
 
+def job_tile(request, z, x, y):
+    """
+    GET /jobs/api/jobs/tiles/<z>/<x>/<y>.json
+    Cached clusters (or individual jobs at high zoom) for one map tile.
+    """
+    if not is_valid_tile(z, x, y):
+        raise Http404("Tile out of range")
+    body, etag = get_tile(z, x, y)
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=60"
+    return response
+
+def metrics(request):
+    """
+    GET /metrics
+    Prometheus text exposition of the in-process metrics registry. Open to
+    scrapers sending METRICS_BEARER_TOKEN, to METRICS_ALLOWED_IPS and to staff users.
+    """
+    token = getattr(settings, "METRICS_BEARER_TOKEN", None)
+    authorization = request.headers.get("Authorization", "")
+    has_token = bool(token) and hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode())
+    allowed_ips = getattr(settings, "METRICS_ALLOWED_IPS", [])
+    if not (has_token or request.META.get("REMOTE_ADDR") in allowed_ips or request.user.is_staff):
+        raise Http404
+    return HttpResponse(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+def geocode_api(request):
+    """
+    GET /jobs/api/geocode/?q=..
+    Place suggestions from the local geocoding cache, used for location autocomplete.
+    """
+    query = (request.GET.get("q") or "").strip()
+    results = autocomplete(query)
+    if not results:
+        # Cache only, like every request path: this runs on every keystroke,
+        # which remote geocoders (Nominatim's usage policy in particular) do not allow
+        exact = geocode(query)
+        results = [exact] if exact else []
+    return JsonResponse({
+        "results": [{"label": r.label, "lat": r.lat, "lon": r.lon} for r in results],
+    })
+
+def _recommendations_api_validators(request):
+    profile = getattr(request.user, "profile", None)
+    if not profile:
+        return None
+    # Recommendations skip jobs the seeker has applied to or saved
+    viewer = User.objects.filter(pk=request.user.pk).aggregate(
+        applications=Count("job_applications", distinct=True),
+        applied=Max("job_applications__applied_date"),
+        saved=Count("saved_jobs", distinct=True),
+        saved_at=Max("saved_jobs__saved_date"),
+    )
+    return Validators(
+        make_etag("recommendations_api", profile.pk, profile.skills,
+                  *collection_version(Job.objects.all()), *viewer.values()),
+        private=True,
+    )
+
+
 @login_required
+@conditional(_recommendations_api_validators)
 def recommendations_api(request):
     """
     Returns recommended jobs. If you add a profile.skills M2M and job.required_skills M2M,
@@ -517,12 +622,10 @@ def saved_candidate_searches(request):
         messages.error(request, "Only recruiters can access saved searches.")
         return redirect("home")
 
-    searches = SavedCandidateSearch.objects.filter(recruiter=profile)
-    
-    # Get match counts for each search
-    for search in searches:
-        search.match_count = search.matches.count()
-        search.new_match_count = search.matches.filter(notified=False).count()
+    searches = SavedCandidateSearch.objects.filter(recruiter=profile).annotate(
+        match_count=Count('matches'),
+        new_match_count=Count('matches', filter=Q(matches__notified=False)),
+    )
 
     context = {
         'searches': searches,
@@ -551,6 +654,7 @@ def create_saved_search(request):
         form = SavedCandidateSearchForm(initial={
             'search_query': request.GET.get('q', ''),
             'location': request.GET.get('location', ''),
+            'radius_miles': request.GET.get('radius') or None,
             'skills': request.GET.get('skill', ''),
         })
 
@@ -666,13 +770,39 @@ def applicant_location_map(request):
     return render(request, 'jobs/applicant_location_map.html', context)
 
 
+def _applicants_api_validators(request):
+    profile = getattr(request.user, "profile", None)
+    if not profile or profile.role != "recruiter":
+        return None
+    stats = JobApplication.objects.filter(job__posted_by=profile).aggregate(
+        count=Count("pk"),
+        updated=Max("last_updated"),
+        profiles=Max("applicant__profile__updated_at"),
+        jobs=Max("job__updated_at"),
+    )
+    return Validators(make_etag("applicants_api", profile.pk, query_key(request), *stats.values()), private=True)
+
+
 @login_required
+@conditional(_applicants_api_validators)
 def applicants_api(request):
-    """API endpoint returning applicant locations for a recruiter"""
+    """
+    API endpoint returning applicant locations for a recruiter.
+
+    With ``bbox`` and ``zoom`` parameters only the viewport is considered and,
+    below POINT_ZOOM, applicants are returned as grid clusters instead.
+    """
     profile = getattr(request.user, "profile", None)
     if not profile or profile.role != "recruiter":
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
+    viewport = None
+    if "bbox" in request.GET:
+        try:
+            viewport = _parse_viewport(request)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
     # Get all jobs posted by this recruiter
     jobs = Job.objects.filter(posted_by=profile)
     
@@ -684,6 +814,14 @@ def applicants_api(request):
     ).exclude(
         applicant__profile__longitude__isnull=True
     )
+
+    if viewport:
+        bbox, zoom = viewport
+        coords = {"lat_field": "applicant__profile__latitude", "lon_field": "applicant__profile__longitude"}
+        if zoom < POINT_ZOOM:
+            clusters = grid_clusters(applications, bbox, zoom, **coords)
+            return JsonResponse({"zoom": zoom, "clusters": clusters, "locations": []})
+        applications = within_bbox(applications, bbox, **coords)[:MAX_POINTS]
     
     # Group applicants by location (lat/lon) to show counts
     location_map = {}
@@ -728,4 +866,6 @@ def applicants_api(request):
         for loc in location_map.values()
     ]
     
+    if viewport:
+        return JsonResponse({"zoom": viewport[1], "clusters": [], "locations": locations})
     return JsonResponse({"locations": locations})
\ No newline at end of file